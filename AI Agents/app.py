@@ -1,38 +1,58 @@
+from __future__ import annotations
+
 import streamlit as st
+import sys
 import time
 import traceback
+import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import TYPE_CHECKING, List, Optional, Dict
 import calendar as cal
 from dataclasses import dataclass
 import json
 
+if TYPE_CHECKING:
+    from optimized_agent import SemesterCalendar, WeeklyCalendar, SemesterInfo
+
 # Add debug mode toggle at the top
 DEBUG_MODE = True
 
+# Seconds between job status checks while a calendar is generating
+POLL_INTERVAL_S = 0.5
+
 def debug_log(message: str):
     """Helper function to log debug messages"""
     if DEBUG_MODE:
         st.sidebar.write(f"🐛 {message}")
         print(f"DEBUG: {message}")
 
-# Try importing and show what works
-try:
-    from optimized_agent import (
-        extract_semester_info,
-        generate_full_calendar,
-        regenerate_weeks,
-        generate_quiz,
-        generate_multiple_weeks_batch,
-        SemesterCalendar,
-        WeeklyCalendar,
-        SemesterInfo
-    )
-    debug_log("✅ All imports successful!")
-except ImportError as e:
-    st.error(f"❌ Import Error: {str(e)}")
-    st.error(f"Full traceback: {traceback.format_exc()}")
-    st.stop()
+@st.cache_resource(show_spinner="Loading study planner agent...")
+def _load_agent_module():
+    """Imports the agent (LangChain, LangGraph, Pydantic) once per process."""
+    import optimized_agent
+    return optimized_agent
+
+
+@st.cache_resource(show_spinner="Starting calendar workers...")
+def get_job_queue():
+    """One job queue, and so one worker pool, shared by every session in this process."""
+    import job_queue
+    return job_queue.JobQueue.from_env()
+
+
+def get_agent():
+    """
+    Returns the optimized_agent module, importing it on first use.
+    Only called when generation is actually requested, so plain page
+    interactions never pay for the heavy imports.
+    """
+    try:
+        agent = _load_agent_module()
+    except ImportError as e:
+        st.error(f"❌ Import Error: {str(e)}")
+        st.error(f"Full traceback: {traceback.format_exc()}")
+        st.stop()
+    return agent
 
 
 # ============ Streamlit Configuration ============
@@ -122,6 +142,18 @@ if 'semester_info' not in st.session_state:
 if 'syllabus_text' not in st.session_state:
     st.session_state.syllabus_text = ""
     debug_log("Initialized syllabus_text = ''")
+
+# Syllabus the current calendar was generated from, to detect edits
+if 'calendar_syllabus' not in st.session_state:
+    st.session_state.calendar_syllabus = ""
+
+# Weeks that failed to generate, offered for regeneration
+if 'missing_weeks' not in st.session_state:
+    st.session_state.missing_weeks = []
+
+# Practice quiz from the workflow run or the Generate Quiz button
+if 'quiz' not in st.session_state:
+    st.session_state.quiz = None
     
 if 'generating' not in st.session_state:
     st.session_state.generating = False
@@ -134,19 +166,34 @@ if 'selected_weeks' not in st.session_state:
 if 'error_log' not in st.session_state:
     st.session_state.error_log = []
 
+# Identifies this browser session to the job queue for fair scheduling
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = uuid.uuid4().hex
+
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+
 
 # ============ Helper Functions ============
 
-def create_generating_animation(week_number: int, total_weeks: int):
-    """Creates an animated loading display for week generation"""
+def create_generating_animation(week_number: int, total_weeks: int, finished: bool = False):
+    """
+    Creates an animated loading display for week generation. With
+    finished=True, week_number counts the weeks already done instead of
+    naming the week being generated.
+    """
     progress = week_number / total_weeks
+    if finished:
+        heading = f"Regenerated {week_number} of {total_weeks} Weeks"
+    else:
+        heading = f"Generating Week {week_number} of {total_weeks}"
     
     col1, col2, col3 = st.columns([1, 3, 1])
     
     with col2:
         st.markdown(f"""
         <div class="generating-animation">
-            <h2>🔮 Generating Week {week_number} of {total_weeks}</h2>
+            <h2>🔮 {heading}</h2>
             <p style="font-size: 1.2rem; margin-top: 20px;">
                 Creating your personalized study schedule...
             </p>
@@ -161,57 +208,66 @@ def create_generating_animation(week_number: int, total_weeks: int):
                    unsafe_allow_html=True)
 
 
-def generate_calendar_stream(syllabus: str, progress_placeholder):
+def generate_calendar_job(syllabus: str, progress_placeholder):
     """
-    Generates calendar with streaming progress updates
+    Submits the syllabus to the shared job queue and polls it.
+    
+    Renders the job's progress and the weeks generated so far, then reruns
+    the script until the job finishes. Returns the calendar once it is done.
     """
-    debug_log(f"Starting calendar generation, syllabus length: {len(syllabus)}")
+    jobs = get_job_queue()
     
     try:
-        # Extract semester info first
-        with progress_placeholder.container():
-            st.info("📊 Analyzing syllabus and extracting semester information...")
-            time.sleep(0.5)
-        
-        debug_log("Calling extract_semester_info...")
-        semester_info = extract_semester_info(syllabus)
-        debug_log(f"Semester info extracted: {semester_info.total_weeks} weeks")
-        
-        # Store semester info in session state
-        st.session_state.semester_info = semester_info
+        snapshot = None
+        if st.session_state.job_id is not None:
+            snapshot = jobs.status(st.session_state.job_id)
+        if snapshot is None:
+            st.session_state.job_id = jobs.submit(st.session_state.user_id, syllabus)
+            debug_log(f"Submitted {st.session_state.job_id}, syllabus length: {len(syllabus)}")
+            snapshot = jobs.status(st.session_state.job_id)
+        
+        if snapshot.status == "failed":
+            st.session_state.job_id = None
+            raise RuntimeError(snapshot.error)
+        
+        if snapshot.status == "cancelled":
+            st.session_state.job_id = None
+            raise RuntimeError("Generation was cancelled")
+        
+        if snapshot.status == "done":
+            debug_log(f"{snapshot.job_id} finished with {len(snapshot.calendar.weeks)} weeks")
+            st.session_state.job_id = None
+            st.session_state.semester_info = snapshot.semester_info
+            st.session_state.missing_weeks = snapshot.missing_weeks
+            st.session_state.quiz = snapshot.quiz
+            # The text the job was built from, which may differ from the
+            # text area if the user kept editing while it ran
+            st.session_state.calendar_syllabus = snapshot.syllabus
+            return snapshot.calendar
         
         with progress_placeholder.container():
-            st.success(f"✓ Found {semester_info.total_weeks} weeks, {len(semester_info.key_deadlines)} deadlines")
-            time.sleep(1)
-        
-        # Generate calendar with progress callback
-        total_weeks = semester_info.total_weeks
-        weeks_completed = [0]  # Use list to allow modification in nested function
-        
-        def progress_callback(wave_num, total_waves, completed, total):
-            """Callback for progress updates"""
-            debug_log(f"Progress callback - Wave {wave_num}/{total_waves}, Completed: {completed}/{total}")
+            if snapshot.status == "queued":
+                st.info(f"⏳ Waiting for a free worker ({snapshot.queue_position} job(s) ahead)...")
+            elif snapshot.semester_info is None:
+                st.info("📊 Analyzing syllabus and extracting semester information...")
+            else:
+                info = snapshot.semester_info
+                st.success(f"✓ Found {info.total_weeks} weeks, {len(info.key_deadlines)} deadlines")
+                unparseable = info.unparseable_dates()
+                if unparseable:
+                    st.warning(f"⚠️ Could not read these dates: {', '.join(unparseable)}")
+                current_week = min(snapshot.weeks_completed + 1, snapshot.total_weeks)
+                create_generating_animation(current_week, snapshot.total_weeks)
             
-            with progress_placeholder.container():
-                # Show wave progress
-                st.info(f"🌊 Wave {wave_num}/{total_waves}")
-                
-                # Calculate which week we're on
-                current_week = completed + 1
-                if current_week <= total:
-                    create_generating_animation(current_week, total)
-                
-                weeks_completed[0] = completed
-        
-        # Generate full calendar
-        debug_log("Calling generate_full_calendar...")
-        calendar = generate_full_calendar(syllabus, callback=progress_callback)
-        debug_log(f"Calendar generated successfully with {len(calendar.weeks)} weeks")
+            # Weeks are shown as soon as their batch finishes
+            for i, ready_week in enumerate(snapshot.weeks):
+                display_week_calendar(ready_week, i)
         
-        return calendar
+        time.sleep(POLL_INTERVAL_S)
+        st.rerun()
         
     except Exception as e:
-        error_msg = f"Error in generate_calendar_stream: {str(e)}\n{traceback.format_exc()}"
+        error_msg = f"Error in generate_calendar_job: {str(e)}\n{traceback.format_exc()}"
         debug_log(error_msg)
         st.session_state.error_log.append(error_msg)
         raise
@@ -289,11 +345,11 @@ def regenerate_selected_weeks_ui(syllabus: str, selected_weeks: List[int],
             """Callback for regeneration progress"""
             debug_log(f"Regen callback - {current}/{total}, week {week_num}")
             with progress_placeholder.container():
-                st.info(f"Regenerating week {week_num}... ({current}/{total})")
-                create_generating_animation(current, total)
+                st.info(f"Regenerated week {week_num} ({current}/{total})")
+                create_generating_animation(current, total, finished=True)
         
         # Use the public API function
-        updated_calendar = regenerate_weeks(
+        updated_calendar = get_agent().regenerate_weeks(
             syllabus,
             semester_info,
             selected_weeks,
@@ -302,6 +358,9 @@ def regenerate_selected_weeks_ui(syllabus: str, selected_weeks: List[int],
         )
         
         debug_log("Regeneration completed successfully")
+        st.session_state.missing_weeks = [
+            w for w in st.session_state.missing_weeks if w not in selected_weeks
+        ]
         
         with progress_placeholder.container():
             st.success(f"✅ Successfully regenerated {len(selected_weeks)} week(s)!")
@@ -310,6 +369,14 @@ def regenerate_selected_weeks_ui(syllabus: str, selected_weeks: List[int],
         progress_placeholder.empty()
         
         return updated_calendar
+    
+    except get_agent().WeekGenerationError as e:
+        # e.weeks holds the calendar with the other selected weeks updated
+        debug_log(f"Regeneration left weeks missing: {e.missing_weeks}")
+        progress_placeholder.empty()
+        still_missing = set(st.session_state.missing_weeks) - set(selected_weeks)
+        st.session_state.missing_weeks = sorted(still_missing | set(e.missing_weeks))
+        return current_calendar.model_copy(update={"weeks": e.weeks})
         
     except Exception as e:
         error_msg = f"Error in regeneration: {str(e)}\n{traceback.format_exc()}"
@@ -318,6 +385,53 @@ def regenerate_selected_weeks_ui(syllabus: str, selected_weeks: List[int],
         raise
 
 
+def update_calendar_ui(old_syllabus: str, new_syllabus: str,
+                       semester_info: SemesterInfo, current_calendar: SemesterCalendar):
+    """Regenerates only the weeks affected by syllabus edits, with UI updates"""
+    
+    debug_log("Updating calendar for edited syllabus")
+    progress_placeholder = st.empty()
+    
+    try:
+        with progress_placeholder.container():
+            st.info("✏️ Checking which weeks your edits affect...")
+        
+        def update_callback(current, total, week_num):
+            """Callback for update progress"""
+            debug_log(f"Update callback - {current}/{total}, week {week_num}")
+            with progress_placeholder.container():
+                st.info(f"Regenerated week {week_num} ({current}/{total})")
+                create_generating_animation(current, total, finished=True)
+        
+        update = get_agent().update_calendar(
+            old_syllabus,
+            new_syllabus,
+            semester_info,
+            current_calendar,
+            callback=update_callback
+        )
+        
+        debug_log(f"Update regenerated weeks: {update.affected_weeks}")
+        
+        with progress_placeholder.container():
+            if update.affected_weeks:
+                weeks = ", ".join(str(w) for w in update.affected_weeks)
+                st.success(f"✅ Updated week(s) {weeks}")
+            else:
+                st.success("✅ No weeks needed regenerating")
+            time.sleep(1)
+        
+        progress_placeholder.empty()
+        
+        return update
+        
+    except Exception as e:
+        error_msg = f"Error updating calendar: {str(e)}\n{traceback.format_exc()}"
+        debug_log(error_msg)
+        st.error(error_msg)
+        raise
+
+
 # ============ Main App ============
 
 def main():
@@ -335,6 +449,59 @@ def main():
             st.write(f"syllabus_length: {len(st.session_state.syllabus_text)}")
             st.write(f"has_calendar: {st.session_state.semester_calendar is not None}")
             
+            # Only report agent stats once something has loaded the agent
+            agent = sys.modules.get("optimized_agent")
+            st.write(f"agent_loaded: {agent is not None}")
+            
+            if "job_queue" in sys.modules:
+                st.write(f"jobs: {get_job_queue().stats()}")
+                st.write(f"job_id: {st.session_state.job_id}")
+            
+            if agent is not None and agent.response_cache is not None:
+                stats = agent.response_cache.stats
+                st.write(f"llm_cache: {stats.hits} hits / {stats.misses} misses "
+                         f"({stats.hit_rate:.0%}), saved {stats.saved_seconds:.1f}s")
+            
+            if agent is not None:
+                for call, report in agent.compaction_reports.items():
+                    st.write(f"prompt {call}: {report.tokens_before} → {report.tokens_after} tokens")
+            
+            if agent is not None and agent.tracer.spans():
+                with st.expander("Trace", expanded=False):
+                    st.dataframe(
+                        [
+                            {**row, "total_s": round(row["total_s"], 3),
+                             "mean_s": round(row["mean_s"], 3), "max_s": round(row["max_s"], 3)}
+                            for row in agent.tracer.summary()
+                        ],
+                        hide_index=True
+                    )
+                    llm_spans = agent.tracer.spans(kind="llm")[-20:]
+                    if llm_spans:
+                        st.caption("Recent LLM calls")
+                        st.dataframe(
+                            [
+                                {"call": span.name, "duration_s": round(span.duration_s, 3),
+                                 **{key: span.attributes.get(key) for key in (
+                                     "cache", "prompt_tokens", "output_tokens",
+                                     "prefill_s", "decode_s", "overhead_s", "queued_s")}}
+                                for span in reversed(llm_spans)
+                            ],
+                            hide_index=True
+                        )
+                    st.download_button(
+                        "Download trace (JSON lines)",
+                        data=agent.tracer.to_jsonl(),
+                        file_name="study_planner_trace.jsonl",
+                        mime="application/x-ndjson"
+                    )
+                    st.download_button(
+                        "Download Chrome trace",
+                        data=agent.tracer.to_chrome_trace(),
+                        file_name="study_planner_trace.json",
+                        mime="application/json"
+                    )
+            
             if st.session_state.error_log:
                 with st.expander("Error Log", expanded=True):
                     for error in st.session_state.error_log:
@@ -384,8 +551,8 @@ def main():
         
         try:
             debug_log("Starting generation process...")
-            # Generate calendar with streaming
-            calendar = generate_calendar_stream(
+            # Generate calendar through the shared job queue
+            calendar = generate_calendar_job(
                 st.session_state.syllabus_text,
                 progress_placeholder
             )
@@ -415,6 +582,11 @@ def main():
                 st.rerun()
             st.stop()
     
+    elif not st.session_state.calendar_generated and not st.session_state.syllabus_text.strip():
+        # Nothing to generate yet, so the agent isn't loaded and no job is submitted
+        debug_log("Waiting for syllabus input")
+        st.info("📝 Paste or upload a syllabus in the sidebar to generate your study plan.")
+    
     elif not st.session_state.calendar_generated:
         debug_log("In generating mode")
         # Show generation progress
@@ -422,8 +594,8 @@ def main():
         
         try:
             debug_log("Starting generation process...")
-            # Generate calendar with streaming
-            calendar = generate_calendar_stream(
+            # Generate calendar through the shared job queue
+            calendar = generate_calendar_job(
                 st.session_state.syllabus_text,
                 progress_placeholder
             )
@@ -524,6 +696,14 @@ def main():
                         file_name="study_calendar.json",
                         mime="application/json"
                     )
+
+                    import calendar_codec
+                    st.download_button(
+                        label="Download Compact Archive",
+                        data=calendar_codec.encode_calendar(calendar),
+                        file_name="study_calendar.spcal",
+                        mime="application/octet-stream"
+                    )
                 except Exception as e:
                     st.error(f"Export error: {str(e)}")
         
@@ -531,15 +711,10 @@ def main():
             if st.button("🎯 Generate Quiz", use_container_width=True):
                 try:
                     with st.spinner("Generating quiz..."):
-                        quiz = generate_quiz(st.session_state.syllabus_text, semester_info)
-                    
-                    st.markdown("### 📝 Practice Quiz")
-                    st.markdown(f"**Topic:** {quiz.topic}")
-                    st.markdown("---")
-                    
-                    for i, question in enumerate(quiz.questions, 1):
-                        st.markdown(f"**{i}.** {question}")
-                    
+                        # A fresh set on every click rather than the cached one
+                        st.session_state.quiz = get_agent().generate_quiz(
+                            st.session_state.syllabus_text, semester_info, use_cache=False
+                        )
                 except Exception as e:
                     st.error(f"Error generating quiz: {str(e)}")
                     st.session_state.error_log.append(traceback.format_exc())
@@ -550,17 +725,55 @@ def main():
                 st.session_state.calendar_generated = False
                 st.session_state.semester_calendar = None
                 st.session_state.semester_info = None
+                st.session_state.calendar_syllabus = ""
+                st.session_state.missing_weeks = []
+                st.session_state.quiz = None
                 st.session_state.selected_weeks = []
                 st.session_state.error_log = []
                 st.rerun()
         
+        quiz = st.session_state.quiz
+        if quiz is not None:
+            with st.expander("📝 Practice Quiz", expanded=True):
+                st.markdown(f"**Topic:** {quiz.topic}")
+                st.markdown("---")
+                
+                for i, question in enumerate(quiz.questions, 1):
+                    st.markdown(f"**{i}.** {question}")
+        
+        if st.session_state.missing_weeks:
+            weeks = ", ".join(str(w) for w in st.session_state.missing_weeks)
+            st.warning(f"⚠️ Week(s) {weeks} could not be generated. Select them below and regenerate.")
+        
+        # Offer an incremental update when the syllabus was edited after generating
+        edited_syllabus = st.session_state.syllabus_text
+        if edited_syllabus.strip() and edited_syllabus != st.session_state.calendar_syllabus:
+            st.info("✏️ The syllabus has changed since this calendar was generated.")
+            if st.button("♻️ Update Calendar for Edits"):
+                try:
+                    update = update_calendar_ui(
+                        st.session_state.calendar_syllabus,
+                        edited_syllabus,
+                        semester_info,
+                        calendar
+                    )
+                    st.session_state.semester_calendar = update.calendar
+                    st.session_state.semester_info = update.semester_info
+                    st.session_state.calendar_syllabus = edited_syllabus
+                    st.rerun()
+                except Exception as e:
+                    st.session_state.error_log.append(traceback.format_exc())
+        
         st.markdown("---")
         
         # Week selection for regeneration
         if calendar and hasattr(calendar, 'weeks'):
             st.markdown("### 🎯 Select Weeks to Regenerate")
             
-            week_numbers = [w.week_number for w in calendar.weeks]
+            # Include weeks that failed to generate so they can be retried
+            week_numbers = sorted(
+                {w.week_number for w in calendar.weeks} | set(st.session_state.missing_weeks)
+            )
             selected = st.multiselect(
                 "Choose weeks:",
                 week_numbers,
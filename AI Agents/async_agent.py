@@ -0,0 +1,434 @@
+"""
+Asyncio version of the study planner API.
+
+Mirrors the public functions in optimized_agent but awaits the chat model's
+async interface instead of blocking a thread per request. All LLM calls made
+from one event loop share a bounded semaphore, so a single process can serve
+many syllabi without overloading the local Ollama server.
+"""
+
+import asyncio
+import time
+import weakref
+from typing import AsyncIterator, List, Optional
+
+from langgraph.types import StateUpdate
+
+import optimized_agent as agent
+from optimized_agent import (
+    BatchTiming,
+    CalendarUpdate,
+    PlannerMode,
+    QuizData,
+    SemesterCalendar,
+    SemesterInfo,
+    WeeklyCalendar,
+    MAX_IN_FLIGHT,
+    WEEKS_PER_BATCH,
+    _Regeneration,
+    _WeekRun,
+    _plan_steps,
+    _quiz_steps,
+    _semester_info_steps,
+    _update_calendar_steps,
+    _week_batch_steps,
+    compile_semester_calendar,
+)
+
+
+# Maximum concurrent LLM requests per event loop
+MAX_CONCURRENT_REQUESTS = 4
+
+_request_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def set_max_concurrency(limit: int) -> None:
+    """Changes the per-loop request limit for calls made after this point."""
+    global MAX_CONCURRENT_REQUESTS
+    MAX_CONCURRENT_REQUESTS = limit
+    _request_slots.clear()
+
+
+def _slots() -> asyncio.Semaphore:
+    """Returns the request semaphore for the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _request_slots.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+        _request_slots[loop] = semaphore
+    return semaphore
+
+
+# ============ Engine =============
+# The shared steps in optimized_agent (see "Engine Steps" there) are driven
+# here with async I/O: every effect is awaited on the event loop.
+
+async def _arun(steps):
+    """Runs engine steps to completion on the event loop and returns their result."""
+    value, error = None, None
+    while True:
+        try:
+            effect = steps.send(value) if error is None else steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        value, error = None, None
+        operation, *args = effect
+        try:
+            value = await _EFFECTS[operation](*args)
+        except BaseException as e:
+            error = e
+
+
+async def _call_llm(structured_llm, messages, timeout: Optional[float], span):
+    """
+    The "llm" effect. Time spent waiting for a request slot is recorded on
+    the span as queued_s; the timeout only starts once the call has a slot.
+    """
+    queued_at = time.perf_counter()
+    async with _slots():
+        started_at = time.perf_counter()
+        span.attributes["queued_s"] = started_at - queued_at
+        output = await asyncio.wait_for(structured_llm.ainvoke(messages), timeout)
+        return output, time.perf_counter() - started_at
+
+
+# ResponseCache is SQLite-backed, so lookups and stores run on a worker
+# thread instead of blocking the event loop
+
+async def _cache_get(cache, key: str, schema):
+    return await asyncio.to_thread(cache.get, key, schema)
+
+
+async def _cache_put(cache, key: str, result, latency: float) -> None:
+    await asyncio.to_thread(cache.put, key, result, latency)
+
+
+async def _collect_weeks(syllabus: str, semester_info: SemesterInfo, callback, weeks_per_batch: int, max_in_flight: int):
+    """The "stream_weeks" effect, see optimized_agent._collect_weeks."""
+    weeks = []
+    async for week in astream_weeks_hybrid(
+        syllabus,
+        semester_info,
+        weeks_per_batch=weeks_per_batch,
+        max_in_flight=max_in_flight
+    ):
+        weeks.append(week)
+        if callback:
+            callback(len(weeks), semester_info.total_weeks, week.week_number)
+    return weeks
+
+
+# ============ Core Agent Functions =============
+
+async def aextract_semester_info(syllabus: str) -> SemesterInfo:
+    """Async version of extract_semester_info."""
+    return await _arun(_semester_info_steps(syllabus))
+
+
+async def agenerate_multiple_weeks_batch(
+    syllabus: str,
+    semester_info: SemesterInfo,
+    start_week: int,
+    num_weeks: int,
+    previous_weeks: List[WeeklyCalendar],
+    use_cache: bool = True
+) -> List[WeeklyCalendar]:
+    """Async version of generate_multiple_weeks_batch."""
+    return await _arun(_week_batch_steps(
+        syllabus, semester_info, start_week, num_weeks, previous_weeks, use_cache
+    ))
+
+
+async def astream_weeks_hybrid(
+    syllabus: str,
+    semester_info: SemesterInfo,
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    context_lag: Optional[int] = None,
+    timings: Optional[List[BatchTiming]] = None,
+    adaptive: bool = False
+) -> AsyncIterator[WeeklyCalendar]:
+    """
+    Async version of stream_weeks_hybrid.
+
+    Uses the same dependency-aware schedule; max_in_flight bounds this run
+    while the shared semaphore bounds all runs on the event loop.
+    """
+    run = _WeekRun(
+        syllabus, semester_info, callback, weeks_per_batch, max_in_flight, context_lag, timings, adaptive
+    )
+    running = {}
+
+    try:
+        while run.has_pending() or running:
+            for batch, steps in run.take_ready(len(running)):
+                running[asyncio.ensure_future(_arun(steps))] = batch
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                for week in run.finish(running.pop(task), task.result()):
+                    yield week
+    finally:
+        for task in running:
+            task.cancel()
+
+    run.close()
+
+
+async def agenerate_weeks_hybrid(
+    syllabus: str,
+    semester_info: SemesterInfo,
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    context_lag: Optional[int] = None,
+    timings: Optional[List[BatchTiming]] = None,
+    adaptive: bool = False
+) -> List[WeeklyCalendar]:
+    """Async version of generate_weeks_hybrid."""
+    weeks = [
+        week async for week in astream_weeks_hybrid(
+            syllabus,
+            semester_info,
+            callback=callback,
+            weeks_per_batch=weeks_per_batch,
+            max_in_flight=max_in_flight,
+            context_lag=context_lag,
+            timings=timings,
+            adaptive=adaptive
+        )
+    ]
+    weeks.sort(key=lambda w: w.week_number)
+    return weeks
+
+
+async def agenerate_quiz(
+    syllabus: str, semester_info: Optional[SemesterInfo], use_cache: bool = True
+) -> QuizData:
+    """Async version of generate_quiz."""
+    return await _arun(_quiz_steps(syllabus, semester_info, use_cache))
+
+
+# ============ High-Level API Functions =============
+
+# Order of the workflow's steps; calendar and quiz run side by side
+_STEP_STAGES = {
+    "planner": 0,
+    "extract_semester_info": 1,
+    "generate_calendar": 2,
+    "generate_quiz": 2,
+}
+
+
+class _Checkpoints:
+    """
+    Saves agenerate_full_calendar's progress to the same LangGraph thread
+    generate_full_calendar uses, so an interrupted run resumes with either
+    engine. Each finished step is written as an update from its workflow
+    node; without a checkpointer nothing is saved. on_state receives a copy
+    of the state after loading and after each save.
+    """
+
+    def __init__(
+        self, syllabus: str, planner_mode: PlannerMode, checkpointer, thread_id: Optional[str], on_state=None
+    ):
+        self.checkpointer = checkpointer
+        self.on_state = on_state
+        self.state = agent._initial_state(syllabus)
+        self.pending = None
+        if checkpointer is not None:
+            self.thread_id = thread_id or agent._workflow_thread_id(syllabus, planner_mode)
+            self.workflow = agent.get_workflow(planner_mode, checkpointer)
+            self.config = {"configurable": {"thread_id": self.thread_id}}
+
+    async def load(self) -> None:
+        """Picks up an unfinished run; a finished thread is cleared."""
+        if self.checkpointer is not None:
+            snapshot = await self.workflow.aget_state(self.config)
+            if snapshot.next:
+                done = snapshot.values.get("completed_steps") or ["planner"]
+                print(f"↩️  Resuming after: {', '.join(done)}")
+                self.state.update(snapshot.values)
+                self.pending = set(snapshot.next)
+            elif snapshot.values:
+                await self.checkpointer.adelete_thread(self.thread_id)
+        self._report()
+
+    def _report(self) -> None:
+        if self.on_state:
+            self.on_state(dict(self.state))
+
+    def done(self, step: str) -> bool:
+        """Whether the resumed run already finished this step."""
+        if self.pending is None or step in self.pending:
+            return False
+        return _STEP_STAGES[step] <= min(_STEP_STAGES[s] for s in self.pending)
+
+    async def save(self, *updates: tuple) -> None:
+        """Records (step, values) updates as one workflow step."""
+        for _, values in updates:
+            self.state.update({k: v for k, v in values.items() if k != "completed_steps"})
+        if updates:
+            self._report()
+        if self.checkpointer is None or not updates:
+            return
+        await self.workflow.abulk_update_state(
+            self.config, [[StateUpdate(values, step) for step, values in updates]]
+        )
+
+    async def save_pending(self, *updates: tuple) -> None:
+        """
+        Records (step, values) updates from a fan-out in which another step
+        failed. As LangGraph does for a failed superstep, they are saved as
+        the pending writes of their tasks, so a resume only reruns the step
+        that failed.
+        """
+        if self.checkpointer is None or not updates:
+            return
+        snapshot = await self.workflow.aget_state(self.config)
+        task_ids = {task.name: task.id for task in snapshot.tasks}
+        for step, values in updates:
+            await self.checkpointer.aput_writes(snapshot.config, list(values.items()), task_ids[step])
+
+
+async def agenerate_full_calendar(
+    syllabus: str,
+    callback=None,
+    planner_mode: PlannerMode = "auto",
+    on_week=None,
+    checkpointer=None,
+    thread_id: Optional[str] = None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    adaptive: bool = False,
+    on_state=None
+) -> SemesterCalendar:
+    """
+    Async version of generate_full_calendar.
+
+    Follows the same steps as build_workflow: plan, extract semester info,
+    then generate the calendar and quiz concurrently. With a checkpointer,
+    progress is saved to the workflow's thread after each step (see
+    _Checkpoints); the calendar and quiz are saved together once both
+    have finished, and if one of them fails the other is still kept.
+    """
+    checkpoints = _Checkpoints(syllabus, planner_mode, checkpointer, thread_id, on_state)
+    await checkpoints.load()
+    state = checkpoints.state
+
+    with agent.tracer.span("agenerate_full_calendar", kind="run", planner_mode=planner_mode):
+        if not checkpoints.done("planner"):
+            plan = await _arun(_plan_steps(syllabus, planner_mode))
+            await checkpoints.save(
+                ("planner", {**state, "plan": plan, "current_week": 1, "weeks_generated": []})
+            )
+        plan = state["plan"]
+
+        if "extract_semester_info" in plan.steps and not checkpoints.done("extract_semester_info"):
+            semester_info = await aextract_semester_info(syllabus)
+            await checkpoints.save(("extract_semester_info", {
+                "semester_info": semester_info,
+                "completed_steps": ["extract_semester_info"]
+            }))
+        semester_info = state["semester_info"]
+
+        async def calendar_branch() -> tuple:
+            if not semester_info:
+                return "generate_calendar", {"completed_steps": ["generate_calendar"]}
+            weeks = []
+            async for week in astream_weeks_hybrid(
+                syllabus,
+                semester_info,
+                callback=callback,
+                weeks_per_batch=weeks_per_batch,
+                max_in_flight=max_in_flight,
+                adaptive=adaptive
+            ):
+                weeks.append(week)
+                if on_week:
+                    on_week(week)
+            weeks.sort(key=lambda w: w.week_number)
+            return "generate_calendar", {
+                "full_calendar": compile_semester_calendar(syllabus, weeks),
+                "weeks_generated": weeks,
+                "completed_steps": ["generate_calendar"]
+            }
+
+        async def quiz_branch() -> tuple:
+            quiz = await agenerate_quiz(syllabus, semester_info)
+            return "generate_quiz", {"quiz": quiz, "completed_steps": ["generate_quiz"]}
+
+        branches = {"generate_calendar": calendar_branch, "generate_quiz": quiz_branch}
+        results = await asyncio.gather(*(
+            branch() for step, branch in branches.items()
+            if step in plan.steps and not checkpoints.done(step)
+        ), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        updates = [result for result in results if not isinstance(result, BaseException)]
+        if failures:
+            # Keep the branch that finished, like the graph does
+            await checkpoints.save_pending(*updates)
+            raise failures[0]
+        await checkpoints.save(*updates)
+        return state["full_calendar"]
+
+
+async def aregenerate_weeks(
+    syllabus: str,
+    semester_info: SemesterInfo,
+    week_numbers: List[int],
+    existing_calendar: SemesterCalendar,
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT
+) -> SemesterCalendar:
+    """Async version of regenerate_weeks."""
+    regeneration = _Regeneration(
+        syllabus, semester_info, week_numbers, existing_calendar, callback, weeks_per_batch
+    )
+    limit = asyncio.Semaphore(max_in_flight)
+
+    async def regenerate_group(group: tuple):
+        async with limit:
+            return group, await _arun(regeneration.batch_steps(group))
+
+    for finished in asyncio.as_completed([regenerate_group(group) for group in regeneration.groups]):
+        regeneration.finish(*await finished)
+
+    return regeneration.result()
+
+
+async def aupdate_calendar(
+    old_syllabus: str,
+    new_syllabus: str,
+    semester_info: SemesterInfo,
+    existing_calendar: SemesterCalendar,
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT
+) -> CalendarUpdate:
+    """Async version of update_calendar."""
+    return await _arun(_update_calendar_steps(
+        old_syllabus,
+        new_syllabus,
+        semester_info,
+        existing_calendar,
+        callback,
+        weeks_per_batch,
+        max_in_flight
+    ))
+
+
+# How _arun performs each effect
+_EFFECTS = {
+    "llm": _call_llm,
+    "cache_get": _cache_get,
+    "cache_put": _cache_put,
+    "sleep": asyncio.sleep,
+    "stream_weeks": _collect_weeks,
+    "regenerate": aregenerate_weeks,
+}
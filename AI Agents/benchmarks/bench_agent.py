@@ -0,0 +1,221 @@
+"""
+Sweeps the agent's scheduling settings against a fake LLM.
+
+Runs generate_weeks_hybrid, regenerate_weeks and generate_full_calendar with
+FakeChatModel for every combination of batch size, batches in flight and
+semester length, and reports wall time, LLM calls per calendar and tail
+latency. No Ollama server is needed:
+
+    python benchmarks/bench_agent.py --latency 0.2 --jitter 0.05 \
+        --batch-sizes 1,2,4 --in-flight 1,2,4 --weeks 8,16 --repeats 3
+
+Add --failure-rate to see how often runs fail, and --output to save the
+rows as JSON lines for comparing two versions of optimized_agent.py.
+--adaptive starts each run at the given batch size and lets BatchSizer
+resize batches; combine it with --per-week-latency and --truncation-rate so
+larger batches cost more and fail more, as they do with a real model.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import optimized_agent
+from fake_llm import FakeChatModel
+from llm_client import LLMClientPool
+from optimized_agent import SemesterInfo, _validate_semester_info
+
+
+SCENARIOS = ("hybrid", "regenerate", "full")
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def make_syllabus(total_weeks: int) -> str:
+    """Syllabus with a start date and one deadline every four weeks."""
+    start = date(2025, 8, 25)
+    lines = ["CS 101 Intro to Computing", "Fall 2025", f"{start.isoformat()} first class"]
+    for week in range(4, total_weeks + 1, 4):
+        day = start + timedelta(weeks=week - 1, days=2)
+        lines.append(f"Exam {week // 4}: {day.isoformat()}")
+    return "\n".join(lines)
+
+
+def make_semester_info(syllabus: str, total_weeks: int) -> SemesterInfo:
+    """SemesterInfo for make_syllabus, built without an LLM call."""
+    return _validate_semester_info(FakeChatModel(total_weeks=total_weeks)._semester_info(syllabus))
+
+
+def regeneration_targets(total_weeks: int, count: int) -> List[int]:
+    """count weeks spread evenly over the semester."""
+    step = max(1, total_weeks // max(count, 1))
+    return list(range(1, total_weeks + 1, step))[:count]
+
+
+def scenario_runner(
+    scenario: str,
+    total_weeks: int,
+    weeks_per_batch: int,
+    max_in_flight: int,
+    regenerate: int,
+    adaptive: bool = False
+) -> Callable[[], None]:
+    """Returns a callable that runs one calendar's worth of work."""
+    syllabus = make_syllabus(total_weeks)
+    semester_info = make_semester_info(syllabus, total_weeks)
+
+    if scenario == "hybrid":
+        return lambda: optimized_agent.generate_weeks_hybrid(
+            syllabus,
+            semester_info,
+            weeks_per_batch=weeks_per_batch,
+            max_in_flight=max_in_flight,
+            adaptive=adaptive
+        )
+
+    if scenario == "regenerate":
+        # Build the calendar being edited up front, outside the timed run
+        optimized_agent.llm_pool = LLMClientPool.single(FakeChatModel(latency=0.0, total_weeks=total_weeks))
+        existing = optimized_agent.compile_semester_calendar(
+            syllabus, optimized_agent.generate_weeks_hybrid(syllabus, semester_info)
+        )
+        targets = regeneration_targets(total_weeks, regenerate)
+        return lambda: optimized_agent.regenerate_weeks(
+            syllabus,
+            semester_info,
+            targets,
+            existing,
+            weeks_per_batch=weeks_per_batch,
+            max_in_flight=max_in_flight
+        )
+
+    return lambda: optimized_agent.generate_full_calendar(
+        syllabus,
+        weeks_per_batch=weeks_per_batch,
+        max_in_flight=max_in_flight,
+        adaptive=adaptive
+    )
+
+
+def run_case(args, scenario: str, total_weeks: int, weeks_per_batch: int, max_in_flight: int) -> Dict:
+    """Runs one configuration args.repeats times and summarizes it."""
+    runner = scenario_runner(
+        scenario, total_weeks, weeks_per_batch, max_in_flight, args.regenerate, args.adaptive
+    )
+    fake = FakeChatModel(
+        latency=args.latency,
+        total_weeks=total_weeks,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        per_week_latency=args.per_week_latency,
+        truncation_rate=args.truncation_rate
+    )
+    optimized_agent.llm_pool = LLMClientPool.single(fake)
+
+    walls = []
+    failed = 0
+    for _ in range(args.repeats):
+        started_at = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) if args.quiet else contextlib.nullcontext():
+                runner()
+        except Exception:
+            failed += 1
+            continue
+        walls.append(time.perf_counter() - started_at)
+
+    return {
+        "scenario": scenario,
+        "weeks": total_weeks,
+        "weeks_per_batch": weeks_per_batch,
+        "max_in_flight": max_in_flight,
+        "adaptive": args.adaptive,
+        "runs": args.repeats,
+        "failed_runs": failed,
+        "wall_mean_s": sum(walls) / len(walls) if walls else None,
+        "wall_p95_s": percentile(walls, 95) if walls else None,
+        "calls_per_calendar": fake.calls / args.repeats,
+        "call_p50_s": percentile(fake.latencies, 50),
+        "call_p99_s": percentile(fake.latencies, 99),
+    }
+
+
+def _format_seconds(value) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 2, 4], help="Weeks per batch")
+    parser.add_argument("--in-flight", type=_int_list, default=[1, 2, 4], help="Batches in flight")
+    parser.add_argument("--weeks", type=_int_list, default=[16], help="Semester lengths")
+    parser.add_argument("--latency", type=float, default=0.1, help="Fake LLM base seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mean extra seconds per call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--per-week-latency", type=float, default=0.0,
+                        help="Extra fake LLM seconds per week in a batch")
+    parser.add_argument("--truncation-rate", type=float, default=0.0,
+                        help="Chance per extra week that a batch response is cut short")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Let the scheduler resize batches, starting from each batch size")
+    parser.add_argument("--regenerate", type=int, default=4, help="Weeks edited in the regenerate scenario")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per configuration")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", dest="quiet", action="store_false",
+                        help="Show the agent's progress output")
+    parser.add_argument("--output", help="Write one JSON row per configuration to this file")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # Every call must reach the fake model
+    optimized_agent.response_cache = None
+
+    print(f"{'scenario':<12}{'weeks':>6}{'batch':>6}{'flight':>7}{'wall (s)':>10}"
+          f"{'p95 (s)':>9}{'calls':>7}{'call p50':>10}{'call p99':>10}{'failed':>8}")
+    rows = []
+    for scenario, total_weeks, weeks_per_batch, max_in_flight in itertools.product(
+        scenarios, args.weeks, args.batch_sizes, args.in_flight
+    ):
+        row = run_case(args, scenario, total_weeks, weeks_per_batch, max_in_flight)
+        rows.append(row)
+        print(f"{scenario:<12}{total_weeks:>6}{weeks_per_batch:>6}{max_in_flight:>7}"
+              f"{_format_seconds(row['wall_mean_s']):>10}{_format_seconds(row['wall_p95_s']):>9}"
+              f"{row['calls_per_calendar']:>7.1f}{row['call_p50_s']:>10.3f}{row['call_p99_s']:>10.3f}"
+              f"{row['failed_runs']:>5}/{row['runs']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+
+if __name__ == "__main__":
+    main()
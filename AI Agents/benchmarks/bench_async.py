@@ -0,0 +1,93 @@
+"""
+Compares the threaded and asyncio engines on many concurrent syllabi.
+
+Uses FakeChatModel, so no Ollama server is needed:
+
+    python benchmarks/bench_async.py --users 16 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import async_agent
+import optimized_agent
+from fake_llm import FakeChatModel
+from llm_client import LLMClientPool
+
+
+SYLLABUS = "CS 101 Intro to Computing\nFall 2025\nMidterm exam"
+
+
+class ThreadSampler:
+    """Records the peak number of live threads while running."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_threaded(users: int) -> None:
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(optimized_agent.generate_full_calendar, [SYLLABUS] * users))
+
+
+async def run_async(users: int) -> None:
+    await asyncio.gather(*[
+        async_agent.agenerate_full_calendar(SYLLABUS) for _ in range(users)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="Concurrent syllabi")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds per call")
+    parser.add_argument("--weeks", type=int, default=16, help="Weeks per semester")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Async request limit (default: users * MAX_IN_FLIGHT)")
+    args = parser.parse_args()
+
+    optimized_agent.response_cache = None
+    async_agent.set_max_concurrency(
+        args.concurrency or args.users * optimized_agent.MAX_IN_FLIGHT
+    )
+
+    print(f"{'engine':<10}{'wall (s)':>10}{'llm calls':>12}{'peak threads':>15}")
+    for name, runner in [
+        ("threaded", lambda: run_threaded(args.users)),
+        ("asyncio", lambda: asyncio.run(run_async(args.users))),
+    ]:
+        fake = FakeChatModel(latency=args.latency, total_weeks=args.weeks)
+        optimized_agent.llm_pool = LLMClientPool.single(fake)
+
+        with ThreadSampler() as sampler:
+            started_at = time.perf_counter()
+            runner()
+            wall = time.perf_counter() - started_at
+
+        print(f"{name:<10}{wall:>10.2f}{fake.calls:>12}{sampler.peak:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Measures per-call overhead of the shared client pool against a fake Ollama.
+
+Starts FakeOllamaServer locally and compares building a new ChatOllama and
+structured wrapper for every call with reusing them through LLMClientPool:
+
+    python benchmarks/bench_client_pool.py --calls 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+from langchain_ollama import ChatOllama
+
+from fake_llm import FakeChatModel, FakeOllamaServer
+from llm_client import DEFAULT_MODEL, LLMClientPool
+from optimized_agent import QuizData
+
+
+MESSAGES = [HumanMessage(content="Quiz me on week 1")]
+
+
+def fresh_client_per_call(server: FakeOllamaServer, calls: int) -> None:
+    for _ in range(calls):
+        llm = ChatOllama(model=DEFAULT_MODEL, base_url=server.url)
+        llm.with_structured_output(QuizData).invoke(MESSAGES)
+
+
+def pooled(server: FakeOllamaServer, calls: int) -> None:
+    pool = LLMClientPool(base_url=server.url)
+    for _ in range(calls):
+        _, structured_llm = pool.structured("generate_quiz", QuizData)
+        structured_llm.invoke(MESSAGES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'client':<12}{'ms/call':>10}{'connections':>14}")
+    for name, runner in [("fresh", fresh_client_per_call), ("pooled", pooled)]:
+        with FakeOllamaServer(FakeChatModel(latency=0.0)) as server:
+            started_at = time.perf_counter()
+            runner(server, args.calls)
+            per_call = (time.perf_counter() - started_at) / args.calls
+            print(f"{name:<12}{per_call * 1000:>10.2f}{server.connections:>14}")
+
+
+if __name__ == "__main__":
+    main()
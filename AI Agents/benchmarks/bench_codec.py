@@ -0,0 +1,135 @@
+"""
+Size and speed of calendar_codec against model_dump_json.
+
+Builds an archive of synthetic semester calendars and times saving and
+loading it as JSON lines (one model_dump_json per calendar, the way the app
+exports them), as zlib-compressed JSON lines, and with
+calendar_codec.dump_calendars / load_calendars. With --check it fails
+unless the codec is smaller and faster to load than JSON lines, and faster
+to save than JSON lines compressed at the same level:
+
+    python benchmarks/bench_codec.py --calendars 1000 --weeks 16 --check
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import zlib
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calendar_codec
+from optimized_agent import DaySchedule, SemesterCalendar, StudyBlock, WeeklyCalendar
+
+
+_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+_SUBJECTS = ["Linear Algebra", "Data Structures", "Organic Chemistry", "World History", "Microeconomics"]
+_ACTIVITIES = ["Read", "Review", "Practice problems on", "Summarize notes on", "Prepare for quiz on"]
+
+
+def make_calendar(rng: random.Random, index: int, total_weeks: int) -> SemesterCalendar:
+    """A calendar shaped like the agent's output: 4-6 study days a week, 1-3 blocks a day."""
+    course = f"{rng.choice(_SUBJECTS)} {100 + index % 400}"
+    weeks = []
+    for week_number in range(1, total_weeks + 1):
+        schedule = []
+        for day in rng.sample(_DAYS, rng.randint(4, 6)):
+            blocks = []
+            for _ in range(rng.randint(1, 3)):
+                start = rng.randint(8, 20)
+                blocks.append(StudyBlock(
+                    course=course,
+                    topic=f"{rng.choice(_ACTIVITIES)} chapter {rng.randint(1, 20)}",
+                    time_range=f"{(start - 1) % 12 + 1}:00{'pm' if start >= 12 else 'am'} - "
+                               f"{start % 12 + 1}:{rng.choice(['00', '30'])}{'pm' if start + 1 >= 12 else 'am'}",
+                    notes=rng.choice([None, None, "Exam this week", "Bring questions to office hours"])
+                ))
+            schedule.append(DaySchedule(day=day, blocks=blocks))
+        weeks.append(WeeklyCalendar(
+            week_number=week_number,
+            week_dates=f"Week of day {7 * (week_number - 1) + 1}",
+            schedule=schedule,
+            weekly_goals=[f"Finish chapter {week_number}", f"Complete problem set {week_number}"]
+        ))
+    return SemesterCalendar(course_name=course, semester=rng.choice(["Fall 2025", "Spring 2026"]), weeks=weeks)
+
+
+def best_of(repeats: int, call: Callable[[], object]) -> float:
+    """Fastest of repeats runs, in seconds."""
+    times = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - started_at)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calendars", type=int, default=1000, help="Calendars in the archive")
+    parser.add_argument("--weeks", type=int, default=16, help="Weeks per calendar")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per format (best is reported)")
+    parser.add_argument("--level", type=int, default=calendar_codec.DEFAULT_COMPRESSION,
+                        help="zlib level for the compressed formats")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with an error unless calendar_codec wins on size, save and load")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    calendars = [make_calendar(rng, i, args.weeks) for i in range(args.calendars)]
+
+    def dump_json() -> bytes:
+        return "\n".join(c.model_dump_json() for c in calendars).encode("utf-8")
+
+    def load_json(data: bytes) -> List[SemesterCalendar]:
+        return [SemesterCalendar.model_validate_json(line) for line in data.splitlines()]
+
+    formats = {
+        "json lines": (dump_json, load_json),
+        "json lines + zlib": (
+            lambda: zlib.compress(dump_json(), args.level),
+            lambda data: load_json(zlib.decompress(data)),
+        ),
+        "calendar_codec": (
+            lambda: calendar_codec.dump_calendars(calendars, args.level),
+            calendar_codec.load_calendars,
+        ),
+    }
+
+    print(f"{args.calendars} calendars x {args.weeks} weeks")
+    print(f"{'format':<20}{'size (KB)':>12}{'ratio':>8}{'save (ms)':>12}{'load (ms)':>12}")
+    results = {}
+    for name, (dump, load) in formats.items():
+        data = dump()
+        if load(data) != calendars:
+            raise SystemExit(f"{name} did not round-trip")
+        results[name] = (len(data), best_of(args.repeats, dump), best_of(args.repeats, lambda: load(data)))
+        size, save_s, load_s = results[name]
+        print(f"{name:<20}{size / 1024:>12.1f}{size / results['json lines'][0]:>8.3f}"
+              f"{save_s * 1000:>12.1f}{load_s * 1000:>12.1f}")
+
+    # How many times smaller / faster the codec is. Saving is compared with
+    # JSON lines compressed at the same level; uncompressed JSON lines skip
+    # the zlib pass and come out about even with the codec
+    json_size, json_save, json_load = results["json lines"]
+    codec_size, codec_save, codec_load = results["calendar_codec"]
+    wins = {
+        "size": json_size / codec_size,
+        "save": results["json lines + zlib"][1] / codec_save,
+        "load": json_load / codec_load,
+    }
+    print(f"calendar_codec: {wins['size']:.1f}x smaller and {wins['load']:.2f}x faster to load than json lines, "
+          f"{wins['save']:.2f}x faster to save than json lines + zlib ({json_save / codec_save:.2f}x vs json lines)")
+    losses = [measure for measure, ratio in wins.items() if ratio <= 1]
+    if losses:
+        print(f"  ✗ not better on {', '.join(losses)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Import-time breakdown for the agent modules, via python -X importtime.
+
+Runs each import in a fresh interpreter, groups the cumulative time by
+top-level package and optionally fails when the total exceeds a limit:
+
+    python benchmarks/bench_import_time.py --top 10 --max-ms 3000
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times(module: str) -> list:
+    """Returns (self_us, cumulative_us, depth, name) for each imported module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=AGENT_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["optimized_agent"])
+    parser.add_argument("--top", type=int, default=10, help="Packages to list")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Exit with status 1 if any module takes longer")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        rows = import_times(module)
+        total_ms = next(c for _, c, _, name in reversed(rows) if name == module) / 1000
+
+        by_package = defaultdict(int)
+        for self_us, _, _, name in rows:
+            by_package[name.split(".")[0]] += self_us
+
+        print(f"import {module}: {total_ms:.0f} ms")
+        for package, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"  {package:<30}{self_us / 1000:>10.1f} ms")
+
+        if args.max_ms is not None and total_ms > args.max_ms:
+            print(f"  ✗ over the {args.max_ms:.0f} ms limit")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
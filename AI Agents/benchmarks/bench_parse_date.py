@@ -0,0 +1,113 @@
+"""
+Micro-benchmark for the date parser used by the agent.
+
+Compares the original try-every-format parser with optimized_agent._parse_date
+on a deadline list shaped like real LLM output. Both parse the same dates the
+same number of times; the cache is reported cold (cleared before the run) and
+warm (filled before the run) separately:
+
+    python benchmarks/bench_parse_date.py --deadlines 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import optimized_agent
+
+
+def legacy_parse_date(date_str: str) -> datetime:
+    """The parser as it was before format sniffing and caching."""
+    formats = [
+        "%Y-%m-%d",
+        "%a %b %d, %Y",
+        "%B %d, %Y",
+        "%b %d, %Y",
+        "%m/%d/%Y",
+        "%d/%m/%Y",
+    ]
+
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str.strip(), fmt)
+        except ValueError:
+            continue
+
+    return datetime(2025, 1, 1)
+
+
+def make_deadlines(count: int, seed: int = 0) -> list:
+    """Mostly ISO dates (as the prompt asks for) with some model drift."""
+    rng = random.Random(seed)
+    start = datetime(2025, 8, 25)
+    styles = [
+        ("%Y-%m-%d", 0.7),
+        ("%a %b %d, %Y", 0.1),
+        ("%B %d, %Y", 0.1),
+        ("%m/%d/%Y", 0.1),
+    ]
+    dates = []
+    for _ in range(count):
+        day = start + timedelta(days=rng.randint(0, 110))
+        fmt = rng.choices([s[0] for s in styles], weights=[s[1] for s in styles])[0]
+        dates.append(day.strftime(fmt))
+    return dates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deadlines", type=int, default=200, help="Dates in the list")
+    parser.add_argument("--weeks", type=int, default=16, help="Weeks that re-read the list")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    dates = make_deadlines(args.deadlines)
+
+    for d in dates:
+        assert optimized_agent._parse_date(d) == legacy_parse_date(d), d
+
+    # Every parser sees the same dates the same number of times: once (one
+    # pass over the list) or per week (the old prompt builder parsed every
+    # deadline once per week)
+    workloads = [("once", 1), ("per week", args.weeks)]
+
+    def run(parse, passes):
+        def fn():
+            for _ in range(passes):
+                for d in dates:
+                    parse(d)
+        return fn
+
+    def clear_cache():
+        optimized_agent._cached_date.cache_clear()
+
+    def fill_cache():
+        clear_cache()
+        for d in dates:
+            optimized_agent._parse_date(d)
+
+    parsers = [
+        ("legacy", legacy_parse_date, None),
+        ("sniffing, no cache", lambda d: optimized_agent._parse_date_text(d.strip()), None),
+        ("sniffing, cold cache", optimized_agent._parse_date, clear_cache),
+        ("sniffing, warm cache", optimized_agent._parse_date, fill_cache),
+    ]
+
+    print(f"{args.deadlines} dates, {args.weeks} weeks")
+    print(f"{'parser':<24}{'workload':<12}{'calls':>8}{'best (ms)':>12}")
+    for workload, passes in workloads:
+        for name, parse, setup in parsers:
+            times = []
+            for _ in range(args.repeat):
+                if setup is not None:
+                    setup()
+                times.append(timeit.timeit(run(parse, passes), number=1))
+            print(f"{name:<24}{workload:<12}{passes * len(dates):>8}{min(times) * 1000:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+Compact binary format for archiving generated calendars.
+
+model_dump_json repeats every field name and every course, topic and time
+range string once per study block. This format stores calendars column by
+column instead:
+
+- Strings (course names, topics, notes, goals, day names, week dates) are
+  interned into one table shared by every calendar in an archive, and
+  fields refer to them by index.
+- Time ranges in the agent's "6:00pm - 8:00pm" style are stored as a pair
+  of minute offsets packed into one integer. Anything else falls back to
+  the string table, so odd ranges still round-trip exactly.
+- Each column is a uint32 array, and the whole payload is zlib-compressed.
+
+Columns are gathered with map/attrgetter passes over flat lists rather
+than a Python loop per block, and loading builds the models directly
+instead of validating them again: every value comes out of the archive as
+the type its field declares.
+
+    data = dump_calendars(calendars)
+    assert load_calendars(data) == calendars
+"""
+
+import gc
+import re
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate, chain
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from optimized_agent import DaySchedule, SemesterCalendar, StudyBlock, WeeklyCalendar
+
+
+MAGIC = b"SPCAL"
+FORMAT_VERSION = 1
+
+# zlib level used by dump_calendars; 1 is fastest, 9 is smallest. The
+# columns are mostly small repeated indexes, so level 1 already gets most
+# of the size and is several times faster than the usual 6
+DEFAULT_COMPRESSION = 1
+
+_MINUTES_PER_DAY = 24 * 60
+
+# Largest value a uint32 column holds
+_UINT32_MAX = 2 ** 32 - 1
+
+# Time codes below this are packed ranges; at or above it, string indexes
+_TIME_STRING_BASE = _MINUTES_PER_DAY * _MINUTES_PER_DAY
+
+_TIME_RANGE = re.compile(r"(\d{1,2}):(\d{2})(am|pm) - (\d{1,2}):(\d{2})(am|pm)")
+
+# Column order in the payload
+_COLUMNS = (
+    "calendar_course", "calendar_semester", "calendar_weeks",
+    "week_number", "week_dates", "week_days", "week_goals",
+    "goal_text",
+    "day_name", "day_blocks",
+    "block_course", "block_topic", "block_time", "block_notes",
+)
+
+
+class CalendarCodecError(ValueError):
+    """Raised for data that is not a calendar archive or is corrupt."""
+
+
+def _minutes(hour: str, minute: str, meridiem: str) -> Optional[int]:
+    hour, minute = int(hour), int(minute)
+    if not 1 <= hour <= 12 or minute > 59:
+        return None
+    return (hour % 12 + (12 if meridiem == "pm" else 0)) * 60 + minute
+
+
+def _clock(minutes: int) -> str:
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02d}{'pm' if hour >= 12 else 'am'}"
+
+
+def encode_time_range(time_range: str) -> Optional[int]:
+    """
+    Packs a "6:00pm - 8:00pm" style range into one integer, or returns None
+    if the text would not be reproduced exactly by decode_time_range.
+    """
+    match = _TIME_RANGE.fullmatch(time_range)
+    if not match:
+        return None
+    start = _minutes(*match.group(1, 2, 3))
+    end = _minutes(*match.group(4, 5, 6))
+    if start is None or end is None:
+        return None
+    code = start * _MINUTES_PER_DAY + end
+    return code if decode_time_range(code) == time_range else None
+
+
+def decode_time_range(code: int) -> str:
+    start, end = divmod(code, _MINUTES_PER_DAY)
+    return f"{_clock(start)} - {_clock(end)}"
+
+
+def _flatten(lists: Iterable[list]) -> list:
+    return list(chain.from_iterable(lists))
+
+
+class _StringIndex(dict):
+    """
+    Interns strings in first-seen order: looking up a new string gives it
+    the next index. Only new strings reach Python code, so a column is
+    encoded with one C-level map.
+    """
+
+    def __missing__(self, text: str) -> int:
+        position = self[text] = len(self)
+        return position
+
+
+class _NoteCodes(dict):
+    """Block notes: 0 is None, otherwise the string index plus one."""
+
+    def __init__(self, strings: _StringIndex):
+        super().__init__({None: 0})
+        self.strings = strings
+
+    def __missing__(self, text: str) -> int:
+        code = self[text] = self.strings[text] + 1
+        return code
+
+
+class _TimeCodes(dict):
+    """Time codes by time range; odd ranges go into the string table."""
+
+    def __init__(self, strings: _StringIndex):
+        super().__init__()
+        self.strings = strings
+
+    def __missing__(self, text: str) -> int:
+        code = encode_time_range(text)
+        if code is None:
+            code = _TIME_STRING_BASE + self.strings[text]
+        self[text] = code
+        return code
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """
+    Pauses the cyclic garbage collector while loading. Decoding allocates
+    hundreds of thousands of models and lists, none of them in cycles, and
+    each collection they trigger walks every object in the process, which
+    with LangChain imported took most of the load time.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _constructor(cls):
+    """
+    Returns a function that makes a cls from a dict of its field values
+    without validating them: what model_construct does, minus the default
+    and alias handling it repeats on every call. fields_set defaults to the
+    dict's keys.
+    """
+    new = cls.__new__
+    set_attr = object.__setattr__
+
+    def construct(values: dict, fields_set: Optional[set] = None):
+        model = new(cls)
+        set_attr(model, "__dict__", values)
+        set_attr(model, "__pydantic_fields_set__", set(values) if fields_set is None else fields_set)
+        set_attr(model, "__pydantic_extra__", None)
+        set_attr(model, "__pydantic_private__", None)
+        return model
+
+    return construct
+
+
+_new_block = _constructor(StudyBlock)
+_new_day = _constructor(DaySchedule)
+_new_week = _constructor(WeeklyCalendar)
+_new_calendar = _constructor(SemesterCalendar)
+
+# A block validated without notes doesn't list them as set
+_BLOCK_FIELDS_WITHOUT_NOTES = frozenset({"course", "topic", "time_range"})
+
+
+def _to_bytes(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_bytes(data: bytes) -> array:
+    column = array("I")
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def dump_calendars(calendars: Iterable[SemesterCalendar], level: int = DEFAULT_COMPRESSION) -> bytes:
+    """
+    Encodes calendars into one compressed archive.
+
+    Args:
+        calendars: Calendars to store, in order
+        level: zlib compression level
+
+    Returns:
+        Archive bytes for load_calendars
+
+    Raises:
+        CalendarCodecError: if a week number doesn't fit in a uint32 column
+    """
+    calendars = list(calendars)
+    week_lists = list(map(attrgetter("weeks"), calendars))
+    weeks = _flatten(week_lists)
+    day_lists = list(map(attrgetter("schedule"), weeks))
+    goal_lists = list(map(attrgetter("weekly_goals"), weeks))
+    days = _flatten(day_lists)
+    block_lists = list(map(attrgetter("blocks"), days))
+    blocks = _flatten(block_lists)
+
+    strings = _StringIndex()
+    notes = _NoteCodes(strings)
+    time_codes = _TimeCodes(strings)
+
+    def codes(table: dict, items: list, field: str) -> array:
+        return array("I", map(table.__getitem__, map(attrgetter(field), items)))
+
+    columns = {
+        "calendar_course": codes(strings, calendars, "course_name"),
+        "calendar_semester": codes(strings, calendars, "semester"),
+        "calendar_weeks": array("I", map(len, week_lists)),
+        "week_dates": codes(strings, weeks, "week_dates"),
+        "week_days": array("I", map(len, day_lists)),
+        "week_goals": array("I", map(len, goal_lists)),
+        "goal_text": array("I", map(strings.__getitem__, chain.from_iterable(goal_lists))),
+        "day_name": codes(strings, days, "day"),
+        "day_blocks": array("I", map(len, block_lists)),
+        "block_course": codes(strings, blocks, "course"),
+        "block_topic": codes(strings, blocks, "topic"),
+        "block_time": codes(time_codes, blocks, "time_range"),
+        "block_notes": codes(notes, blocks, "notes"),
+    }
+
+    week_numbers = list(map(attrgetter("week_number"), weeks))
+    try:
+        columns["week_number"] = array("I", week_numbers)
+    except OverflowError:
+        bad = next(n for n in week_numbers if not 0 <= n <= _UINT32_MAX)
+        raise CalendarCodecError(f"Week number {bad} can't be stored in a calendar archive") from None
+
+    lengths = array("I", map(len, strings))
+    parts = [lengths, *(columns[name] for name in _COLUMNS)]
+    text = "".join(strings).encode("utf-8")
+
+    payload = bytearray(struct.pack("<I", len(text)))
+    payload += text
+    for column in parts:
+        encoded = _to_bytes(column)
+        payload += struct.pack("<I", len(encoded))
+        payload += encoded
+
+    return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(bytes(payload), level)
+
+
+def _read_payload(data: bytes) -> tuple:
+    """Splits an archive into (strings, columns)."""
+    header = len(MAGIC) + 1
+    if len(data) < header or data[:len(MAGIC)] != MAGIC:
+        raise CalendarCodecError("Not a calendar archive")
+    if data[len(MAGIC)] != FORMAT_VERSION:
+        raise CalendarCodecError(f"Unsupported calendar archive version {data[len(MAGIC)]}")
+    try:
+        payload = memoryview(zlib.decompress(data[header:]))
+    except zlib.error as e:
+        raise CalendarCodecError(f"Corrupt calendar archive: {e}") from e
+
+    offset = 0
+
+    def chunk() -> memoryview:
+        nonlocal offset
+        if offset + 4 > len(payload):
+            raise CalendarCodecError("Truncated calendar archive")
+        (size,) = struct.unpack_from("<I", payload, offset)
+        offset += 4 + size
+        if offset > len(payload):
+            raise CalendarCodecError("Truncated calendar archive")
+        return payload[offset - size:offset]
+
+    text = bytes(chunk()).decode("utf-8")
+    lengths = _from_bytes(chunk())
+    columns = {name: _from_bytes(chunk()) for name in _COLUMNS}
+
+    strings = []
+    position = 0
+    for length in lengths:
+        strings.append(text[position:position + length])
+        position += length
+    return strings, columns
+
+
+def _check_counts(columns: Dict[str, array]) -> None:
+    """Raises CalendarCodecError unless each level's counts cover the next level's columns."""
+    levels = (
+        (None, ("calendar_course", "calendar_semester", "calendar_weeks")),
+        ("calendar_weeks", ("week_number", "week_dates", "week_days", "week_goals")),
+        ("week_goals", ("goal_text",)),
+        ("week_days", ("day_name", "day_blocks")),
+        ("day_blocks", ("block_course", "block_topic", "block_time", "block_notes")),
+    )
+    for count_column, names in levels:
+        expected = len(columns[names[0]]) if count_column is None else sum(columns[count_column])
+        if any(len(columns[name]) != expected for name in names):
+            raise CalendarCodecError("Calendar archive columns are inconsistent")
+
+
+def _group(items: list, counts: array) -> List[list]:
+    """Splits items into consecutive lists of the given lengths."""
+    ends = list(accumulate(counts))
+    return [items[end - count:end] for count, end in zip(counts, ends)]
+
+
+def load_calendars(data: bytes) -> List[SemesterCalendar]:
+    """
+    Decodes an archive written by dump_calendars.
+
+    Raises:
+        CalendarCodecError: if data is not a valid archive
+    """
+    strings, columns = _read_payload(data)
+    _check_counts(columns)
+
+    try:
+        times = {
+            code: strings[code - _TIME_STRING_BASE] if code >= _TIME_STRING_BASE else decode_time_range(code)
+            for code in set(columns["block_time"])
+        }
+        text = strings.__getitem__
+        notes = [None, *strings]
+
+        with _gc_paused():
+            blocks = [
+                _new_block(
+                    {"course": text(course), "topic": text(topic), "time_range": times[time_code],
+                     "notes": notes[note]},
+                    None if note else set(_BLOCK_FIELDS_WITHOUT_NOTES)
+                )
+                for course, topic, time_code, note in zip(
+                    columns["block_course"], columns["block_topic"], columns["block_time"], columns["block_notes"]
+                )
+            ]
+            days = [
+                _new_day({"day": text(name), "blocks": day_blocks})
+                for name, day_blocks in zip(columns["day_name"], _group(blocks, columns["day_blocks"]))
+            ]
+            goals = _group(list(map(text, columns["goal_text"])), columns["week_goals"])
+            weeks = [
+                _new_week({
+                    "week_number": week_number,
+                    "week_dates": text(week_dates),
+                    "schedule": schedule,
+                    "weekly_goals": weekly_goals,
+                })
+                for week_number, week_dates, schedule, weekly_goals in zip(
+                    columns["week_number"], columns["week_dates"], _group(days, columns["week_days"]), goals
+                )
+            ]
+            return [
+                _new_calendar({"course_name": text(course), "semester": text(semester), "weeks": calendar_weeks})
+                for course, semester, calendar_weeks in zip(
+                    columns["calendar_course"],
+                    columns["calendar_semester"],
+                    _group(weeks, columns["calendar_weeks"])
+                )
+            ]
+    except IndexError as e:
+        raise CalendarCodecError("Calendar archive refers to a missing string") from e
+
+
+def encode_calendar(calendar: SemesterCalendar, level: int = DEFAULT_COMPRESSION) -> bytes:
+    """Encodes a single calendar (an archive of one)."""
+    return dump_calendars([calendar], level)
+
+
+def decode_calendar(data: bytes) -> SemesterCalendar:
+    """Decodes bytes written by encode_calendar."""
+    calendars = load_calendars(data)
+    if len(calendars) != 1:
+        raise CalendarCodecError(f"Expected one calendar, found {len(calendars)}")
+    return calendars[0]
+
+
+def save_calendars(path: str, calendars: Iterable[SemesterCalendar], level: int = DEFAULT_COMPRESSION) -> None:
+    """Writes calendars to an archive file."""
+    data = dump_calendars(calendars, level)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def load_calendars_file(path: str) -> List[SemesterCalendar]:
+    """Reads every calendar from an archive file."""
+    with open(path, "rb") as f:
+        return load_calendars(f.read())
@@ -0,0 +1,404 @@
+"""
+Stub chat model for running the study planner without Ollama.
+
+FakeChatModel implements the part of the ChatOllama interface the agent uses,
+with_structured_output(schema, include_raw).invoke / ainvoke, and returns schema-valid
+results after a configurable delay, optionally failing some calls. Swap it
+in with:
+
+    import optimized_agent
+    from llm_client import LLMClientPool
+    optimized_agent.llm_pool = LLMClientPool.single(FakeChatModel(latency=0.5))
+
+FakeOllamaServer serves the same responses over Ollama's HTTP API, so the
+real ChatOllama client and connection pooling can be exercised offline.
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple, Type
+
+from langchain_core.messages import AIMessage
+from ollama import ResponseError
+from pydantic import BaseModel
+
+from optimized_agent import (
+    DaySchedule,
+    MultiWeekCalendar,
+    Plan,
+    QuizData,
+    SemesterInfo,
+    StudyBlock,
+    WeeklyCalendar,
+)
+
+
+_ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_WEEK_RANGE = re.compile(r"weeks? (\d+)-(\d+)", re.IGNORECASE)
+_WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+# Share of a call's delay reported as prompt evaluation; the rest is decoding
+_PREFILL_SHARE = 0.2
+
+
+class FakeLLMError(ResponseError):
+    """
+    Injected failure, raised for a failure_rate fraction of calls. It looks
+    like the HTTP 500 the fake server sends for the same failure, so the
+    agent retries it as a transient error.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message, 500)
+
+
+class FakeChatModel:
+    """
+    Deterministic stand-in for ChatOllama.
+
+    Args:
+        latency: Seconds each call takes
+        total_weeks: Semester length reported by SemesterInfo responses
+        model: Model name used in cache keys
+        jitter: Mean extra delay in seconds, drawn from an exponential
+            distribution so a few calls are much slower than the rest
+        failure_rate: Fraction of calls that raise FakeLLMError
+        seed: Seed for the jitter, failure and truncation draws
+        per_week_latency: Extra seconds per week requested from a batch call,
+            so larger batches take longer like real decoding does
+        truncation_rate: Chance, per week after the first, that a batch
+            response stops early and leaves out its last weeks
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        total_weeks: int = 16,
+        model: str = "fake-llm",
+        temperature: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = 0,
+        per_week_latency: float = 0.0,
+        truncation_rate: float = 0.0
+    ):
+        self.latency = latency
+        self.total_weeks = total_weeks
+        self.model = model
+        self.temperature = temperature
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.per_week_latency = per_week_latency
+        self.truncation_rate = truncation_rate
+        self.calls = 0
+        self.failures = 0
+        self.truncations = 0
+        self.latencies: List[float] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def with_structured_output(self, schema: Type[BaseModel], include_raw: bool = False) -> "FakeStructuredModel":
+        return FakeStructuredModel(self, schema, include_raw)
+
+    def _record_call(self, weeks: int = 0) -> Tuple[float, bool]:
+        """Counts a call for the given number of weeks and draws its (delay, fails)."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self.per_week_latency * weeks
+            if self.jitter > 0:
+                delay += self._random.expovariate(1 / self.jitter)
+            fails = self._random.random() < self.failure_rate
+            if fails:
+                self.failures += 1
+            self.latencies.append(delay)
+            return delay, fails
+
+    def reset_stats(self) -> None:
+        """Clears call, failure and latency records."""
+        with self._lock:
+            self.calls = 0
+            self.failures = 0
+            self.truncations = 0
+            self.latencies = []
+
+    # ---------- Responses ----------
+
+    @staticmethod
+    def requested_weeks(schema: Type[BaseModel], messages) -> int:
+        """Weeks a batch prompt asks for, or 0 for other calls."""
+        if schema is not MultiWeekCalendar:
+            return 0
+        match = _WEEK_RANGE.search(str(messages[-1].content))
+        return int(match.group(2)) - int(match.group(1)) + 1 if match else 1
+
+    def _kept_weeks(self, requested: int) -> int:
+        """Draws how many of the requested weeks a response includes."""
+        with self._lock:
+            for kept in range(1, requested):
+                if self._random.random() < self.truncation_rate:
+                    self.truncations += 1
+                    return kept
+        return requested
+
+    @staticmethod
+    def timings(delay: float, prompt_chars: int, output_chars: int) -> dict:
+        """Ollama-style token counts and nanosecond durations for one call."""
+        return {
+            "prompt_eval_count": prompt_chars // 4,
+            "eval_count": output_chars // 4,
+            "load_duration": 0,
+            "prompt_eval_duration": int(delay * _PREFILL_SHARE * 1e9),
+            "eval_duration": int(delay * (1 - _PREFILL_SHARE) * 1e9),
+            "total_duration": int(delay * 1e9),
+        }
+
+    def respond(self, schema: Type[BaseModel], messages) -> BaseModel:
+        """Builds a schema-valid response for the given prompt."""
+        user_content = str(messages[-1].content)
+
+        if schema is Plan:
+            return Plan(steps=["extract_semester_info", "generate_calendar", "generate_quiz"])
+
+        if schema is SemesterInfo:
+            return self._semester_info(user_content)
+
+        if schema is MultiWeekCalendar:
+            match = _WEEK_RANGE.search(user_content)
+            start, end = (int(match.group(1)), int(match.group(2))) if match else (1, 1)
+            kept = self._kept_weeks(end - start + 1) if self.truncation_rate else end - start + 1
+            return MultiWeekCalendar(weeks=[self._week(n) for n in range(start, start + kept)])
+
+        if schema is QuizData:
+            return QuizData(
+                topic="Course review",
+                questions=[f"Practice question {i}" for i in range(1, 6)]
+            )
+
+        raise NotImplementedError(f"FakeChatModel has no response for {schema.__name__}")
+
+    def _semester_info(self, syllabus: str) -> SemesterInfo:
+        # The first ISO date is taken as the semester start, the rest as deadlines
+        deadlines = []
+        for line in syllabus.splitlines():
+            match = _ISO_DATE.search(line)
+            if match:
+                deadlines.append({"date": match.group(1), "description": line.strip()})
+
+        return SemesterInfo(
+            start_date=deadlines[0]["date"] if deadlines else "2025-08-25",
+            end_date="2025-12-12",
+            total_weeks=self.total_weeks,
+            key_deadlines=deadlines[1:],
+            major_topics=[f"Topic {i}" for i in range(1, 9)]
+        )
+
+    @staticmethod
+    def _week(week_number: int) -> WeeklyCalendar:
+        return WeeklyCalendar(
+            week_number=week_number,
+            week_dates="",
+            schedule=[
+                DaySchedule(day=day, blocks=[StudyBlock(
+                    course="Course",
+                    topic=f"Week {week_number} reading",
+                    time_range="6:00pm - 8:00pm"
+                )])
+                for day in _WEEKDAYS
+            ],
+            weekly_goals=[f"Finish week {week_number} reading"]
+        )
+
+
+class FakeStructuredModel:
+    """Result of FakeChatModel.with_structured_output."""
+
+    def __init__(self, parent: FakeChatModel, schema: Type[BaseModel], include_raw: bool = False):
+        self.parent = parent
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def _output(self, messages, delay: float):
+        """The parsed result, or ChatOllama's include_raw dict around it."""
+        parsed = self.parent.respond(self.schema, messages)
+        if not self.include_raw:
+            return parsed
+
+        content = parsed.model_dump_json()
+        timings = FakeChatModel.timings(delay, sum(len(str(m.content)) for m in messages), len(content))
+        raw = AIMessage(
+            content=content,
+            response_metadata={"model": self.parent.model, **timings},
+            usage_metadata={
+                "input_tokens": timings["prompt_eval_count"],
+                "output_tokens": timings["eval_count"],
+                "total_tokens": timings["prompt_eval_count"] + timings["eval_count"],
+            }
+        )
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    def invoke(self, messages):
+        delay, fails = self.parent._record_call(FakeChatModel.requested_weeks(self.schema, messages))
+        time.sleep(delay)
+        if fails:
+            raise FakeLLMError(f"Injected failure for {self.schema.__name__}")
+        return self._output(messages, delay)
+
+    async def ainvoke(self, messages):
+        delay, fails = self.parent._record_call(FakeChatModel.requested_weeks(self.schema, messages))
+        await asyncio.sleep(delay)
+        if fails:
+            raise FakeLLMError(f"Injected failure for {self.schema.__name__}")
+        return self._output(messages, delay)
+
+
+# ============ Fake Ollama HTTP Server =============
+
+_SCHEMAS = {schema.__name__: schema for schema in (Plan, SemesterInfo, MultiWeekCalendar, QuizData)}
+
+
+class FakeOllamaServer:
+    """
+    Minimal Ollama-compatible server for /api/chat, backed by FakeChatModel.
+
+    Counts TCP connections and requests per model, so tests can check that
+    clients reuse connections and that calls are routed to the right model.
+
+        with FakeOllamaServer(FakeChatModel(latency=0.1)) as server:
+            pool = LLMClientPool(base_url=server.url)
+    """
+
+    def __init__(self, model: Optional[FakeChatModel] = None, host: str = "127.0.0.1", port: int = 0):
+        self.model = model or FakeChatModel(latency=0.0)
+        self.connections = 0
+        self.requests_by_model: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return sum(self.requests_by_model.values())
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _chat(self, body: dict) -> Tuple[str, dict]:
+        """Returns the JSON content and timings for a structured /api/chat request."""
+        model_name = body.get("model", "")
+        with self._lock:
+            self.requests_by_model[model_name] = self.requests_by_model.get(model_name, 0) + 1
+
+        schema_json = body.get("format")
+        title = schema_json.get("title") if isinstance(schema_json, dict) else None
+        if title not in _SCHEMAS:
+            raise ValueError(f"Unsupported format: {title!r}")
+
+        messages = [SimpleNamespace(content=m.get("content", "")) for m in body.get("messages", [])]
+        delay, fails = self.model._record_call(FakeChatModel.requested_weeks(_SCHEMAS[title], messages))
+        time.sleep(delay)
+        if fails:
+            raise FakeLLMError(f"Injected failure for {title}")
+        content = self.model.respond(_SCHEMAS[title], messages).model_dump_json()
+        prompt_chars = sum(len(m.content) for m in messages)
+        return content, FakeChatModel.timings(delay, prompt_chars, len(content))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json_lines(self, lines: List[dict], stream: bool):
+                if stream:
+                    payload = "".join(json.dumps(line) + "\n" for line in lines)
+                    content_type = "application/x-ndjson"
+                else:
+                    payload = json.dumps(lines[-1])
+                    content_type = "application/json"
+                data = payload.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up, e.g. after a timeout
+                    pass
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json_lines([{"models": []}], stream=False)
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/api/chat":
+                    self.send_error(404)
+                    return
+
+                try:
+                    content, timings = server._chat(body)
+                except ValueError as e:
+                    self.send_error(400, str(e))
+                    return
+                except FakeLLMError as e:
+                    self.send_error(500, str(e))
+                    return
+
+                created_at = datetime.now(timezone.utc).isoformat()
+                base = {"model": body.get("model", ""), "created_at": created_at}
+                final = {
+                    **base,
+                    "message": {"role": "assistant", "content": ""},
+                    "done": True,
+                    "done_reason": "stop",
+                    **timings,
+                }
+                stream = body.get("stream", True)
+                if stream:
+                    lines = [
+                        {**base, "message": {"role": "assistant", "content": content}, "done": False},
+                        final,
+                    ]
+                else:
+                    lines = [{**final, "message": {"role": "assistant", "content": content}}]
+                self._send_json_lines(lines, stream)
+
+        return Handler
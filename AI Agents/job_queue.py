@@ -0,0 +1,321 @@
+"""
+In-process job queue for calendar generation.
+
+Streamlit runs every session's script in its own thread, so generating
+calendars inline lets each user start their own batch pool against the same
+Ollama server. JobQueue instead runs jobs on a fixed number of worker
+threads shared by the whole process, so at most workers * MAX_IN_FLIGHT
+week batches hit Ollama at once.
+
+- Fairness: each user has a FIFO of queued jobs, and workers take the next
+  job from users in round-robin order, so one user submitting many syllabi
+  can't starve the others.
+- Deduplication: submitting a syllabus that is already queued, running or
+  recently finished with every week returns the existing job instead of a
+  new one.
+- Polling: status() returns a snapshot with progress, the weeks
+  generated so far and the workflow's quiz, which the app renders on
+  each rerun. Snapshots hold
+  copies of the job's models, so sessions sharing a job can't change each
+  other's calendars.
+"""
+
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Deque, Dict, List, Literal, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+
+import optimized_agent as agent
+from optimized_agent import QuizData, SemesterCalendar, SemesterInfo, WeekGenerationError, WeeklyCalendar
+
+
+JobStatus = Literal["queued", "running", "done", "failed", "cancelled"]
+
+DEFAULT_WORKERS = 2
+
+# Finished jobs kept for polling and deduplication
+MAX_FINISHED_JOBS = 64
+
+# Workflow checkpoints shared by all jobs, keyed by job key. A run that
+# fails keeps its thread so resubmitting the syllabus resumes it
+_checkpointer = MemorySaver()
+
+
+@dataclass
+class Job:
+    """State of one calendar generation request"""
+    job_id: str
+    key: str
+    user_id: str
+    syllabus: str
+    status: JobStatus = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stage: str = "Waiting for a worker"
+    weeks_completed: int = 0
+    total_weeks: int = 0
+    semester_info: Optional[SemesterInfo] = None
+    weeks: List[WeeklyCalendar] = field(default_factory=list)
+    calendar: Optional[SemesterCalendar] = None
+    quiz: Optional[QuizData] = None
+    missing_weeks: List[int] = field(default_factory=list)
+    error: Optional[str] = None
+    queue_position: Optional[int] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+
+def job_key(syllabus: str) -> str:
+    """Deduplication key for a syllabus."""
+    return hashlib.sha256(syllabus.encode("utf-8")).hexdigest()
+
+
+def _reusable(job: Job) -> bool:
+    """Whether a new submission of the same syllabus can share this job."""
+    if job.status == "done":
+        # A calendar with failed weeks is worth generating again
+        return not job.missing_weeks
+    return job.active
+
+
+def run_calendar_job(job: Job, update: Callable[..., None]) -> None:
+    """
+    Default job runner: runs the agent workflow (see
+    optimized_agent.generate_full_calendar), reporting the semester info,
+    each finished week and the quiz through update(**fields).
+
+    Weeks that fail after retries are recorded in missing_weeks instead of
+    failing the job. The run's checkpoint is then kept, so resubmitting the
+    syllabus skips the steps that already finished.
+    """
+    update(stage="Analyzing syllabus")
+    weeks = []
+
+    def on_state(state):
+        fields = {}
+        semester_info = state.get("semester_info")
+        if semester_info is not None and job.semester_info is None:
+            fields.update(
+                stage="Generating weeks", semester_info=semester_info, total_weeks=semester_info.total_weeks
+            )
+        if state.get("quiz") is not None:
+            fields["quiz"] = state["quiz"]
+        if fields:
+            update(**fields)
+
+    def on_week(week):
+        weeks.append(week)
+        update(weeks=sorted(weeks, key=lambda w: w.week_number), weeks_completed=len(weeks))
+
+    missing_weeks = []
+    try:
+        calendar = agent.generate_full_calendar(
+            job.syllabus, on_week=on_week, on_state=on_state, checkpointer=_checkpointer, thread_id=job.key
+        )
+    except WeekGenerationError as e:
+        calendar = agent.compile_semester_calendar(job.syllabus, e.weeks)
+        missing_weeks = e.missing_weeks
+    else:
+        _checkpointer.delete_thread(job.key)
+        if calendar is None:
+            raise RuntimeError("The workflow finished without a calendar")
+
+    update(stage="Done", calendar=calendar, missing_weeks=missing_weeks)
+
+
+class JobQueue:
+    """
+    Bounded worker pool with per-user round-robin scheduling.
+
+    Args:
+        workers: Number of jobs that run at the same time
+        runner: Callable(job, update) that does the work (see run_calendar_job)
+        max_finished: Finished jobs kept for polling and deduplication
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        runner: Callable[[Job, Callable[..., None]], None] = run_calendar_job,
+        max_finished: int = MAX_FINISHED_JOBS
+    ):
+        self.workers = workers
+        self.runner = runner
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
+        self._by_key: Dict[str, str] = {}
+        self._queues: Dict[str, Deque[str]] = {}
+        self._turns: Deque[str] = deque()
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"calendar-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        """STUDY_PLANNER_WORKERS: number of worker threads."""
+        return cls(workers=int(os.environ.get("STUDY_PLANNER_WORKERS", DEFAULT_WORKERS)))
+
+    # ---------- Client API ----------
+
+    def submit(self, user_id: str, syllabus: str) -> str:
+        """
+        Queues a calendar for syllabus and returns its job id. If the same
+        syllabus is already queued, running or recently done without missing
+        weeks, that job's id is returned instead.
+        """
+        key = job_key(syllabus)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("JobQueue is shut down")
+
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None and _reusable(existing):
+                return existing.job_id
+
+            job = Job(job_id=f"job-{next(self._ids)}", key=key, user_id=user_id, syllabus=syllabus)
+            self._jobs[job.job_id] = job
+            self._by_key[key] = job.job_id
+
+            queue = self._queues.setdefault(user_id, deque())
+            if not queue:
+                self._turns.append(user_id)
+            queue.append(job.job_id)
+            self._cond.notify()
+            return job.job_id
+
+    def status(self, job_id: str) -> Optional[Job]:
+        """Snapshot of a job, or None if it is unknown or was dropped from history."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            # Deduplicated jobs are shared between sessions, so each snapshot
+            # gets its own copies of the models it hands out
+            snapshot = replace(
+                job,
+                weeks=[week.model_copy(deep=True) for week in job.weeks],
+                missing_weeks=list(job.missing_weeks),
+                semester_info=job.semester_info.model_copy(deep=True) if job.semester_info else None,
+                calendar=job.calendar.model_copy(deep=True) if job.calendar else None,
+                quiz=job.quiz.model_copy(deep=True) if job.quiz else None
+            )
+            if job.status == "queued":
+                snapshot.queue_position = self._position(job)
+            return snapshot
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued job. Running jobs can't be interrupted."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            queue = self._queues[job.user_id]
+            queue.remove(job_id)
+            if not queue:
+                self._turns.remove(job.user_id)
+            self._finish(job, "cancelled")
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """Job counts by status."""
+        with self._cond:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the workers after their current jobs; queued jobs are cancelled."""
+        with self._cond:
+            self._closed = True
+            for queue in self._queues.values():
+                for job_id in queue:
+                    self._finish(self._jobs[job_id], "cancelled")
+            self._queues.clear()
+            self._turns.clear()
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    # ---------- Scheduling ----------
+
+    def _position(self, job: Job) -> int:
+        """Jobs that will start before this one, under round-robin order."""
+        queue = self._queues[job.user_id]
+        rounds = queue.index(job.job_id)
+        ahead = 0
+        turn = self._turns.index(job.user_id)
+        for index, user_id in enumerate(self._turns):
+            other = len(self._queues[user_id])
+            # Users earlier in this round get one more turn before ours
+            ahead += min(other, rounds + (1 if index < turn else 0))
+        return ahead
+
+    def _next_job(self) -> Optional[Job]:
+        """Waits for and removes the next job in round-robin order."""
+        with self._cond:
+            while not self._turns and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+
+            user_id = self._turns.popleft()
+            queue = self._queues[user_id]
+            job = self._jobs[queue.popleft()]
+            if queue:
+                self._turns.append(user_id)
+            else:
+                del self._queues[user_id]
+
+            job.status = "running"
+            job.started_at = time.time()
+            return job
+
+    def _update(self, job: Job, **fields) -> None:
+        with self._cond:
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str] = None) -> None:
+        """Marks a job finished and trims the finished-job history. Caller holds the lock."""
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self._finished[job.job_id] = None
+        while len(self._finished) > self.max_finished:
+            old_id, _ = self._finished.popitem(last=False)
+            old = self._jobs.pop(old_id)
+            if self._by_key.get(old.key) == old_id:
+                del self._by_key[old.key]
+
+    def _work(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                with agent.tracer.span("calendar_job", kind="job", job_id=job.job_id, user_id=job.user_id):
+                    self.runner(job, lambda **fields: self._update(job, **fields))
+            except Exception as e:
+                with self._cond:
+                    self._finish(job, "failed", f"{type(e).__name__}: {e}")
+            else:
+                with self._cond:
+                    self._finish(job, "done")
@@ -0,0 +1,211 @@
+"""
+Persistent response cache for structured LLM calls.
+
+Results are stored in a small SQLite database keyed by a hash of the model
+name, temperature, output schema and the exact message list, so re-running
+the agent on a byte-identical syllabus skips the Ollama round-trip.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence, Type
+
+from pydantic import BaseModel
+
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "study_planner", "llm_responses.sqlite3"
+)
+
+
+@dataclass
+class CacheStats:
+    """Hit/miss counters for one ResponseCache instance"""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    On-disk cache of validated Pydantic results.
+
+    Args:
+        path: SQLite file to store entries in
+        ttl_seconds: Entries older than this are treated as misses and removed
+        max_bytes: Least recently used entries are evicted above this size
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: Optional[float] = 30 * 24 * 3600,
+        max_bytes: Optional[int] = 64 * 1024 * 1024
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._conn = None
+
+    # ---------- Keys ----------
+
+    @staticmethod
+    def make_key(
+        model: str,
+        temperature: Optional[float],
+        schema: Type[BaseModel],
+        messages: Sequence
+    ) -> str:
+        """Content address for one structured call."""
+        payload = {
+            "model": model,
+            "temperature": temperature,
+            "schema": f"{schema.__module__}.{schema.__qualname__}",
+            "schema_json": schema.model_json_schema(),
+            "messages": [[m.type, m.content] for m in messages],
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    # ---------- Storage ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    schema TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    latency REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, schema: Type[BaseModel]) -> Optional[BaseModel]:
+        """Returns a fresh copy of the cached result, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, latency, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds is not None and now - row[2] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self.stats.evictions += 1
+                row = None
+
+            if row is None:
+                self.stats.misses += 1
+                return None
+
+            try:
+                result = schema.model_validate_json(row[0])
+            except ValueError:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self.stats.misses += 1
+                return None
+
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.stats.hits += 1
+            self.stats.saved_seconds += row[1]
+            return result
+
+    def put(self, key: str, result: BaseModel, latency: float = 0.0) -> None:
+        """Stores a validated result along with the time the LLM took to produce it."""
+        value = result.model_dump_json()
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, type(result).__name__, value, len(value), latency, now, now)
+            )
+            self.stats.writes += 1
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drops expired entries, then least recently used ones above max_bytes."""
+        if self.ttl_seconds is not None:
+            cursor = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self.stats.evictions += max(cursor.rowcount, 0)
+
+        if self.max_bytes is None:
+            return
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Removes every entry."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def cache_from_env() -> Optional[ResponseCache]:
+    """
+    Builds the default cache from environment variables.
+
+    STUDY_PLANNER_CACHE: database path, or "off" to disable caching
+    STUDY_PLANNER_CACHE_TTL: entry lifetime in seconds
+    STUDY_PLANNER_CACHE_MAX_MB: size limit in megabytes
+    """
+    path = os.environ.get("STUDY_PLANNER_CACHE", DEFAULT_CACHE_PATH)
+    if path.lower() in ("off", "0", "false", "none", ""):
+        return None
+
+    cache = ResponseCache(path)
+    if "STUDY_PLANNER_CACHE_TTL" in os.environ:
+        cache.ttl_seconds = float(os.environ["STUDY_PLANNER_CACHE_TTL"])
+    if "STUDY_PLANNER_CACHE_MAX_MB" in os.environ:
+        cache.max_bytes = int(float(os.environ["STUDY_PLANNER_CACHE_MAX_MB"]) * 1024 * 1024)
+    return cache
@@ -0,0 +1,157 @@
+"""
+Shared chat model clients with per-call model routing.
+
+One chat model instance (and so one pooled HTTP connection to Ollama) is
+kept per model name, structured-output wrappers are built once per schema,
+and a routing table decides which model serves each kind of call.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple, Type
+
+import httpx
+from langchain_core.exceptions import OutputParserException
+from langchain_ollama import ChatOllama
+from ollama import ResponseError
+from pydantic import BaseModel, ValidationError
+
+
+DEFAULT_MODEL = "llama3.1:8b"
+
+# Calls that work fine on a smaller model
+LIGHT_CALLS = ("planner", "generate_quiz")
+
+# Seconds to wait for Ollama to connect or send the next chunk of a response
+DEFAULT_TIMEOUT = 120.0
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """
+    Whether a failed call is worth another attempt: timeouts, dropped
+    connections, overloaded or crashed servers (429 and 5xx responses) and
+    output that didn't match the schema. An Ollama server that isn't running
+    (the ollama client raises ConnectionError), an unknown model (404) or a
+    bug in the caller fails the same way every time.
+    """
+    if isinstance(error, (TimeoutError, httpx.TimeoutException)):
+        return True
+    if isinstance(error, httpx.TransportError):
+        return not isinstance(error, httpx.ConnectError)
+    if isinstance(error, ResponseError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (ValidationError, OutputParserException))
+
+
+class LLMClientPool:
+    """
+    Reusable chat models and structured wrappers, routed by call name.
+
+    Args:
+        routes: Mapping of call name to model name; unlisted calls use default_model
+        default_model: Model for calendar batches, extraction and anything unrouted
+        temperature: Sampling temperature for every model
+        base_url: Ollama server URL (defaults to the ollama client's default)
+        keep_alive: How long Ollama keeps a model loaded after a request
+        max_connections: HTTP connection pool size per model
+        timeout: Seconds without a response from Ollama before a call fails
+            (None waits forever)
+        factory: Optional callable(model_name) -> chat model, replacing ChatOllama
+            (used to plug in fakes)
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, str]] = None,
+        default_model: str = DEFAULT_MODEL,
+        temperature: float = 0.2,
+        base_url: Optional[str] = None,
+        keep_alive: Optional[str] = "30m",
+        max_connections: int = 8,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        factory: Optional[Callable[[str], object]] = None
+    ):
+        self.routes = dict(routes or {})
+        self.default_model = default_model
+        self.temperature = temperature
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.factory = factory
+        self._models: Dict[str, object] = {}
+        self._structured: Dict[Tuple[str, Type[BaseModel]], object] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LLMClientPool":
+        """
+        Builds the default pool from environment variables.
+
+        STUDY_PLANNER_MODEL: model for calendar batches and extraction
+        STUDY_PLANNER_SMALL_MODEL: model for planning and quizzes
+        OLLAMA_HOST: Ollama server URL
+        STUDY_PLANNER_LLM_TIMEOUT: per-call timeout in seconds
+        """
+        default_model = os.environ.get("STUDY_PLANNER_MODEL", DEFAULT_MODEL)
+        small_model = os.environ.get("STUDY_PLANNER_SMALL_MODEL", default_model)
+        return cls(
+            routes={call: small_model for call in LIGHT_CALLS},
+            default_model=default_model,
+            base_url=os.environ.get("OLLAMA_HOST"),
+            timeout=float(os.environ.get("STUDY_PLANNER_LLM_TIMEOUT", DEFAULT_TIMEOUT))
+        )
+
+    @classmethod
+    def single(cls, chat_model) -> "LLMClientPool":
+        """A pool that sends every call to one existing chat model."""
+        return cls(factory=lambda model_name: chat_model)
+
+    def model_for(self, call: str) -> str:
+        """Model name that serves a call."""
+        return self.routes.get(call, self.default_model)
+
+    def chat_model(self, model_name: str):
+        """Returns the shared chat model for a model name, creating it once."""
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._create(model_name)
+                self._models[model_name] = model
+            return model
+
+    def _create(self, model_name: str):
+        if self.factory is not None:
+            return self.factory(model_name)
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections
+        )
+        kwargs = {}
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        return ChatOllama(
+            model=model_name,
+            temperature=self.temperature,
+            keep_alive=self.keep_alive,
+            client_kwargs={"limits": limits, "timeout": self.timeout},
+            **kwargs
+        )
+
+    def structured(self, call: str, schema: Type[BaseModel]) -> Tuple[object, object]:
+        """
+        Returns (chat_model, structured_runnable) for a call and schema.
+        The structured wrapper is built once per model and schema, with
+        include_raw=True so callers can read token counts and timings; it
+        returns {"raw", "parsed", "parsing_error"}.
+        """
+        model_name = self.model_for(call)
+        chat_model = self.chat_model(model_name)
+        key = (model_name, schema)
+        with self._lock:
+            runnable = self._structured.get(key)
+            if runnable is None:
+                runnable = chat_model.with_structured_output(schema, include_raw=True)
+                self._structured[key] = runnable
+        return chat_model, runnable
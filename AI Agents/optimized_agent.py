@@ -3,18 +3,63 @@ Optimized Study Planner Agent with Parallel Generation
 This module can be imported by the Streamlit frontend.
 """
 
-from langchain_ollama import ChatOllama
-from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
-from typing_extensions import TypedDict
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Dict, Iterator, Optional, List, Literal
+from typing_extensions import Annotated, TypedDict
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 from langchain_core.messages import HumanMessage, SystemMessage
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from langchain_core.runnables import RunnableConfig
+from datetime import date, datetime, timedelta
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from functools import lru_cache
+import contextvars
+import copy
+import difflib
+import hashlib
+import inspect
+import operator
+import re
+import threading
+import time
+
+from llm_cache import ResponseCache, cache_from_env
+from llm_client import LLMClientPool, is_transient_error
+from prompt_compaction import CompactionReport, compact_syllabus, is_schedule_line
+from tracing import Span, current_span, tracer_from_env
 
 
 # ============ LLM Setup ============
-llm = ChatOllama(model="llama3.1:8b", temperature=0.2)
+# Shared Ollama clients; planning and quizzes can be routed to a smaller model
+llm_pool = LLMClientPool.from_env()
+
+# Content-addressed cache of structured results (None disables caching)
+response_cache: Optional[ResponseCache] = cache_from_env()
+
+# Spans for graph nodes, week batches and LLM calls
+tracer = tracer_from_env()
+
+# ============ Prompt Budgets ============
+# Approximate token limit for the syllabus sent to each call.
+# Calls missing from this mapping (or set to None) get the raw syllabus.
+SYLLABUS_TOKEN_BUDGETS = {
+    "extract_semester_info": 2000,
+    "generate_quiz": 1200,
+    "planner": 600,
+}
+
+# Most recent CompactionReport per call, for display in the frontend
+compaction_reports: Dict[str, CompactionReport] = {}
+
+# ============ Scheduling Defaults ============
+WEEKS_PER_BATCH = 2
+MAX_IN_FLIGHT = 2
+CONTEXT_WEEKS = 3  # Previous weeks whose topics are fed into each batch prompt
+BATCH_RETRIES = 2  # Extra attempts for a failed batch before it is split into single weeks
+RETRY_BACKOFF_S = 1.0  # Delay before the first retry, doubled for each later one
+BATCH_TIMEOUT_S = 300.0  # Wall-clock limit for one batch LLM call before it is abandoned and retried
+MAX_WEEKS_PER_BATCH = 6  # Upper bound for adaptive batch sizing
 
 
 # ============ Schemas =============
@@ -40,6 +85,14 @@ class SemesterInfo(BaseModel):
     major_topics: List[str] = Field(
         description="Main topics/modules covered in the course"
     )
+    
+    # Date-sorted view of key_deadlines, see _deadline_index()
+    _deadline_index: Optional["DeadlineIndex"] = PrivateAttr(default=None)
+    _unparseable_dates: List[str] = PrivateAttr(default_factory=list)
+    
+    def unparseable_dates(self) -> List[str]:
+        """Date strings that could not be parsed during validation."""
+        return list(self._unparseable_dates)
 
 
 class StudyBlock(BaseModel):
@@ -86,41 +139,333 @@ class QuizData(BaseModel):
     questions: List[str] = Field(description="List of quiz questions")
 
 
+class BatchTiming(BaseModel):
+    """Timing of one week batch, in seconds since the run started"""
+    start_week: int
+    num_weeks: int
+    depends_on: List[int] = Field(description="Start weeks of the batches this batch waited for")
+    ready_s: float = Field(description="When all dependencies had finished")
+    started_s: float = Field(description="When the LLM call started")
+    finished_s: float = Field(description="When the LLM call returned")
+    clean: bool = Field(default=True, description="Succeeded on the first call with every week present")
+    llm_calls: int = Field(default=0, description="Fresh (uncached) LLM calls, including retries")
+    output_tokens: Optional[int] = Field(default=None, description="Tokens generated by those calls")
+
+    @property
+    def queued_s(self) -> float:
+        return self.started_s - self.ready_s
+
+    @property
+    def duration_s(self) -> float:
+        return self.finished_s - self.started_s
+
+    @property
+    def tokens_per_s(self) -> Optional[float]:
+        if not self.output_tokens or self.duration_s <= 0:
+            return None
+        return self.output_tokens / self.duration_s
+
+
 # ============ Agent State =============
 class AgentState(TypedDict):
-    """Shared state across all agents"""
+    """
+    Shared state across all agents.
+    
+    Calendar and quiz generation run as parallel branches, so nodes return
+    only the keys they change and completed_steps is merged by concatenation.
+    """
     syllabus: str
     plan: Optional[Plan]
-    current_step_index: int
     semester_info: Optional[SemesterInfo]
     current_week: int
     weeks_generated: List[WeeklyCalendar]
     full_calendar: Optional[SemesterCalendar]
     quiz: Optional[QuizData]
-    completed_steps: List[str]
+    completed_steps: Annotated[List[str], operator.add]
 
 
 # ============ Helper Functions =============
 
-def _parse_date(date_str: str) -> datetime:
-    """Parses a date string in multiple formats."""
-    formats = [
-        "%Y-%m-%d",
-        "%a %b %d, %Y",
-        "%B %d, %Y",
-        "%b %d, %Y",
-        "%m/%d/%Y",
-        "%d/%m/%Y",
-    ]
+def _syllabus_for(call: str, syllabus: str) -> str:
+    """Compacts the syllabus to the token budget configured for a call."""
+    budget = SYLLABUS_TOKEN_BUDGETS.get(call)
+    if budget is None:
+        return syllabus
+    
+    compacted = compact_syllabus(syllabus, budget)
+    report = compacted.report
+    if report.tokens_after < report.tokens_before and compaction_reports.get(call) != report:
+        print(f"✂️  {call}: syllabus {report.tokens_before} → {report.tokens_after} tokens")
+    compaction_reports[call] = report
+    return compacted.text
+
+
+def _cache_key(cache: ResponseCache, chat_model, schema, messages) -> str:
+    """Cache key for a structured call against the given chat model."""
+    return cache.make_key(
+        getattr(chat_model, "model", type(chat_model).__name__),
+        getattr(chat_model, "temperature", None),
+        schema,
+        messages
+    )
+
+
+# Ollama reports these in nanoseconds on the final response
+_OLLAMA_DURATIONS = {
+    "load_duration": "load_s",
+    "prompt_eval_duration": "prefill_s",
+    "eval_duration": "decode_s",
+    "total_duration": "server_s",
+}
+
+
+def _llm_span(call: str, schema, chat_model, messages):
+    """Opens the span for one structured call."""
+    return tracer.span(
+        call,
+        kind="llm",
+        schema=schema.__name__,
+        model=getattr(chat_model, "model", type(chat_model).__name__),
+        prompt_chars=sum(len(str(m.content)) for m in messages)
+    )
+
+
+def _structured_result(output, span: Span, latency: float):
+    """
+    Unpacks an include_raw structured output and records token counts and
+    Ollama's load/prefill/decode timings on the span. Whatever the server
+    does not account for (transport, queueing in Ollama, parsing) is
+    recorded as overhead_s.
+    
+    Raises the parsing error if the response did not match the schema.
+    """
+    span.attributes["latency_s"] = latency
+    if not isinstance(output, dict):
+        return output
+    
+    raw = output.get("raw")
+    usage = getattr(raw, "usage_metadata", None) or {}
+    metadata = getattr(raw, "response_metadata", None) or {}
+    span.attributes["prompt_tokens"] = usage.get("input_tokens")
+    span.attributes["output_tokens"] = usage.get("output_tokens")
+    for field_name, attribute in _OLLAMA_DURATIONS.items():
+        if metadata.get(field_name) is not None:
+            span.attributes[attribute] = metadata[field_name] / 1e9
+    if "server_s" in span.attributes:
+        span.attributes["overhead_s"] = latency - span.attributes["server_s"]
+    
+    if output.get("parsing_error") is not None:
+        raise output["parsing_error"]
+    return output["parsed"]
+
+
+def _credit_batch(batch_span: Optional[Span], llm_span: Span) -> None:
+    """Adds a fresh call's latency and output tokens to the enclosing batch span."""
+    if batch_span is None or batch_span.kind != "batch":
+        return
+    attributes = batch_span.attributes
+    attributes["llm_calls"] = attributes.get("llm_calls", 0) + 1
+    attributes["llm_s"] = attributes.get("llm_s", 0.0) + llm_span.attributes["latency_s"]
+    output_tokens = llm_span.attributes.get("output_tokens")
+    if output_tokens is not None:
+        attributes["output_tokens"] = attributes.get("output_tokens", 0) + output_tokens
+
+
+# ============ Engine Steps =============
+# Logic shared by this module and async_agent is written once, as generator
+# "steps". Steps don't do I/O themselves: they yield an effect, a tuple of an
+# operation name and its arguments, and receive its result from the yield.
+#
+#   ("llm", structured_llm, messages, timeout, span) -> (output, latency_s)
+#   ("cache_get", cache, key, schema)                -> cached result or None
+#   ("cache_put", cache, key, result, latency_s)     -> None
+#   ("sleep", seconds)                                -> None
+#   ("stream_weeks", syllabus, semester_info, callback,
+#    weeks_per_batch, max_in_flight)                  -> list of weeks
+#   ("regenerate", syllabus, semester_info, week_numbers,
+#    calendar, callback, weeks_per_batch, max_in_flight) -> calendar
+#
+# _run performs effects on the calling thread (see _EFFECTS at the end of
+# this module); async_agent._arun awaits them on the event loop. A failed
+# effect is raised inside the steps at the yield, so retries and fallbacks
+# are the same for both engines.
+
+def _run(steps):
+    """Runs engine steps to completion on the calling thread and returns their result."""
+    value, error = None, None
+    while True:
+        try:
+            effect = steps.send(value) if error is None else steps.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        value, error = None, None
+        operation, *args = effect
+        try:
+            value = _EFFECTS[operation](*args)
+        except BaseException as e:
+            error = e
+
+
+def _call_with_deadline(call, timeout: Optional[float]):
+    """
+    Runs call() and returns its result, raising TimeoutError once timeout
+    seconds have passed.
+    
+    httpx's timeout only bounds the wait for each chunk, so a response that
+    keeps trickling in is never cut off. Here the call runs on its own
+    thread and the caller stops waiting at the deadline. The abandoned
+    thread is not interrupted, but its result is discarded.
+    """
+    if timeout is None:
+        return call()
+    
+    future = Future()
+    context = contextvars.copy_context()
+    
+    def run():
+        try:
+            future.set_result(context.run(call))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    # A thread per call rather than a shared pool, so waiting for a free
+    # worker never counts against the deadline
+    threading.Thread(target=run, name="llm-call", daemon=True).start()
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        raise TimeoutError(f"LLM call took longer than {timeout:.0f}s") from None
+
+
+def _call_llm(structured_llm, messages, timeout: Optional[float], span: Span) -> tuple:
+    """The "llm" effect: invokes the model and returns (output, latency_s)."""
+    started_at = time.perf_counter()
+    output = _call_with_deadline(lambda: structured_llm.invoke(messages), timeout)
+    return output, time.perf_counter() - started_at
+
+
+def _structured_steps(call: str, schema, messages, use_cache: bool = True, timeout: Optional[float] = None):
+    """
+    Steps that invoke the LLM routed to this call with structured output
+    for the schema.
+    
+    Results are looked up in and written to response_cache. With
+    use_cache=False the lookup is skipped but the fresh result is still stored.
+    With a timeout, the call fails with TimeoutError after that many seconds.
+    Each call is recorded as an "llm" span.
+    """
+    chat_model, structured_llm = llm_pool.structured(call, schema)
+    outer_span = current_span()
+    with _llm_span(call, schema, chat_model, messages) as span:
+        cache = response_cache
+        key = None
+        span.attributes["cache"] = "off"
+        if cache is not None:
+            key = _cache_key(cache, chat_model, schema, messages)
+            span.attributes["cache"] = "skip"
+            if use_cache:
+                cached = yield ("cache_get", cache, key, schema)
+                if cached is not None:
+                    span.attributes["cache"] = "hit"
+                    return cached
+                span.attributes["cache"] = "miss"
+        
+        output, latency = yield ("llm", structured_llm, messages, timeout, span)
+        result = _structured_result(output, span, latency)
+        _credit_batch(outer_span, span)
+        
+        if cache is not None:
+            yield ("cache_put", cache, key, result, latency)
+        
+        return result
+
+
+def _invoke_structured(call: str, schema, messages, use_cache: bool = True, timeout: Optional[float] = None):
+    """Runs _structured_steps on the calling thread."""
+    return _run(_structured_steps(call, schema, messages, use_cache, timeout))
+
+
+class DateParseError(ValueError):
+    """Raised when a date string matches none of the supported formats"""
+
+
+_DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%a %b %d, %Y",
+    "%B %d, %Y",
+    "%b %d, %Y",
+    "%m/%d/%Y",
+    "%d/%m/%Y",
+]
+
+# String shapes and the formats to try for each. Shapes are mutually
+# exclusive, so at most one of them can match a given string.
+_DATE_SHAPES = [
+    (re.compile(r"\d{4}-\d{1,2}-\d{1,2}"), ["%Y-%m-%d"]),
+    (re.compile(r"[A-Za-z]{3} [A-Za-z]{3} \d{1,2}, \d{4}"), ["%a %b %d, %Y"]),
+    (re.compile(r"[A-Za-z]{3} \d{1,2}, \d{4}"), ["%b %d, %Y"]),
+    (re.compile(r"[A-Za-z]{4,} \d{1,2}, \d{4}"), ["%B %d, %Y"]),
+    (re.compile(r"\d{1,2}/\d{1,2}/\d{4}"), ["%m/%d/%Y", "%d/%m/%Y"]),
+]
+
+DATE_CACHE_SIZE = 4096
+
+# Index into _DATE_SHAPES of the shape that parsed most recently
+_last_date_shape = 0
+
+
+def _parse_date_text(text: str) -> Optional[datetime]:
+    """Parses a stripped date string, or returns None if no format fits."""
+    global _last_date_shape
+    
+    order = [_last_date_shape] + [i for i in range(len(_DATE_SHAPES)) if i != _last_date_shape]
+    for shape in order:
+        pattern, formats = _DATE_SHAPES[shape]
+        if not pattern.fullmatch(text):
+            continue
+        
+        for fmt in formats:
+            try:
+                if fmt == "%Y-%m-%d":
+                    year, month, day = text.split("-")
+                    result = datetime(int(year), int(month), int(day))
+                else:
+                    result = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            _last_date_shape = shape
+            return result
+        break
     
-    for fmt in formats:
+    # Unusual spacing or padding that strptime still accepts
+    for fmt in _DATE_FORMATS:
         try:
-            return datetime.strptime(date_str.strip(), fmt)
+            return datetime.strptime(text, fmt)
         except ValueError:
             continue
     
-    print(f"⚠️  Warning: Could not parse date '{date_str}', using default")
-    return datetime(2025, 1, 1)
+    return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _cached_date(text: str) -> Optional[datetime]:
+    return _parse_date_text(text)
+
+
+def _parse_date(date_str: str) -> datetime:
+    """
+    Parses a date string in multiple formats.
+    
+    The format is picked from the shape of the string and results are cached.
+    Raises DateParseError if the string is not a supported date.
+    """
+    if not isinstance(date_str, str):
+        raise DateParseError(f"Could not parse date {date_str!r}")
+    
+    result = _cached_date(date_str.strip())
+    if result is None:
+        raise DateParseError(f"Could not parse date '{date_str}'")
+    return result
 
 
 def _format_deadlines(deadlines: List[dict]) -> str:
@@ -156,29 +501,89 @@ def _extract_semester_term(syllabus: str) -> str:
     return 'Semester 2025'
 
 
+class DeadlineIndex:
+    """
+    Deadlines parsed once and sorted by date for range lookups.
+    Deadlines without a parseable date are left out.
+    """
+    
+    def __init__(self, deadlines: List[dict]):
+        self.fingerprint = _deadline_fingerprint(deadlines)
+        entries = []
+        for position, deadline in enumerate(deadlines):
+            try:
+                deadline_date = _parse_date(deadline.get('date')).date()
+            except DateParseError:
+                continue
+            entries.append((deadline_date, position, deadline))
+        
+        entries.sort(key=lambda entry: entry[:2])
+        self._dates = [entry[0] for entry in entries]
+        self._deadlines = [entry[2] for entry in entries]
+    
+    def between(self, start: date, end: date) -> List[dict]:
+        """Deadlines dated from start to end, inclusive."""
+        lo = bisect_left(self._dates, start)
+        hi = bisect_right(self._dates, end)
+        return self._deadlines[lo:hi]
+
+
+def _deadline_fingerprint(deadlines: List[dict]) -> tuple:
+    """Every field of every deadline, so any edit to key_deadlines shows up."""
+    return tuple(tuple(deadline.items()) for deadline in deadlines)
+
+
+def _deadline_index(info: SemesterInfo) -> DeadlineIndex:
+    """Returns the deadline index for info, rebuilding it if key_deadlines changed."""
+    index = info._deadline_index
+    if index is None or index.fingerprint != _deadline_fingerprint(info.key_deadlines):
+        index = DeadlineIndex(info.key_deadlines)
+        info._deadline_index = index
+    return index
+
+
 def _validate_semester_info(info: SemesterInfo) -> SemesterInfo:
-    """Validates and normalizes dates in semester info."""
+    """
+    Validates and normalizes dates in semester info.
+    
+    Raises DateParseError if the start date can't be parsed. An unparseable
+    end date is derived from the start date and total_weeks, and unparseable
+    deadline dates are kept as-is; both are listed in info.unparseable_dates().
+    """
+    unparseable = []
     start_dt = _parse_date(info.start_date)
-    end_dt = _parse_date(info.end_date)
+    
+    try:
+        end_dt = _parse_date(info.end_date)
+    except DateParseError:
+        unparseable.append(info.end_date)
+        end_dt = start_dt + timedelta(weeks=info.total_weeks, days=-1)
     
     info.start_date = start_dt.strftime("%Y-%m-%d")
     info.end_date = end_dt.strftime("%Y-%m-%d")
     
     for deadline in info.key_deadlines:
         if 'date' in deadline:
-            deadline_dt = _parse_date(deadline['date'])
+            try:
+                deadline_dt = _parse_date(deadline['date'])
+            except DateParseError:
+                unparseable.append(str(deadline['date']))
+                continue
             deadline['date'] = deadline_dt.strftime("%Y-%m-%d")
     
+    if unparseable:
+        print(f"⚠️  Warning: Could not parse dates: {', '.join(unparseable)}")
+    info._unparseable_dates = unparseable
+    
+    info._deadline_index = DeadlineIndex(info.key_deadlines)
+    
     return info
 
 
 # ============ Core Agent Functions =============
 
-def extract_semester_info(syllabus: str) -> SemesterInfo:
-    """
-    Public function to extract semester information.
-    Can be called directly by frontend.
-    """
+def _semester_info_messages(syllabus: str) -> list:
+    """Builds the prompt for semester info extraction."""
     system_prompt = """You are analyzing a course syllabus to extract key information.
 
 Extract the following:
@@ -201,28 +606,35 @@ Guidelines:
 Output format must match the SemesterInfo schema exactly.
 """
 
-    structured_llm = llm.with_structured_output(SemesterInfo)
-    
-    result = structured_llm.invoke([
+    return [
         SystemMessage(content=system_prompt),
-        HumanMessage(content=syllabus)
-    ])
-    
+        HumanMessage(content=_syllabus_for("extract_semester_info", syllabus))
+    ]
+
+
+def _semester_info_steps(syllabus: str):
+    """Steps for extract_semester_info."""
+    result = yield from _structured_steps("extract_semester_info", SemesterInfo, _semester_info_messages(syllabus))
     return _validate_semester_info(result)
 
 
-def generate_multiple_weeks_batch(
-    syllabus: str,
+def extract_semester_info(syllabus: str) -> SemesterInfo:
+    """
+    Public function to extract semester information.
+    Can be called directly by frontend.
+    """
+    return _run(_semester_info_steps(syllabus))
+
+
+def _week_batch_request(
     semester_info: SemesterInfo,
     start_week: int,
     num_weeks: int,
     previous_weeks: List[WeeklyCalendar]
-) -> List[WeeklyCalendar]:
-    """
-    Public function to generate multiple weeks in a batch.
-    Can be called directly by frontend for regeneration.
-    """
+) -> tuple:
+    """Builds the prompt for a week batch. Returns (messages, week_info)."""
     start_date = _parse_date(semester_info.start_date)
+    deadlines = _deadline_index(semester_info)
     week_info = []
     
     for i in range(num_weeks):
@@ -231,28 +643,15 @@ def generate_multiple_weeks_batch(
         week_end = week_start + timedelta(days=6)
         week_dates = f"{week_start.strftime('%b %d')} - {week_end.strftime('%b %d')}"
         
-        week_deadlines = []
-        for deadline in semester_info.key_deadlines:
-            try:
-                deadline_date = _parse_date(deadline.get('date', '2025-01-01'))
-                week_start_midnight = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-                week_end_midnight = week_end.replace(hour=23, minute=59, second=59)
-                deadline_midnight = deadline_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                
-                if week_start_midnight <= deadline_midnight <= week_end_midnight:
-                    week_deadlines.append(deadline)
-            except Exception:
-                continue
-        
         week_info.append({
             'week_number': week_num,
             'week_dates': week_dates,
-            'deadlines': week_deadlines
+            'deadlines': deadlines.between(week_start.date(), week_end.date())
         })
     
     previous_topics = []
     if previous_weeks:
-        for prev_week in previous_weeks[-3:]:
+        for prev_week in previous_weeks[-CONTEXT_WEEKS:]:
             for day in prev_week.schedule:
                 for block in day.blocks:
                     if block.topic not in previous_topics:
@@ -275,95 +674,623 @@ Rules:
 
 Output {num_weeks} WeeklyCalendar objects."""
 
-    structured_llm = llm.with_structured_output(MultiWeekCalendar)
-    
-    result = structured_llm.invoke([
+    messages = [
         SystemMessage(content=system_prompt),
         HumanMessage(content=f"Generate weeks {start_week}-{start_week + num_weeks - 1}")
-    ])
+    ]
+    return messages, week_info
+
+
+def _apply_week_info(weeks: List[WeeklyCalendar], week_info: List[dict]) -> List[WeeklyCalendar]:
+    """
+    Overwrites model-chosen week numbers and dates with the requested ones.
+    Extra weeks beyond the request are dropped; missing ones are left for
+    the caller to detect.
+    """
+    weeks = weeks[:len(week_info)]
+    for calendar, info in zip(weeks, week_info):
+        calendar.week_number = info['week_number']
+        calendar.week_dates = info['week_dates']
+    return weeks
+
+
+def _week_batch_steps(
+    syllabus: str,
+    semester_info: SemesterInfo,
+    start_week: int,
+    num_weeks: int,
+    previous_weeks: List[WeeklyCalendar],
+    use_cache: bool = True
+):
+    """Steps for generate_multiple_weeks_batch."""
+    messages, week_info = _week_batch_request(
+        semester_info, start_week, num_weeks, previous_weeks
+    )
+    result = yield from _structured_steps(
+        "week_batch", MultiWeekCalendar, messages, use_cache=use_cache, timeout=BATCH_TIMEOUT_S
+    )
+    return _apply_week_info(result.weeks, week_info)
+
+
+def generate_multiple_weeks_batch(
+    syllabus: str,
+    semester_info: SemesterInfo,
+    start_week: int,
+    num_weeks: int,
+    previous_weeks: List[WeeklyCalendar],
+    use_cache: bool = True
+) -> List[WeeklyCalendar]:
+    """
+    Public function to generate multiple weeks in a batch.
+    Can be called directly by frontend for regeneration.
+    Pass use_cache=False to force a fresh LLM response.
+    The call fails with TimeoutError after BATCH_TIMEOUT_S seconds.
+    """
+    return _run(_week_batch_steps(
+        syllabus, semester_info, start_week, num_weeks, previous_weeks, use_cache
+    ))
+
+
+class WeekGenerationError(RuntimeError):
+    """
+    Some weeks could not be generated even after retries and single-week
+    fallbacks. weeks holds every week that was generated.
+    """
+    
+    def __init__(self, missing_weeks: List[int], weeks: List[WeeklyCalendar]):
+        super().__init__(f"Could not generate weeks: {', '.join(map(str, missing_weeks))}")
+        self.missing_weeks = missing_weeks
+        self.weeks = weeks
+
+
+def _retry_delay(attempt: int, backoff: float) -> float:
+    """Seconds to wait before retry number attempt (0-based)."""
+    return backoff * 2 ** attempt
+
+
+def _retry_steps(label: str, make_steps, retries: int, backoff: float, span: Optional[Span] = None):
+    """
+    Runs the steps returned by make_steps(), starting over with fresh steps
+    on transient failures (see is_transient_error) with exponential backoff.
+    Other errors are raised at once.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return (yield from make_steps())
+        except Exception as e:
+            if attempt == retries or not is_transient_error(e):
+                raise
+            if span is not None:
+                span.attributes["retries"] = span.attributes.get("retries", 0) + 1
+            delay = _retry_delay(attempt, backoff)
+            print(f"🔁 {label} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            yield ("sleep", delay)
+
+
+def _resilient_batch_steps(
+    syllabus: str,
+    semester_info: SemesterInfo,
+    start_week: int,
+    num_weeks: int,
+    previous_weeks: List[WeeklyCalendar],
+    use_cache: bool = True,
+    retries: int = BATCH_RETRIES,
+    backoff: float = RETRY_BACKOFF_S,
+    span: Optional[Span] = None
+):
+    """
+    Steps that generate a batch, retrying it on transient failures. If it
+    still fails, each week is requested on its own; weeks the model left out
+    of its answer are requested on their own too. Errors that retrying can't
+    fix, such as Ollama not running, are raised straight away.
     
-    for i, calendar in enumerate(result.weeks):
-        if i < len(week_info):
-            calendar.week_number = week_info[i]['week_number']
-            calendar.week_dates = week_info[i]['week_dates']
+    Returns:
+        (weeks, failed_week_numbers)
+    """
+    requested = range(start_week, start_week + num_weeks)
+    label = f"Week {start_week}" if num_weeks == 1 else f"Weeks {start_week}-{start_week + num_weeks - 1}"
+    
+    def request(first_week: int, count: int, context: List[WeeklyCalendar]):
+        return _week_batch_steps(
+            syllabus, semester_info, first_week, count, context, use_cache=use_cache
+        )
+    
+    try:
+        weeks = yield from _retry_steps(
+            label, lambda: request(start_week, num_weeks, previous_weeks), retries, backoff, span
+        )
+    except Exception as e:
+        if not is_transient_error(e):
+            raise
+        if num_weeks == 1:
+            print(f"❌ {label} failed: {e}")
+            return [], [start_week]
+        print(f"✂️  {label} failed ({type(e).__name__}), splitting into single weeks")
+        if span is not None:
+            span.attributes["split"] = True
+        weeks = []
+    
+    by_number = {w.week_number: w for w in weeks if w.week_number in requested}
+    missing = [week_num for week_num in requested if week_num not in by_number]
+    if weeks and missing:
+        print(f"🧩 {label}: model left out weeks {missing}, requesting them separately")
+    
+    failed = []
+    for week_num in missing:
+        context = previous_weeks + [by_number[n] for n in sorted(by_number) if n < week_num]
+        try:
+            single = yield from _retry_steps(
+                f"Week {week_num}", lambda: request(week_num, 1, context), retries, backoff, span
+            )
+        except Exception as e:
+            if not is_transient_error(e):
+                raise
+            print(f"❌ Week {week_num} failed: {e}")
+            failed.append(week_num)
+            continue
+        if single:
+            by_number[week_num] = single[0]
+        else:
+            failed.append(week_num)
     
-    return result.weeks
+    if span is not None and missing:
+        span.attributes["refilled"] = [n for n in missing if n not in failed]
+        span.attributes["failed_weeks"] = failed
+    
+    return [by_number[n] for n in sorted(by_number)], failed
 
 
-def generate_weeks_hybrid(
-    syllabus: str, 
+def _generate_batch_resilient(
+    syllabus: str,
     semester_info: SemesterInfo,
-    callback=None
-) -> List[WeeklyCalendar]:
+    start_week: int,
+    num_weeks: int,
+    previous_weeks: List[WeeklyCalendar],
+    use_cache: bool = True,
+    retries: int = BATCH_RETRIES,
+    backoff: float = RETRY_BACKOFF_S,
+    span: Optional[Span] = None
+) -> tuple:
+    """Runs _resilient_batch_steps on the calling thread. Returns (weeks, failed_week_numbers)."""
+    return _run(_resilient_batch_steps(
+        syllabus, semester_info, start_week, num_weeks, previous_weeks, use_cache, retries, backoff, span
+    ))
+
+
+def _context_weeks(start_week: int, context_lag: int) -> range:
     """
-    Generates all weeks using hybrid parallel approach.
+    Weeks a batch takes its "Previous" topics from.
+
+    generate_multiple_weeks_batch only reads the last CONTEXT_WEEKS weeks it is
+    given. The window ends context_lag weeks before the batch so that nearby
+    batches can run while their immediate predecessors are still in flight.
+    """
+    last = start_week - context_lag - 1
+    return range(max(1, last - CONTEXT_WEEKS + 1), last + 1)
+
+
+class BatchSizer:
+    """
+    Chooses weeks per batch during an adaptive run.
+    
+    Keeps a smoothed rate of weeks delivered per second for every batch size
+    it has measured. A batch that needed a retry, a split or a refill shrinks
+    the size at once. Otherwise the sizer moves to whichever neighbouring
+    size has the best rate, trying the next larger size first if it hasn't
+    been measured yet.
     
     Args:
-        syllabus: Course syllabus text
-        semester_info: Extracted semester information
-        callback: Optional callback function(wave_num, total_waves, weeks_completed, total_weeks)
+        initial: Size of the first batches
+        min_size: Smallest size ever chosen
+        max_size: Largest size ever chosen
+        smoothing: Weight of the newest measurement in each size's rate
+    """
     
-    Returns:
-        List of WeeklyCalendar objects
+    def __init__(
+        self,
+        initial: int = WEEKS_PER_BATCH,
+        min_size: int = 1,
+        max_size: int = MAX_WEEKS_PER_BATCH,
+        smoothing: float = 0.5
+    ):
+        self.size = max(min_size, min(initial, max_size))
+        self.min_size = min_size
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.rates: Dict[int, float] = {}
+        self.history: List[int] = []
+    
+    def next_size(self) -> int:
+        """Size for the next batch; every size handed out is kept in history."""
+        self.history.append(self.size)
+        return self.size
+    
+    def record(self, num_weeks: int, weeks_delivered: int, duration_s: float, clean: bool) -> None:
+        """Updates the rate for num_weeks and picks the size for later batches."""
+        rate = weeks_delivered / duration_s if duration_s > 0 else 0.0
+        previous = self.rates.get(num_weeks)
+        self.rates[num_weeks] = rate if previous is None else previous + self.smoothing * (rate - previous)
+        
+        if not clean:
+            self.size = max(self.min_size, min(self.size, num_weeks - 1))
+            return
+        
+        neighbours = [
+            size for size in (self.size - 1, self.size, self.size + 1)
+            if self.min_size <= size <= self.max_size
+        ]
+        larger = self.size + 1
+        if larger in neighbours and larger not in self.rates:
+            self.size = larger
+            return
+        self.size = max((size for size in neighbours if size in self.rates), key=self.rates.get, default=self.size)
+
+
+class _BatchPlan:
     """
-    WEEKS_PER_BATCH = 2
-    BATCHES_PER_WAVE = 2
+    The semester's week batches, handed out as their dependencies finish.
     
-    total_weeks = semester_info.total_weeks
-    weeks_per_wave = WEEKS_PER_BATCH * BATCHES_PER_WAVE
+    With a fixed size every batch is laid out up front and any ready batch
+    can start. With a BatchSizer, batches are cut one at a time in week
+    order, sized by the sizer when they are about to start.
+    A batch depends on the batches covering its context weeks. Unless
+    context_lag is given, a batch's context window ends
+    size * (max_in_flight - 1) weeks before it, so larger batches look
+    further back and still leave room for the batches before them.
+    """
     
-    all_weeks = []
+    def __init__(
+        self,
+        total_weeks: int,
+        weeks_per_batch: int,
+        max_in_flight: int,
+        context_lag: Optional[int] = None,
+        sizer: Optional[BatchSizer] = None
+    ):
+        self.total_weeks = total_weeks
+        self.weeks_per_batch = weeks_per_batch
+        self.max_in_flight = max_in_flight
+        self.context_lag = context_lag
+        self.sizer = sizer
+        self.batch_of_week: Dict[int, int] = {}
+        self.dependencies: Dict[int, List[int]] = {}
+        self.context_lags: Dict[int, int] = {}
+        self.started = 0
+        self._upcoming: List[tuple] = []
+        self._next_week = 1
+        if sizer is None:
+            while self._next_week <= total_weeks:
+                self._cut(weeks_per_batch)
     
-    wave_num = 1
-    total_waves = (total_weeks + weeks_per_wave - 1) // weeks_per_wave
+    def _lag(self, size: int) -> int:
+        if self.context_lag is not None:
+            return self.context_lag
+        return size * (self.max_in_flight - 1)
     
-    for wave_start in range(1, total_weeks + 1, weeks_per_wave):
-        wave_end = min(wave_start + weeks_per_wave - 1, total_weeks)
+    def _cut(self, size: int) -> tuple:
+        """Plans the batch starting at the next unplanned week."""
+        batch = (self._next_week, min(size, self.total_weeks - self._next_week + 1))
+        batch_start, num_weeks = batch
+        for week_num in range(batch_start, batch_start + num_weeks):
+            self.batch_of_week[week_num] = batch_start
+        self.context_lags[batch_start] = self._lag(size)
+        self.dependencies[batch_start] = sorted({
+            self.batch_of_week[w] for w in _context_weeks(batch_start, self.context_lags[batch_start])
+        })
+        self._upcoming.append(batch)
+        self._next_week += num_weeks
+        return batch
+    
+    def has_pending(self) -> bool:
+        return bool(self._upcoming) or self._next_week <= self.total_weeks
+    
+    def estimated_batches(self) -> int:
+        """Batches in the run, counting unplanned weeks at the current size."""
+        size = self.sizer.size if self.sizer is not None else self.weeks_per_batch
+        remaining = self.total_weeks - self._next_week + 1
+        return self.started + len(self._upcoming) + -(-remaining // size)
+    
+    def take_ready(self, finished_at: Dict[int, float], limit: int) -> List[tuple]:
+        """Removes and returns up to limit batches whose dependencies have finished."""
+        def is_ready(batch_start: int) -> bool:
+            return all(dep in finished_at for dep in self.dependencies[batch_start])
+        
+        ready = [batch for batch in self._upcoming if is_ready(batch[0])][:limit]
+        for batch in ready:
+            self._upcoming.remove(batch)
+        
+        while self.sizer is not None and len(ready) < limit and self._next_week <= self.total_weeks:
+            context = _context_weeks(self._next_week, self._lag(self.sizer.size))
+            if not all(self.batch_of_week.get(w) in finished_at for w in context):
+                break
+            ready.append(self._cut(self.sizer.next_size()))
+            self._upcoming.pop()
+        
+        self.started += len(ready)
+        return ready
+
+
+def _context_previous_weeks(
+    completed_weeks: List[WeeklyCalendar],
+    batch_start: int,
+    context_lag: int
+) -> List[WeeklyCalendar]:
+    """Completed weeks inside a batch's context window, in week order."""
+    context = _context_weeks(batch_start, context_lag)
+    return sorted(
+        (w for w in completed_weeks if w.week_number in context),
+        key=lambda w: w.week_number
+    )
+
+
+def _timed_batch_steps(ready_at: float, syllabus, semester_info, start_week, num_weeks, previous_weeks):
+    """
+    Steps that run one batch (with retries and fallbacks) as a "batch" span
+    and return (weeks, failed_week_numbers, started_at, finished_at,
+    span_attributes). ready_at is when the batch's dependencies finished;
+    the wait from then until it started is recorded as queued_s.
+    """
+    started_at = time.perf_counter()
+    with tracer.span(
+        "week_batch",
+        kind="batch",
+        start_week=start_week,
+        num_weeks=num_weeks,
+        context_weeks=len(previous_weeks),
+        queued_s=started_at - ready_at
+    ) as span:
+        weeks, failed = yield from _resilient_batch_steps(
+            syllabus, semester_info, start_week, num_weeks, previous_weeks, span=span
+        )
+    return weeks, failed, started_at, time.perf_counter(), span.attributes
+
+
+def _batch_timing(
+    plan: "_BatchPlan",
+    batch_start: int,
+    num_weeks: int,
+    run_start: float,
+    finished_at: Dict[int, float],
+    started_at: float,
+    attributes: dict
+) -> BatchTiming:
+    """BatchTiming for a finished batch, from its batch span attributes."""
+    ready_at = max(
+        [finished_at[dep] for dep in plan.dependencies[batch_start]],
+        default=run_start
+    )
+    return BatchTiming(
+        start_week=batch_start,
+        num_weeks=num_weeks,
+        depends_on=plan.dependencies[batch_start],
+        ready_s=ready_at - run_start,
+        started_s=started_at - run_start,
+        finished_s=finished_at[batch_start] - run_start,
+        clean=not (attributes.get("retries") or attributes.get("split") or attributes.get("refilled")
+                   or attributes.get("failed_weeks")),
+        llm_calls=attributes.get("llm_calls", 0),
+        output_tokens=attributes.get("output_tokens")
+    )
+
+
+def _record_batch(sizer: Optional[BatchSizer], timing: BatchTiming, weeks_delivered: int) -> None:
+    """Feeds a finished batch to the sizer. Batches served from cache are skipped."""
+    if sizer is None or not timing.llm_calls:
+        return
+    sizer.record(timing.num_weeks, weeks_delivered, timing.duration_s, timing.clean)
+
+
+class _WeekRun:
+    """
+    Bookkeeping for one stream_weeks_hybrid run, shared by both engines.
+    
+    The engine asks take_ready for the batches that may start, runs the
+    steps it gets back concurrently, and passes each result to finish, which
+    returns the batch's weeks to yield. close ends the run.
+    """
+    
+    def __init__(
+        self,
+        syllabus: str,
+        semester_info: SemesterInfo,
+        callback,
+        weeks_per_batch: int,
+        max_in_flight: int,
+        context_lag: Optional[int],
+        timings: Optional[List[BatchTiming]],
+        adaptive: bool
+    ):
+        self.syllabus = syllabus
+        self.semester_info = semester_info
+        self.callback = callback
+        self.max_in_flight = max_in_flight
+        self.timings = timings
+        self.sizer = BatchSizer(initial=weeks_per_batch) if adaptive else None
+        self.plan = _BatchPlan(
+            semester_info.total_weeks, weeks_per_batch, max_in_flight, context_lag, self.sizer
+        )
+        self.run_start = time.perf_counter()
+        self.finished_at: Dict[int, float] = {}
+        self.completed_weeks: List[WeeklyCalendar] = []
+        self.failed_weeks: List[int] = []
         
         if callback:
-            callback(wave_num, total_waves, len(all_weeks), total_weeks)
+            callback(1, self.plan.estimated_batches(), 0, semester_info.total_weeks)
+    
+    def has_pending(self) -> bool:
+        return self.plan.has_pending()
+    
+    def take_ready(self, running: int) -> List[tuple]:
+        """(batch, steps) for every batch that can start while running batches are in flight."""
+        ready = []
+        for batch_start, num_weeks in self.plan.take_ready(self.finished_at, self.max_in_flight - running):
+            previous_weeks = _context_previous_weeks(
+                self.completed_weeks, batch_start, self.plan.context_lags[batch_start]
+            )
+            ready_at = max(
+                [self.finished_at[dep] for dep in self.plan.dependencies[batch_start]],
+                default=self.run_start
+            )
+            steps = _timed_batch_steps(
+                ready_at, self.syllabus, self.semester_info, batch_start, num_weeks, previous_weeks
+            )
+            ready.append(((batch_start, num_weeks), steps))
+        return ready
+    
+    def finish(self, batch: tuple, result: tuple) -> List[WeeklyCalendar]:
+        """Records a finished batch and returns its weeks in week order."""
+        batch_start, num_weeks = batch
+        batch_weeks, batch_failed, started_at, batch_finished_at, attributes = result
         
-        batch_configs = []
-        for batch_start in range(wave_start, wave_end + 1, WEEKS_PER_BATCH):
-            batch_end = min(batch_start + WEEKS_PER_BATCH - 1, wave_end)
-            num_weeks = batch_end - batch_start + 1
-            
-            batch_configs.append({
-                'start_week': batch_start,
-                'num_weeks': num_weeks
-            })
+        self.finished_at[batch_start] = batch_finished_at
+        self.completed_weeks.extend(batch_weeks)
+        self.failed_weeks.extend(batch_failed)
         
-        with ThreadPoolExecutor(max_workers=len(batch_configs)) as executor:
-            futures = {}
-            
-            for config in batch_configs:
-                future = executor.submit(
-                    generate_multiple_weeks_batch,
-                    syllabus,
-                    semester_info,
-                    config['start_week'],
-                    config['num_weeks'],
-                    all_weeks
-                )
-                futures[future] = config['start_week']
-            
-            wave_results = []
-            for future in as_completed(futures):
-                batch_weeks = future.result()
-                wave_results.extend(batch_weeks)
-            
-            wave_results.sort(key=lambda w: w.week_number)
-            all_weeks.extend(wave_results)
+        timing = _batch_timing(
+            self.plan, batch_start, num_weeks, self.run_start, self.finished_at, started_at, attributes
+        )
+        _record_batch(self.sizer, timing, len(batch_weeks))
+        if self.timings is not None:
+            self.timings.append(timing)
+        
+        if self.callback:
+            total_batches = self.plan.estimated_batches()
+            self.callback(
+                min(len(self.finished_at) + 1, total_batches),
+                total_batches,
+                len(self.completed_weeks),
+                self.semester_info.total_weeks
+            )
         
-        wave_num += 1
+        return sorted(batch_weeks, key=lambda w: w.week_number)
     
-    return all_weeks
+    def close(self) -> None:
+        """Reports adaptive batch sizes and raises WeekGenerationError if weeks failed."""
+        if self.sizer is not None:
+            print(f"📏 Adaptive batch sizes: {self.sizer.history}")
+            run_span = current_span()
+            if run_span is not None:
+                run_span.attributes["batch_sizes"] = self.sizer.history
+        
+        if self.failed_weeks:
+            raise WeekGenerationError(sorted(self.failed_weeks), self.completed_weeks)
 
 
-def generate_quiz(syllabus: str, semester_info: Optional[SemesterInfo]) -> QuizData:
+def stream_weeks_hybrid(
+    syllabus: str, 
+    semester_info: SemesterInfo,
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    context_lag: Optional[int] = None,
+    timings: Optional[List[BatchTiming]] = None,
+    adaptive: bool = False
+) -> Iterator[WeeklyCalendar]:
     """
-    Public function to generate quiz questions.
+    Generates all weeks with a dependency-aware batch scheduler, yielding
+    each week as soon as its batch has been validated.
+    
+    A batch is submitted as soon as the batches covering its context weeks
+    have finished and fewer than max_in_flight requests are running, so one
+    slow call only delays the batches that actually read its weeks.
+    Weeks are yielded in completion order, which may differ from week order.
+    
+    Failed batches are retried, then split into single weeks, and weeks the
+    model leaves out are requested separately (see _generate_batch_resilient).
+    Weeks that still fail don't stop the other batches; once everything else
+    is done, WeekGenerationError is raised listing them.
+    
+    With adaptive=True, batches start at weeks_per_batch weeks and a
+    BatchSizer resizes later batches from the weeks per second and clean
+    first attempts of the batches that finished so far.
+    
+    Args:
+        syllabus: Course syllabus text
+        semester_info: Extracted semester information
+        callback: Optional callback function(batch_num, total_batches, weeks_completed, total_weeks)
+        weeks_per_batch: Weeks requested per LLM call (the starting size when adaptive)
+        max_in_flight: Maximum number of concurrent LLM calls
+        context_lag: Weeks between a batch and the end of its context window
+            (defaults to the batch size * (max_in_flight - 1))
+        timings: Optional list that receives one BatchTiming per batch
+        adaptive: Resize batches during the run
+    
+    Yields:
+        WeeklyCalendar objects
+    """
+    run = _WeekRun(
+        syllabus, semester_info, callback, weeks_per_batch, max_in_flight, context_lag, timings, adaptive
+    )
+    
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        running = {}
+        
+        try:
+            while run.has_pending() or running:
+                for batch, steps in run.take_ready(len(running)):
+                    # Copy the context so batch spans nest under the caller's span
+                    future = executor.submit(contextvars.copy_context().run, _run, steps)
+                    running[future] = batch
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    yield from run.finish(running.pop(future), future.result())
+        finally:
+            # Stop queued work if a batch failed or the consumer stopped early
+            for future in running:
+                future.cancel()
+    
+    run.close()
+
+
+def generate_weeks_hybrid(
+    syllabus: str, 
+    semester_info: SemesterInfo,
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    context_lag: Optional[int] = None,
+    timings: Optional[List[BatchTiming]] = None,
+    adaptive: bool = False
+) -> List[WeeklyCalendar]:
+    """
+    Generates all weeks using the batch scheduler (see stream_weeks_hybrid).
+    Pass a timings list to get each batch's size, token count and
+    whether it succeeded on the first attempt.
+    
+    Returns:
+        List of WeeklyCalendar objects sorted by week number
+    
+    Raises:
+        WeekGenerationError: if some weeks failed; its weeks attribute holds
+            the ones that were generated
     """
+    weeks = list(stream_weeks_hybrid(
+        syllabus,
+        semester_info,
+        callback=callback,
+        weeks_per_batch=weeks_per_batch,
+        max_in_flight=max_in_flight,
+        context_lag=context_lag,
+        timings=timings,
+        adaptive=adaptive
+    ))
+    weeks.sort(key=lambda w: w.week_number)
+    return weeks
+
+
+def compile_semester_calendar(syllabus: str, weeks: List[WeeklyCalendar]) -> SemesterCalendar:
+    """Wraps generated weeks in a SemesterCalendar for the given syllabus."""
+    return SemesterCalendar(
+        course_name=_extract_course_name(syllabus),
+        semester=_extract_semester_term(syllabus),
+        weeks=sorted(weeks, key=lambda w: w.week_number)
+    )
+
+
+def _quiz_messages(syllabus: str, semester_info: Optional[SemesterInfo]) -> list:
+    """Builds the prompt for quiz generation."""
     system_prompt = """Generate practice questions based on the course syllabus.
 
 Guidelines:
@@ -374,24 +1301,71 @@ Guidelines:
 - Cover different difficulty levels
 """
 
-    context = syllabus
+    context = _syllabus_for("generate_quiz", syllabus)
     if semester_info:
         context += f"\n\nKey topics: {', '.join(semester_info.major_topics[:10])}"
     
-    structured_llm = llm.with_structured_output(QuizData)
-    
-    quiz = structured_llm.invoke([
+    return [
         SystemMessage(content=system_prompt),
         HumanMessage(content=context)
-    ])
+    ]
+
+
+def _quiz_steps(syllabus: str, semester_info: Optional[SemesterInfo], use_cache: bool = True):
+    """Steps for generate_quiz."""
+    return (yield from _structured_steps(
+        "generate_quiz", QuizData, _quiz_messages(syllabus, semester_info), use_cache=use_cache
+    ))
+
+
+def generate_quiz(syllabus: str, semester_info: Optional[SemesterInfo], use_cache: bool = True) -> QuizData:
+    """
+    Public function to generate quiz questions.
+    Pass use_cache=False to get a fresh set instead of the cached one.
+    """
+    return _run(_quiz_steps(syllabus, semester_info, use_cache))
+
+
+# ============ Planner Helpers =============
+
+PlannerMode = Literal["llm", "rules", "auto"]
+
+# Words that clearly mean the course is assessed
+_ASSESSMENT_PATTERN = re.compile(
+    r"\b(exams?|midterms?|finals?|quiz(?:zes)?|assignments?|homeworks?|assessments?)\b",
+    re.IGNORECASE
+)
+
+# Words that may or may not refer to graded work
+_AMBIGUOUS_ASSESSMENT_PATTERN = re.compile(
+    r"\b(tests?|projects?|presentations?|papers?|reports?|labs?|graded|grading)\b",
+    re.IGNORECASE
+)
+
+
+def _rule_based_plan(syllabus: str, decisive: bool = False) -> Optional[Plan]:
+    """
+    Builds the plan locally using the same rules as the planner prompt.
     
-    return quiz
+    Returns None when only ambiguous assessment words are found, unless
+    decisive is set, in which case they count as assessments.
+    """
+    steps = ["extract_semester_info", "generate_calendar"]
+    
+    if _ASSESSMENT_PATTERN.search(syllabus):
+        steps.append("generate_quiz")
+    elif _AMBIGUOUS_ASSESSMENT_PATTERN.search(syllabus):
+        if not decisive:
+            return None
+        steps.append("generate_quiz")
+    
+    return Plan(steps=steps)
 
 
 # ============ Agent Workflow Nodes =============
 
-def planner_node(state: AgentState) -> AgentState:
-    """Analyzes syllabus and creates execution plan."""
+def _planner_messages(syllabus: str) -> list:
+    """Builds the prompt for the LLM planner."""
     system_prompt = """You are a study planning assistant.
 
 Analyze the course syllabus and determine what study materials to generate.
@@ -408,212 +1382,691 @@ Available steps:
 - generate_quiz: Generates practice questions
 """
 
-    planner_llm = llm.with_structured_output(Plan)
-    
-    plan = planner_llm.invoke([
+    return [
         SystemMessage(content=system_prompt),
-        HumanMessage(content=state["syllabus"])
-    ])
+        HumanMessage(content=_syllabus_for("planner", syllabus))
+    ]
+
+
+def _plan_steps(syllabus: str, mode: PlannerMode):
+    """
+    Steps that choose the execution plan.
+    
+    mode="rules" builds the plan locally, mode="llm" always asks the model,
+    and mode="auto" asks the model only when the rules can't decide.
+    """
+    plan = None
+    if mode != "llm":
+        plan = _rule_based_plan(syllabus, decisive=(mode == "rules"))
     
+    if plan is not None:
+        print(f"🧭 Planned steps (rules): {', '.join(plan.steps)}")
+    else:
+        plan = yield from _structured_steps("planner", Plan, _planner_messages(syllabus))
+        print(f"🧭 Planned steps (llm): {', '.join(plan.steps)}")
+    return plan
+
+
+def planner_node(state: AgentState, mode: PlannerMode = "auto") -> AgentState:
+    """Analyzes syllabus and creates execution plan (see _plan_steps for the modes)."""
     return {
-        **state,
-        "plan": plan,
-        "current_step_index": 0,
+        "plan": _run(_plan_steps(state["syllabus"], mode)),
         "current_week": 1,
-        "weeks_generated": [],
-        "completed_steps": []
+        "weeks_generated": []
     }
 
 
-def executor_node(state: AgentState) -> AgentState:
-    """Central dispatcher that executes the next step in the plan."""
-    plan = state["plan"]
-    step_idx = state["current_step_index"]
+def extract_semester_info_node(state: AgentState) -> dict:
+    """Extracts semester dates, deadlines and topics."""
+    print("📊 Extracting semester information...")
+    result = extract_semester_info(state["syllabus"])
+    print(f"   ✓ Found {result.total_weeks} weeks, {len(result.key_deadlines)} deadlines")
+    return {
+        "semester_info": result,
+        "completed_steps": ["extract_semester_info"]
+    }
+
+
+def generate_calendar_node(state: AgentState, config: RunnableConfig) -> dict:
+    """
+    Generates and compiles the full semester calendar.
     
-    if not plan or step_idx >= len(plan.steps):
-        return state
+    Progress callbacks are read from config["configurable"]: "callback" is
+    passed to the batch scheduler and "on_week" receives each finished week.
+    "weeks_per_batch" and "max_in_flight" override the scheduling defaults,
+    and "adaptive" lets the scheduler resize batches during the run.
+    """
+    semester_info = state.get("semester_info")
     
-    current_step = plan.steps[step_idx]
+    if not semester_info:
+        return {"completed_steps": ["generate_calendar"]}
     
-    if current_step == "extract_semester_info":
-        print("📊 Extracting semester information...")
-        result = extract_semester_info(state["syllabus"])
-        print(f"   ✓ Found {result.total_weeks} weeks, {len(result.key_deadlines)} deadlines")
-        return {
-            **state,
-            "semester_info": result,
-            "current_step_index": step_idx + 1,
-            "completed_steps": state["completed_steps"] + ["extract_semester_info"]
-        }
+    configurable = config.get("configurable", {})
+    on_week = configurable.get("on_week")
     
-    elif current_step == "generate_calendar":
-        semester_info = state.get("semester_info")
-        
-        if not semester_info:
-            return {
-                **state,
-                "current_step_index": step_idx + 1,
-                "completed_steps": state["completed_steps"] + ["generate_calendar"]
-            }
-        
-        if state.get("weeks_generated"):
-            print("📚 Compiling full semester calendar...")
-            full_calendar = SemesterCalendar(
-                course_name=_extract_course_name(state["syllabus"]),
-                semester=_extract_semester_term(state["syllabus"]),
-                weeks=state["weeks_generated"]
-            )
-            
-            return {
-                **state,
-                "full_calendar": full_calendar,
-                "current_step_index": step_idx + 1,
-                "completed_steps": state["completed_steps"] + ["generate_calendar"]
-            }
-        
+    all_weeks = state.get("weeks_generated")
+    if not all_weeks:
         print(f"⚡ Generating {semester_info.total_weeks} weeks using parallel batches...")
-        all_weeks = generate_weeks_hybrid(state["syllabus"], semester_info)
-        
-        print("📚 Compiling full semester calendar...")
-        full_calendar = SemesterCalendar(
-            course_name=_extract_course_name(state["syllabus"]),
-            semester=_extract_semester_term(state["syllabus"]),
-            weeks=all_weeks
-        )
-        
-        return {
-            **state,
-            "full_calendar": full_calendar,
-            "weeks_generated": all_weeks,
-            "current_step_index": step_idx + 1,
-            "completed_steps": state["completed_steps"] + ["generate_calendar"]
-        }
+        all_weeks = []
+        for week in stream_weeks_hybrid(
+            state["syllabus"],
+            semester_info,
+            callback=configurable.get("callback"),
+            weeks_per_batch=configurable.get("weeks_per_batch", WEEKS_PER_BATCH),
+            max_in_flight=configurable.get("max_in_flight", MAX_IN_FLIGHT),
+            adaptive=configurable.get("adaptive", False)
+        ):
+            all_weeks.append(week)
+            if on_week:
+                on_week(week)
+        all_weeks.sort(key=lambda w: w.week_number)
     
-    elif current_step == "generate_quiz":
-        print("📝 Generating practice quiz...")
-        result = generate_quiz(state["syllabus"], state.get("semester_info"))
-        print(f"   ✓ Created {len(result.questions)} questions")
-        return {
-            **state,
-            "quiz": result,
-            "current_step_index": step_idx + 1,
-            "completed_steps": state["completed_steps"] + ["generate_quiz"]
-        }
+    print("📚 Compiling full semester calendar...")
+    full_calendar = compile_semester_calendar(state["syllabus"], all_weeks)
     
-    return state
+    return {
+        "full_calendar": full_calendar,
+        "weeks_generated": all_weeks,
+        "completed_steps": ["generate_calendar"]
+    }
 
 
-def should_continue(state: AgentState) -> Literal["executor", "end"]:
-    """Routing function: Determines if there are more steps to execute."""
+def generate_quiz_node(state: AgentState) -> dict:
+    """Generates practice questions from the syllabus and extracted topics."""
+    print("📝 Generating practice quiz...")
+    result = generate_quiz(state["syllabus"], state.get("semester_info"))
+    print(f"   ✓ Created {len(result.questions)} questions")
+    return {
+        "quiz": result,
+        "completed_steps": ["generate_quiz"]
+    }
+
+
+# Steps that only depend on extract_semester_info and can run side by side
+_PARALLEL_STEPS = ("generate_calendar", "generate_quiz")
+
+
+def _parallel_targets(state: AgentState) -> List[str]:
+    """Planned steps to fan out to once semester info is available."""
     plan = state["plan"]
-    step_idx = state["current_step_index"]
+    steps = plan.steps if plan else []
+    targets = [step for step in _PARALLEL_STEPS if step in steps]
+    return targets or [END]
+
+
+def route_after_planner(state: AgentState) -> List[str]:
+    """Routing function: Runs extraction first when planned, otherwise fans out."""
+    plan = state["plan"]
+    if plan and "extract_semester_info" in plan.steps:
+        return ["extract_semester_info"]
+    return _parallel_targets(state)
+
+
+def route_after_extract(state: AgentState) -> List[str]:
+    """Routing function: Starts calendar and quiz generation in parallel."""
+    return _parallel_targets(state)
+
+
+# ============ Workflow Builder =============
+
+def _traced_node(name: str, node):
+    """Wraps a node so each run is recorded as a "node" span."""
+    takes_config = "config" in inspect.signature(node).parameters
     
-    if not plan or step_idx >= len(plan.steps):
-        return "end"
+    def run(state: AgentState, config: RunnableConfig) -> dict:
+        with tracer.span(name, kind="node"):
+            return node(state, config) if takes_config else node(state)
     
-    return "executor"
+    return run
 
 
-# ============ Workflow Builder =============
+# Models stored in AgentState. LangGraph warns when a checkpoint holds a type
+# its serializer wasn't told about (and will refuse it in a later version)
+_STATE_MODELS = (Plan, SemesterInfo, StudyBlock, DaySchedule, WeeklyCalendar, SemesterCalendar, QuizData)
+
+
+def _register_state_models(checkpointer):
+    """
+    Returns the checkpointer with the state models on its serializer's
+    msgpack allowlist. A registered copy shares the original's storage.
+    """
+    if checkpointer is None:
+        return None
+    models = [(model.__module__, model.__name__) for model in _STATE_MODELS]
+    registered = checkpointer.with_allowlist(models)
+    if registered is not checkpointer or not isinstance(checkpointer.serde, JsonPlusSerializer):
+        return registered
+    
+    # The default serializer accepts any type with a warning, and
+    # with_allowlist leaves it unchanged, so switch it to an explicit list
+    registered = copy.copy(checkpointer)
+    registered.serde = JsonPlusSerializer(
+        pickle_fallback=checkpointer.serde.pickle_fallback,
+        allowed_msgpack_modules=models
+    )
+    return registered
+
 
-def build_workflow() -> StateGraph:
-    """Constructs the agent workflow graph."""
+def build_workflow(planner_mode: PlannerMode = "auto", checkpointer=None) -> StateGraph:
+    """
+    Constructs the agent workflow graph.
+    
+    planner -> extract_semester_info, then generate_calendar and
+    generate_quiz run in parallel and their results merge into AgentState.
+    
+    Args:
+        planner_mode: "auto", "rules" or "llm" (see planner_node)
+        checkpointer: Optional LangGraph checkpointer (e.g. MemorySaver) that
+            records state after every step so failed runs can resume. The
+            state models are registered with its serializer.
+    """
     graph = StateGraph(AgentState)
     
-    graph.add_node("planner", planner_node)
-    graph.add_node("executor", executor_node)
+    nodes = {
+        "planner": lambda state: planner_node(state, planner_mode),
+        "extract_semester_info": extract_semester_info_node,
+        "generate_calendar": generate_calendar_node,
+        "generate_quiz": generate_quiz_node,
+    }
+    for name, node in nodes.items():
+        graph.add_node(name, _traced_node(name, node))
     
     graph.add_edge(START, "planner")
-    graph.add_edge("planner", "executor")
     
     graph.add_conditional_edges(
-        "executor",
-        should_continue,
-        {
-            "executor": "executor",
-            "end": END
-        }
+        "planner",
+        route_after_planner,
+        ["extract_semester_info", *_PARALLEL_STEPS, END]
     )
+    graph.add_conditional_edges(
+        "extract_semester_info",
+        route_after_extract,
+        [*_PARALLEL_STEPS, END]
+    )
+    graph.add_edge("generate_calendar", END)
+    graph.add_edge("generate_quiz", END)
     
-    return graph.compile()
+    return graph.compile(checkpointer=_register_state_models(checkpointer))
+
+
+@lru_cache(maxsize=None)
+def get_workflow(planner_mode: PlannerMode = "auto", checkpointer=None):
+    """Returns the compiled workflow, building it once per mode and checkpointer."""
+    return build_workflow(planner_mode, checkpointer)
+
+
+def _workflow_thread_id(syllabus: str, planner_mode: PlannerMode) -> str:
+    """Checkpoint thread for a syllabus, so reruns of the same input resume."""
+    digest = hashlib.sha256(syllabus.encode("utf-8")).hexdigest()[:16]
+    return f"{planner_mode}:{digest}"
+
+
+def _initial_state(syllabus: str) -> AgentState:
+    """Workflow input for a fresh run."""
+    return {
+        "syllabus": syllabus,
+        "plan": None,
+        "semester_info": None,
+        "current_week": 1,
+        "weeks_generated": [],
+        "full_calendar": None,
+        "quiz": None,
+        "completed_steps": []
+    }
 
 
 # ============ High-Level API Functions =============
 
-def generate_full_calendar(syllabus: str, callback=None) -> SemesterCalendar:
+def generate_full_calendar(
+    syllabus: str,
+    callback=None,
+    planner_mode: PlannerMode = "auto",
+    on_week=None,
+    checkpointer=None,
+    thread_id: Optional[str] = None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    adaptive: bool = False,
+    on_state=None
+) -> SemesterCalendar:
     """
     High-level function to generate a complete semester calendar.
     
+    With a checkpointer, an interrupted run for the same thread resumes
+    after its last completed step instead of starting over. A finished
+    thread is cleared and run again from the start.
+    
     Args:
         syllabus: Course syllabus text
         callback: Optional callback function for progress updates
+            (see stream_weeks_hybrid)
+        planner_mode: "auto", "rules" or "llm" (see planner_node)
+        on_week: Optional callback function(week) called as each week is ready
+        checkpointer: Optional LangGraph checkpointer to save progress in
+        thread_id: Checkpoint thread (defaults to a hash of the syllabus)
+        weeks_per_batch: Weeks generated per LLM call
+        max_in_flight: Maximum number of concurrent batch calls
+        adaptive: Resize batches during the run (see stream_weeks_hybrid)
+        on_state: Optional callback function(state) called with the workflow
+            state at the start and after each step, e.g. to read the
+            semester info and quiz
         
     Returns:
         Complete SemesterCalendar object
     """
-    workflow = build_workflow()
+    workflow = get_workflow(planner_mode, checkpointer)
+    config = {"configurable": {
+        "callback": callback,
+        "on_week": on_week,
+        "weeks_per_batch": weeks_per_batch,
+        "max_in_flight": max_in_flight,
+        "adaptive": adaptive
+    }}
     
-    initial_state = {
-        "syllabus": syllabus,
-        "plan": None,
-        "current_step_index": 0,
-        "semester_info": None,
-        "current_week": 1,
-        "weeks_generated": [],
-        "full_calendar": None,
-        "quiz": None,
-        "completed_steps": []
-    }
+    workflow_input = _initial_state(syllabus)
+    if checkpointer is not None:
+        thread_id = thread_id or _workflow_thread_id(syllabus, planner_mode)
+        config["configurable"]["thread_id"] = thread_id
+        
+        snapshot = workflow.get_state(config)
+        if snapshot.next:
+            done = snapshot.values.get("completed_steps") or ["planner"]
+            print(f"↩️  Resuming after: {', '.join(done)}")
+            workflow_input = None
+        elif snapshot.values:
+            checkpointer.delete_thread(thread_id)
     
-    result = workflow.invoke(initial_state)
+    result = {}
+    with tracer.span("generate_full_calendar", kind="run", planner_mode=planner_mode):
+        for result in workflow.stream(workflow_input, config=config, stream_mode="values"):
+            if on_state:
+                on_state(result)
     
     return result.get("full_calendar")
 
 
+def _group_regeneration_weeks(week_numbers: List[int], weeks_per_batch: int) -> List[tuple]:
+    """
+    Groups selected weeks into (start_week, num_weeks) batches.
+    
+    Runs of consecutive weeks share one call, split into chunks of at most
+    weeks_per_batch weeks.
+    """
+    groups = []
+    for week_num in sorted(set(week_numbers)):
+        if groups:
+            start, count = groups[-1]
+            if start + count == week_num and count < weeks_per_batch:
+                groups[-1] = (start, count + 1)
+                continue
+        groups.append((week_num, 1))
+    return groups
+
+
 def regenerate_weeks(
     syllabus: str,
     semester_info: SemesterInfo,
     week_numbers: List[int],
     existing_calendar: SemesterCalendar,
-    callback=None
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT
 ) -> SemesterCalendar:
     """
     Regenerates specific weeks in an existing calendar.
     
+    Adjacent selected weeks are regenerated together in one batch, and
+    batches run in parallel. Each batch only reads earlier weeks of the
+    existing calendar, so batches never wait on each other. Failed batches
+    are retried and split like in stream_weeks_hybrid. Weeks missing from
+    the calendar are added.
+    
     Args:
         syllabus: Course syllabus text
         semester_info: Semester information
         week_numbers: List of week numbers to regenerate
         existing_calendar: Current calendar to update
-        callback: Optional callback function for progress updates
+        callback: Optional callback function(current, total, week_num),
+            called for each week as its batch finishes
+        weeks_per_batch: Maximum adjacent weeks per LLM call
+        max_in_flight: Maximum number of concurrent LLM calls
         
     Returns:
         Updated SemesterCalendar object
+    
+    Raises:
+        WeekGenerationError: if some weeks still failed; its weeks attribute
+            holds the updated calendar's weeks, including the ones that
+            were regenerated
     """
-    regenerated_weeks = []
+    regeneration = _Regeneration(
+        syllabus, semester_info, week_numbers, existing_calendar, callback, weeks_per_batch
+    )
+    if not regeneration.groups:
+        return existing_calendar
     
-    for i, week_num in enumerate(sorted(week_numbers)):
-        if callback:
-            callback(i + 1, len(week_numbers), week_num)
-        
-        previous_weeks = [w for w in existing_calendar.weeks if w.week_number < week_num]
-        
-        new_week = generate_multiple_weeks_batch(
-            syllabus,
-            semester_info,
-            week_num,
-            1,
-            previous_weeks
+    with ThreadPoolExecutor(max_workers=min(max_in_flight, len(regeneration.groups))) as executor:
+        # Copy the context so batch spans nest under the caller's span
+        futures = {
+            executor.submit(contextvars.copy_context().run, _run, regeneration.batch_steps(group)): group
+            for group in regeneration.groups
+        }
+        for future in as_completed(futures):
+            regeneration.finish(futures[future], future.result())
+    
+    return regeneration.result()
+
+
+def _timed_regeneration_steps(syllabus, semester_info, start_week, num_weeks, previous_weeks):
+    """Steps that regenerate one group of weeks as a "batch" span. Return (weeks, failed_week_numbers)."""
+    with tracer.span(
+        "week_batch",
+        kind="batch",
+        start_week=start_week,
+        num_weeks=num_weeks,
+        context_weeks=len(previous_weeks),
+        regenerate=True
+    ) as span:
+        return (yield from _resilient_batch_steps(
+            syllabus, semester_info, start_week, num_weeks, previous_weeks, use_cache=False, span=span
+        ))
+
+
+class _Regeneration:
+    """
+    Bookkeeping for one regenerate_weeks call, shared by both engines.
+    
+    The engine runs batch_steps(group) for every group concurrently, passes
+    each result to finish as it arrives, and returns result() at the end.
+    """
+    
+    def __init__(
+        self,
+        syllabus: str,
+        semester_info: SemesterInfo,
+        week_numbers: List[int],
+        existing_calendar: SemesterCalendar,
+        callback,
+        weeks_per_batch: int
+    ):
+        self.syllabus = syllabus
+        self.semester_info = semester_info
+        self.existing_calendar = existing_calendar
+        self.callback = callback
+        self.groups = _group_regeneration_weeks(week_numbers, weeks_per_batch)
+        self.total = sum(num_weeks for _, num_weeks in self.groups)
+        self.regenerated_weeks: List[WeeklyCalendar] = []
+        self.failed_weeks: List[int] = []
+        self.weeks_done = 0
+    
+    def batch_steps(self, group: tuple):
+        """Steps that regenerate a group, reading only earlier weeks of the existing calendar."""
+        start_week, num_weeks = group
+        previous_weeks = [w for w in self.existing_calendar.weeks if w.week_number < start_week]
+        return _timed_regeneration_steps(
+            self.syllabus, self.semester_info, start_week, num_weeks, previous_weeks
         )
-        regenerated_weeks.extend(new_week)
     
+    def finish(self, group: tuple, result: tuple) -> None:
+        """Records a finished group and reports its weeks to the callback."""
+        start_week, num_weeks = group
+        weeks, failed = result
+        self.regenerated_weeks.extend(weeks)
+        self.failed_weeks.extend(failed)
+        
+        for week_num in range(start_week, start_week + num_weeks):
+            self.weeks_done += 1
+            if self.callback:
+                self.callback(self.weeks_done, self.total, week_num)
+    
+    def result(self) -> SemesterCalendar:
+        """The updated calendar; raises WeekGenerationError if some weeks failed."""
+        updated_calendar = _replace_weeks(self.existing_calendar, self.regenerated_weeks)
+        if self.failed_weeks:
+            raise WeekGenerationError(sorted(self.failed_weeks), updated_calendar.weeks)
+        return updated_calendar
+
+
+def _replace_weeks(
+    existing_calendar: SemesterCalendar,
+    regenerated_weeks: List[WeeklyCalendar]
+) -> SemesterCalendar:
+    """
+    Returns a copy of the calendar with regenerated weeks swapped in by week
+    number. Weeks the calendar doesn't have yet (e.g. ones that failed
+    earlier) are inserted. existing_calendar itself is left unchanged.
+    """
     updated_weeks = existing_calendar.weeks.copy()
     for new_week in regenerated_weeks:
         for i, week in enumerate(updated_weeks):
             if week.week_number == new_week.week_number:
                 updated_weeks[i] = new_week
                 break
+        else:
+            updated_weeks.append(new_week)
+    
+    updated_weeks.sort(key=lambda w: w.week_number)
+    return existing_calendar.model_copy(update={"weeks": updated_weeks})
+
+
+# ============ Incremental Updates =============
+
+_WEEK_REFERENCE = re.compile(r"\bweek\s*(\d+)\b", re.IGNORECASE)
+
+
+class CalendarUpdate(BaseModel):
+    """Result of update_calendar"""
+    calendar: SemesterCalendar
+    semester_info: SemesterInfo
+    affected_weeks: List[int] = Field(default_factory=list)
+    reextracted: bool = False
+    full_rebuild: bool = False
+
+
+def _changed_lines(old_syllabus: str, new_syllabus: str) -> List[str]:
+    """Lines removed from or added to the syllabus, ignoring whitespace-only edits."""
+    def normalized(text: str) -> List[str]:
+        lines = (re.sub(r"\s+", " ", line).strip() for line in text.splitlines())
+        return [line for line in lines if line]
+    
+    old_lines = normalized(old_syllabus)
+    new_lines = normalized(new_syllabus)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    
+    changed = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changed.extend(old_lines[i1:i2])
+            changed.extend(new_lines[j1:j2])
+    return changed
+
+
+def _week_of(semester_info: SemesterInfo, date_str: str) -> Optional[int]:
+    """Week number a date falls in, or None if it is unparseable or outside the semester."""
+    try:
+        day = _parse_date(date_str).date()
+    except DateParseError:
+        return None
+    week_num = (day - _parse_date(semester_info.start_date).date()).days // 7 + 1
+    if 1 <= week_num <= semester_info.total_weeks:
+        return week_num
+    return None
+
+
+def _affected_weeks(
+    old_info: SemesterInfo,
+    new_info: SemesterInfo,
+    changed_lines: List[str],
+    existing_calendar: SemesterCalendar
+) -> List[int]:
+    """
+    Weeks whose prompt inputs changed between two versions of a syllabus:
+    weeks holding an added, removed or reworded deadline, weeks named in an
+    edited line, and weeks that studied a topic the new syllabus dropped.
+    """
+    def deadline_keys(info: SemesterInfo) -> set:
+        return {
+            (str(d.get('date')), str(d.get('description', '')).strip().lower())
+            for d in info.key_deadlines
+        }
     
-    existing_calendar.weeks = updated_weeks
+    weeks = set()
+    for deadline_date, _ in deadline_keys(old_info) ^ deadline_keys(new_info):
+        weeks.add(_week_of(new_info, deadline_date))
+    
+    for line in changed_lines:
+        for match in _WEEK_REFERENCE.finditer(line):
+            weeks.add(int(match.group(1)))
+    
+    kept_topics = {topic.lower() for topic in new_info.major_topics}
+    dropped_topics = [
+        topic.lower() for topic in old_info.major_topics
+        if topic.lower() not in kept_topics
+    ]
+    if dropped_topics:
+        for week in existing_calendar.weeks:
+            studied = " ".join(
+                block.topic.lower() for day in week.schedule for block in day.blocks
+            )
+            if any(topic in studied for topic in dropped_topics):
+                weeks.add(week.week_number)
     
-    return existing_calendar
+    return sorted(w for w in weeks if w is not None and 1 <= w <= new_info.total_weeks)
+
+
+def _needs_full_rebuild(old_info: SemesterInfo, new_info: SemesterInfo) -> bool:
+    """Moving the start date or changing the length shifts every week's dates."""
+    return (
+        old_info.start_date != new_info.start_date
+        or old_info.total_weeks != new_info.total_weeks
+    )
+
+
+def update_calendar(
+    old_syllabus: str,
+    new_syllabus: str,
+    semester_info: SemesterInfo,
+    existing_calendar: SemesterCalendar,
+    callback=None,
+    weeks_per_batch: int = WEEKS_PER_BATCH,
+    max_in_flight: int = MAX_IN_FLIGHT
+) -> CalendarUpdate:
+    """
+    Updates a calendar for an edited syllabus, regenerating only the weeks
+    the edit affects.
+    
+    Semester info is only re-extracted when an edited line mentions a date
+    or a schedule item. If the start date or semester length changed, every
+    week is regenerated; otherwise only the weeks found by _affected_weeks
+    are, and the rest of existing_calendar is kept.
+    
+    Args:
+        old_syllabus: Syllabus text existing_calendar was generated from
+        new_syllabus: Edited syllabus text
+        semester_info: Semester info extracted from old_syllabus
+        existing_calendar: Current calendar to update
+        callback: Optional callback function(current, total, week_num),
+            called for each week as it is regenerated
+        weeks_per_batch: Maximum adjacent weeks per LLM call
+        max_in_flight: Maximum number of concurrent LLM calls
+        
+    Returns:
+        CalendarUpdate with the new calendar, its semester info and the
+        weeks that were regenerated
+    """
+    return _run(_update_calendar_steps(
+        old_syllabus,
+        new_syllabus,
+        semester_info,
+        existing_calendar,
+        callback,
+        weeks_per_batch,
+        max_in_flight
+    ))
+
+
+def _update_calendar_steps(
+    old_syllabus: str,
+    new_syllabus: str,
+    semester_info: SemesterInfo,
+    existing_calendar: SemesterCalendar,
+    callback,
+    weeks_per_batch: int,
+    max_in_flight: int
+):
+    """Steps for update_calendar."""
+    changed_lines = _changed_lines(old_syllabus, new_syllabus)
+    new_info = semester_info
+    reextracted = any(is_schedule_line(line) for line in changed_lines)
+    if reextracted:
+        new_info = yield from _semester_info_steps(new_syllabus)
+    
+    if _needs_full_rebuild(semester_info, new_info):
+        print("📅 Semester dates changed, regenerating every week")
+        weeks = yield ("stream_weeks", new_syllabus, new_info, callback, weeks_per_batch, max_in_flight)
+        
+        return CalendarUpdate(
+            calendar=compile_semester_calendar(new_syllabus, weeks),
+            semester_info=new_info,
+            affected_weeks=list(range(1, new_info.total_weeks + 1)),
+            reextracted=reextracted,
+            full_rebuild=True
+        )
+    
+    affected = _affected_weeks(semester_info, new_info, changed_lines, existing_calendar)
+    print(f"✏️  {len(changed_lines)} changed line(s), regenerating weeks: {affected or 'none'}")
+    
+    calendar = yield (
+        "regenerate",
+        new_syllabus,
+        new_info,
+        affected,
+        existing_calendar,
+        callback,
+        weeks_per_batch,
+        max_in_flight
+    )
+    
+    return CalendarUpdate(
+        calendar=compile_semester_calendar(new_syllabus, calendar.weeks),
+        semester_info=new_info,
+        affected_weeks=affected,
+        reextracted=reextracted
+    )
+
+
+def _collect_weeks(syllabus: str, semester_info: SemesterInfo, callback, weeks_per_batch: int, max_in_flight: int):
+    """
+    The "stream_weeks" effect: generates every week and returns them.
+    callback(current, total, week_num) is called for each finished week.
+    """
+    weeks = []
+    for week in stream_weeks_hybrid(
+        syllabus,
+        semester_info,
+        weeks_per_batch=weeks_per_batch,
+        max_in_flight=max_in_flight
+    ):
+        weeks.append(week)
+        if callback:
+            callback(len(weeks), semester_info.total_weeks, week.week_number)
+    return weeks
+
+
+def _cache_get(cache: ResponseCache, key: str, schema):
+    return cache.get(key, schema)
+
+
+def _cache_put(cache: ResponseCache, key: str, result, latency: float) -> None:
+    cache.put(key, result, latency)
+
+
+# How _run performs each effect
+_EFFECTS = {
+    "llm": _call_llm,
+    "cache_get": _cache_get,
+    "cache_put": _cache_put,
+    "sleep": time.sleep,
+    "stream_weeks": _collect_weeks,
+    "regenerate": regenerate_weeks,
+}
@@ -0,0 +1,241 @@
+"""
+Syllabus compaction for LLM prompts.
+
+Long syllabi are mostly policy boilerplate. compact_syllabus drops those
+sections, collapses whitespace and duplicate lines, and, if the text is still
+over the token budget, keeps only the lines that carry dates or topics.
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+
+# Rough token estimate for llama-style tokenizers on English text
+CHARS_PER_TOKEN = 4
+
+# Lines kept regardless of content, since they usually name the course and term
+HEADER_LINES = 2
+
+# Longer lines are split into sentences so they can be kept or dropped separately
+MAX_LINE_CHARS = 300
+
+_BOILERPLATE_HEADING = re.compile(
+    r"\b(polic(y|ies)|academic (integrity|honesty|misconduct)|honor code|plagiarism|"
+    r"accessibility|disabilit(y|ies)|accommodations?|title ix|non-?discrimination|"
+    r"diversity|inclusion|mental health|wellness|counseling|copyright|"
+    r"grading scale|grade appeals?|incompletes?|withdrawal|attendance|"
+    r"netiquette|recording|privacy|ferpa|emergency|statement)\b",
+    re.IGNORECASE
+)
+
+# Headings that open the week-by-week schedule
+_SCHEDULE_HEADING = re.compile(
+    r"\b(schedule|calendar|course outline|weekly (topics|outline)|timeline)\b",
+    re.IGNORECASE
+)
+
+_MONTHS = (
+    r"jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|"
+    r"sep(t(ember)?)?|oct(ober)?|nov(ember)?|dec(ember)?"
+)
+_DATE_BEARING = re.compile(
+    r"\b\d{4}-\d{1,2}-\d{1,2}\b|\b\d{1,2}/\d{1,2}(/\d{2,4})?\b|"
+    rf"\b({_MONTHS})\.? \d{{1,2}}\b|"
+    r"\b(mon|tues?|wed(nes)?|thu(rs)?|fri|sat(ur)?|sun)(day)?\b|"
+    r"\bweek \d+\b|\bdue\b|\bdeadline\b",
+    re.IGNORECASE
+)
+_TOPIC_BEARING = re.compile(
+    r"\b(week|module|unit|chapter|lecture|topic|lesson|part|section|reading|lab|"
+    r"exam|midterm|final|quiz|assignment|homework|project|presentation|paper)s?\b|"
+    r"^\s*(\d+[.)]|[-*•])\s+\S",
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class CompactionReport:
+    """Size of a syllabus before and after compaction"""
+    tokens_before: int
+    tokens_after: int
+    lines_before: int
+    lines_after: int
+    sections_removed: int
+    budget: Optional[int]
+
+    @property
+    def saved_fraction(self) -> float:
+        if not self.tokens_before:
+            return 0.0
+        return 1 - self.tokens_after / self.tokens_before
+
+
+@dataclass(frozen=True)
+class CompactedSyllabus:
+    text: str
+    report: CompactionReport
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without loading a tokenizer."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def is_schedule_line(line: str) -> bool:
+    """True for lines that mention a date, a deadline or a course topic."""
+    return bool(_DATE_BEARING.search(line) or _TOPIC_BEARING.search(line))
+
+
+def _is_heading(line: str) -> bool:
+    """Short lines that look like section titles."""
+    stripped = line.strip().rstrip(":")
+    if not stripped or len(stripped) > 80:
+        return False
+    if line.lstrip().startswith("#") or line.rstrip().endswith(":"):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    return bool(letters) and all(c.isupper() for c in letters) and len(stripped.split()) <= 8
+
+
+def _normalize_lines(syllabus: str) -> List[str]:
+    """Collapses whitespace, splits very long lines and drops repeated lines."""
+    lines = []
+    seen = set()
+    for raw in syllabus.splitlines():
+        line = re.sub(r"\s+", " ", raw).strip()
+        if not line:
+            continue
+
+        pieces = [line]
+        if len(line) > MAX_LINE_CHARS:
+            pieces = [p.strip() for p in re.split(r"(?<=[.;!?])\s+", line) if p.strip()]
+
+        for piece in pieces:
+            key = piece.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            lines.append(piece)
+    return lines
+
+
+def _heading_level(line: str) -> Optional[int]:
+    """Markdown heading level, or None for headings without #."""
+    match = re.match(r"\s*(#+)", line)
+    return len(match.group(1)) if match else None
+
+
+def _section_has_dates(lines: List[str], heading: int) -> bool:
+    """True if a line between this heading and the next mentions a date."""
+    for line in lines[heading + 1:]:
+        if _is_heading(line):
+            return False
+        if _DATE_BEARING.search(line):
+            return True
+    return False
+
+
+def _strip_boilerplate(lines: List[str]) -> tuple:
+    """
+    Drops sections whose heading matches a boilerplate keyword.
+
+    Headings with a date or week number ("WEEK 9: COPYRIGHT AND FAIR USE")
+    are schedule entries and always kept. So are boilerplate headings inside
+    the schedule section: deeper markdown headings, or, when levels aren't
+    known, headings whose section mentions dates. A boilerplate heading that
+    isn't nested ends the schedule section.
+    """
+    kept = []
+    removed = 0
+    skipping = False
+    schedule_level = None  # Level of the open schedule heading (0 without #)
+    for index, line in enumerate(lines):
+        if index >= HEADER_LINES and _is_heading(line):
+            level = _heading_level(line)
+            if schedule_level and level and level <= schedule_level:
+                schedule_level = None
+
+            if _DATE_BEARING.search(line):
+                skipping = False
+            elif _SCHEDULE_HEADING.search(line):
+                skipping = False
+                schedule_level = level or 0
+            elif _BOILERPLATE_HEADING.search(line):
+                if schedule_level and level:
+                    nested = level > schedule_level
+                else:
+                    nested = schedule_level is not None and _section_has_dates(lines, index)
+                skipping = not nested
+                if skipping:
+                    schedule_level = None
+            else:
+                skipping = False
+            removed += skipping
+        if not skipping:
+            kept.append(line)
+    return kept, removed
+
+
+def _fit_budget(lines: List[str], budget: int) -> List[str]:
+    """
+    Keeps header, date-bearing and topic-bearing lines, in that priority
+    order, until the budget is used up. Original line order is preserved.
+    """
+    def priority(index: int, line: str) -> int:
+        if index < HEADER_LINES:
+            return 0
+        if _DATE_BEARING.search(line):
+            return 1
+        if _TOPIC_BEARING.search(line):
+            return 2
+        return 3
+
+    ranked = sorted(
+        (priority(i, line), i) for i, line in enumerate(lines)
+    )
+    chosen = set()
+    used = 0
+    for rank, index in ranked:
+        if rank == 3:
+            break
+        cost = estimate_tokens(lines[index]) + 1
+        if used + cost > budget:
+            continue
+        chosen.add(index)
+        used += cost
+    return [line for i, line in enumerate(lines) if i in chosen]
+
+
+@lru_cache(maxsize=32)
+def compact_syllabus(syllabus: str, budget: Optional[int] = None) -> CompactedSyllabus:
+    """
+    Compacts a syllabus for use as an LLM prompt.
+
+    Args:
+        syllabus: Raw syllabus text
+        budget: Approximate token limit for the result, or None for no limit.
+            Boilerplate is removed either way; lines without dates or topics
+            are only dropped when the text is still over budget.
+
+    Returns:
+        CompactedSyllabus with the text and a CompactionReport
+    """
+    lines = _normalize_lines(syllabus)
+    lines, sections_removed = _strip_boilerplate(lines)
+
+    text = "\n".join(lines)
+    if budget is not None and estimate_tokens(text) > budget:
+        lines = _fit_budget(lines, budget)
+        text = "\n".join(lines)
+
+    report = CompactionReport(
+        tokens_before=estimate_tokens(syllabus),
+        tokens_after=estimate_tokens(text),
+        lines_before=len(syllabus.splitlines()),
+        lines_after=len(lines),
+        sections_removed=sections_removed,
+        budget=budget
+    )
+    return CompactedSyllabus(text=text, report=report)
@@ -0,0 +1,38 @@
+"""
+Shared fixtures. Every test runs against fake_llm.FakeChatModel with the
+response cache turned off, so nothing needs Ollama or touches ~/.cache.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import optimized_agent
+from fake_llm import FakeChatModel
+from llm_client import LLMClientPool
+
+
+SYLLABUS = """CS 101 Introduction to Programming
+Fall 2025
+Classes start 2025-08-25
+Homework 1 due 2025-09-05
+Midterm exam 2025-10-10
+Final project due 2025-12-05
+"""
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Routes every agent call to a zero-latency FakeChatModel and returns it."""
+    model = FakeChatModel(latency=0.0, total_weeks=6)
+    monkeypatch.setattr(optimized_agent, "llm_pool", LLMClientPool.single(model))
+    monkeypatch.setattr(optimized_agent, "response_cache", None)
+    return model
+
+
+@pytest.fixture
+def syllabus():
+    return SYLLABUS
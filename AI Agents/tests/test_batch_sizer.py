@@ -0,0 +1,46 @@
+import optimized_agent
+from fake_llm import FakeChatModel
+from llm_client import LLMClientPool
+from optimized_agent import BatchSizer
+
+
+def test_clean_batches_try_the_next_larger_size():
+    sizer = BatchSizer(initial=2, max_size=3)
+
+    sizer.record(2, 2, 1.0, clean=True)
+    assert sizer.next_size() == 3
+    sizer.record(3, 3, 1.0, clean=True)
+    assert sizer.next_size() == 3
+
+
+def test_the_faster_measured_size_wins():
+    sizer = BatchSizer(initial=3, max_size=3)
+    sizer.record(3, 3, 1.0, clean=True)
+    sizer.record(2, 2, 0.8, clean=True)
+
+    assert sizer.size == 3
+    sizer.record(3, 3, 6.0, clean=True)
+    assert sizer.size == 2
+
+
+def test_a_batch_that_needed_help_shrinks_the_size():
+    sizer = BatchSizer(initial=4)
+
+    sizer.record(4, 2, 1.0, clean=False)
+
+    assert sizer.size == 3
+
+
+def test_adaptive_runs_shrink_batches_the_model_truncates(monkeypatch, fake_llm, syllabus):
+    semester_info = optimized_agent.extract_semester_info(syllabus)
+    model = FakeChatModel(latency=0.0, total_weeks=6, truncation_rate=1.0)
+    monkeypatch.setattr(optimized_agent, "llm_pool", LLMClientPool.single(model))
+    timings = []
+
+    weeks = optimized_agent.generate_weeks_hybrid(
+        syllabus, semester_info, weeks_per_batch=3, max_in_flight=1, timings=timings, adaptive=True
+    )
+
+    assert [w.week_number for w in weeks] == [1, 2, 3, 4, 5, 6]
+    assert timings[0].num_weeks == 3 and not timings[0].clean
+    assert timings[-1].num_weeks < 3
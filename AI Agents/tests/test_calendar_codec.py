@@ -0,0 +1,64 @@
+import pytest
+
+import calendar_codec
+from calendar_codec import CalendarCodecError
+from optimized_agent import DaySchedule, SemesterCalendar, StudyBlock, WeeklyCalendar
+
+
+def make_calendar(course: str = "CS 101", week_numbers=(1, 2)) -> SemesterCalendar:
+    blocks = [
+        StudyBlock(course=course, topic="Recursion", time_range="6:00pm - 8:00pm", notes="Read ch. 3"),
+        StudyBlock(course=course, topic="Sorting", time_range="12:30am - 1:05am"),
+        # Not in the packed style, so it goes through the string table
+        StudyBlock(course=course, topic="Lab ✓", time_range="after lunch", notes=""),
+    ]
+    return SemesterCalendar(
+        course_name=course,
+        semester="Fall 2025",
+        weeks=[
+            WeeklyCalendar(
+                week_number=number,
+                week_dates=f"Week of Sep {number}",
+                schedule=[DaySchedule(day="Monday", blocks=blocks), DaySchedule(day="Friday", blocks=[])],
+                weekly_goals=["Finish homework", f"Review week {number}"],
+            )
+            for number in week_numbers
+        ],
+    )
+
+
+def test_calendars_round_trip():
+    calendars = [make_calendar(), make_calendar("MATH 221", (1, 2, 3)), make_calendar("Empty", ())]
+
+    assert calendar_codec.load_calendars(calendar_codec.dump_calendars(calendars)) == calendars
+    assert calendar_codec.decode_calendar(calendar_codec.encode_calendar(calendars[0])) == calendars[0]
+
+
+def test_loaded_calendars_match_validated_ones():
+    calendar = make_calendar()
+    loaded = calendar_codec.decode_calendar(calendar_codec.encode_calendar(calendar))
+
+    # Models are built without validation, so check what validation would set
+    assert loaded.model_dump(exclude_unset=True) == calendar.model_dump(exclude_unset=True)
+    assert loaded.model_dump_json() == calendar.model_dump_json()
+    loaded.weeks[0].schedule[0].blocks[0].notes = "Edited"
+    assert loaded.weeks[1].schedule[0].blocks[0].notes == "Read ch. 3"
+
+
+@pytest.mark.parametrize("week_number", [-1, 2 ** 32])
+def test_week_numbers_outside_uint32_raise(week_number):
+    with pytest.raises(CalendarCodecError):
+        calendar_codec.dump_calendars([make_calendar(week_numbers=(week_number,))])
+
+
+@pytest.mark.parametrize("data", [b"", b"JSON{}", calendar_codec.MAGIC + b"\x01not zlib"])
+def test_invalid_archives_raise(data):
+    with pytest.raises(CalendarCodecError):
+        calendar_codec.load_calendars(data)
+
+
+def test_truncated_archives_raise():
+    data = calendar_codec.dump_calendars([make_calendar()])
+
+    with pytest.raises(CalendarCodecError):
+        calendar_codec.load_calendars(data[:-4])
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde import jsonplus
+
+import async_agent
+import optimized_agent
+from fake_llm import FakeChatModel, FakeLLMError
+from llm_client import LLMClientPool
+
+
+class RecordingModel(FakeChatModel):
+    """Records the schema of every call and can fail all week batches."""
+
+    def __init__(self, fail_weeks: bool = False, **kwargs):
+        super().__init__(latency=0.0, total_weeks=6, **kwargs)
+        self.fail_weeks = fail_weeks
+        self.schemas = []
+
+    def respond(self, schema, messages):
+        self.schemas.append(schema.__name__)
+        if self.fail_weeks and self.requested_weeks(schema, messages):
+            raise FakeLLMError("week batch failed")
+        return super().respond(schema, messages)
+
+
+@pytest.fixture
+def use_model(monkeypatch, fake_llm):
+    monkeypatch.setattr(optimized_agent, "_retry_delay", lambda attempt, backoff: 0.0)
+
+    def use(model):
+        monkeypatch.setattr(optimized_agent, "llm_pool", LLMClientPool.single(model))
+        return model
+
+    return use
+
+
+def test_async_run_resumes_in_the_threaded_engine(use_model, syllabus):
+    checkpointer = MemorySaver()
+    failing = use_model(RecordingModel(fail_weeks=True))
+    with pytest.raises(optimized_agent.WeekGenerationError):
+        asyncio.run(async_agent.agenerate_full_calendar(
+            syllabus, planner_mode="rules", checkpointer=checkpointer, weeks_per_batch=3
+        ))
+    assert "SemesterInfo" in failing.schemas
+
+    model = use_model(RecordingModel())
+    calendar = optimized_agent.generate_full_calendar(
+        syllabus, planner_mode="rules", checkpointer=checkpointer, weeks_per_batch=3
+    )
+
+    assert [w.week_number for w in calendar.weeks] == [1, 2, 3, 4, 5, 6]
+    assert "SemesterInfo" not in model.schemas
+
+
+def test_async_run_keeps_the_quiz_when_the_calendar_fails(use_model, syllabus):
+    checkpointer = MemorySaver()
+    failing = use_model(RecordingModel(fail_weeks=True))
+    with pytest.raises(optimized_agent.WeekGenerationError):
+        asyncio.run(async_agent.agenerate_full_calendar(
+            syllabus, planner_mode="rules", checkpointer=checkpointer, weeks_per_batch=3
+        ))
+    assert "QuizData" in failing.schemas
+
+    model = use_model(RecordingModel())
+    states = []
+    calendar = asyncio.run(async_agent.agenerate_full_calendar(
+        syllabus, planner_mode="rules", checkpointer=checkpointer, weeks_per_batch=3, on_state=states.append
+    ))
+
+    assert [w.week_number for w in calendar.weeks] == [1, 2, 3, 4, 5, 6]
+    assert "QuizData" not in model.schemas
+    assert states[-1]["quiz"] is not None
+
+
+def test_async_run_passes_scheduling_options_through(use_model, syllabus):
+    model = use_model(RecordingModel())
+    checkpointer = MemorySaver()
+
+    calendar = asyncio.run(async_agent.agenerate_full_calendar(
+        syllabus, planner_mode="rules", checkpointer=checkpointer, weeks_per_batch=3, max_in_flight=1
+    ))
+
+    assert [w.week_number for w in calendar.weeks] == [1, 2, 3, 4, 5, 6]
+    assert model.schemas.count("MultiWeekCalendar") == 2
+    snapshot = optimized_agent.get_workflow("rules", checkpointer).get_state(
+        {"configurable": {"thread_id": optimized_agent._workflow_thread_id(syllabus, "rules")}}
+    )
+    assert snapshot.next == ()
+    assert sorted(snapshot.values["completed_steps"]) == [
+        "extract_semester_info", "generate_calendar", "generate_quiz"
+    ]
+
+
+def test_state_models_load_from_checkpoints_without_warnings(use_model, syllabus, monkeypatch, caplog):
+    # LangGraph warns about each unregistered type once per process
+    monkeypatch.setattr(jsonplus, "_warned_unregistered_types", set())
+    monkeypatch.setattr(jsonplus, "_warned_blocked_types", set())
+    use_model(RecordingModel())
+    checkpointer = MemorySaver()
+
+    optimized_agent.generate_full_calendar(syllabus, planner_mode="rules", checkpointer=checkpointer)
+    with caplog.at_level("WARNING"):
+        snapshot = optimized_agent.get_workflow("rules", checkpointer).get_state(
+            {"configurable": {"thread_id": optimized_agent._workflow_thread_id(syllabus, "rules")}}
+        )
+
+    assert isinstance(snapshot.values["full_calendar"], optimized_agent.SemesterCalendar)
+    assert isinstance(snapshot.values["plan"], optimized_agent.Plan)
+    assert "optimized_agent" not in caplog.text
@@ -0,0 +1,39 @@
+from datetime import date
+
+from optimized_agent import SemesterInfo, _deadline_index, _validate_semester_info
+
+
+def make_info():
+    return _validate_semester_info(SemesterInfo(
+        start_date="2025-08-25",
+        end_date="2025-12-12",
+        total_weeks=16,
+        key_deadlines=[
+            {"date": "2025-10-10", "description": "Midterm exam", "type": "exam"},
+            {"date": "Sep 5, 2025", "description": "Homework 1", "type": "assignment"},
+            {"date": "TBD", "description": "Guest lecture", "type": "event"},
+        ],
+        major_topics=["Recursion"],
+    ))
+
+
+def test_deadlines_are_found_by_date_range():
+    info = make_info()
+    index = _deadline_index(info)
+
+    assert [d["description"] for d in index.between(date(2025, 9, 1), date(2025, 10, 31))] == [
+        "Homework 1", "Midterm exam"
+    ]
+    assert index.between(date(2025, 11, 1), date(2025, 11, 30)) == []
+    assert _deadline_index(info) is index
+
+
+def test_editing_a_deadline_without_changing_its_date_rebuilds_the_index():
+    info = make_info()
+    _deadline_index(info)
+
+    info.key_deadlines[0] = {"date": "2025-10-10", "description": "Midterm moved online", "type": "quiz"}
+
+    (midterm,) = _deadline_index(info).between(date(2025, 10, 6), date(2025, 10, 12))
+    assert midterm["description"] == "Midterm moved online"
+    assert midterm["type"] == "quiz"
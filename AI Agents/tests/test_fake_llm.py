@@ -0,0 +1,73 @@
+import argparse
+import importlib.util
+import os
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from fake_llm import FakeChatModel, FakeLLMError
+from llm_client import is_transient_error
+from optimized_agent import MultiWeekCalendar
+
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+
+
+def load_benchmark(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BENCHMARKS, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def batch_request(start, end):
+    return [HumanMessage(content=f"Generate weeks {start}-{end} of the semester")]
+
+
+def test_batches_return_the_requested_weeks():
+    runnable = FakeChatModel(latency=0.0).with_structured_output(MultiWeekCalendar)
+
+    result = runnable.invoke(batch_request(3, 5))
+
+    assert [w.week_number for w in result.weeks] == [3, 4, 5]
+
+
+def test_jitter_and_failures_are_seeded():
+    def draws(seed):
+        model = FakeChatModel(latency=0.0, jitter=0.001, failure_rate=0.5, seed=seed)
+        runnable = model.with_structured_output(MultiWeekCalendar)
+        failed = []
+        for _ in range(20):
+            try:
+                runnable.invoke(batch_request(1, 1))
+                failed.append(False)
+            except FakeLLMError:
+                failed.append(True)
+        return model.latencies, failed
+
+    assert draws(1) == draws(1)
+    assert draws(1) != draws(2)
+    assert any(draws(1)[1]) and not all(draws(1)[1])
+
+
+def test_injected_failures_are_retried_by_the_agent():
+    runnable = FakeChatModel(latency=0.0, failure_rate=1.0).with_structured_output(MultiWeekCalendar)
+
+    with pytest.raises(FakeLLMError) as excinfo:
+        runnable.invoke(batch_request(1, 2))
+    assert is_transient_error(excinfo.value)
+
+
+@pytest.mark.parametrize("scenario", ["hybrid", "regenerate", "full"])
+def test_benchmark_rows_count_calls(fake_llm, scenario):
+    bench_agent = load_benchmark("bench_agent")
+    args = argparse.Namespace(
+        latency=0.0, jitter=0.0, failure_rate=0.0, seed=0, per_week_latency=0.0,
+        truncation_rate=0.0, adaptive=False, regenerate=2, repeats=2, quiet=True
+    )
+
+    row = bench_agent.run_case(args, scenario, total_weeks=4, weeks_per_batch=2, max_in_flight=2)
+
+    assert row["failed_runs"] == 0
+    assert row["wall_mean_s"] is not None
+    assert row["calls_per_calendar"] == {"hybrid": 2, "regenerate": 2, "full": 4}[scenario]
@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+import optimized_agent
+from fake_llm import FakeChatModel, FakeLLMError
+from job_queue import Job, JobQueue
+from llm_client import LLMClientPool
+from optimized_agent import SemesterCalendar
+
+
+def wait_for(jobs: JobQueue, job_id: str, timeout: float = 10.0) -> Job:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        snapshot = jobs.status(job_id)
+        if not snapshot.active:
+            return snapshot
+        time.sleep(0.01)
+    raise AssertionError(f"{job_id} did not finish")
+
+
+@pytest.fixture
+def jobs():
+    queue = JobQueue(workers=1)
+    yield queue
+    queue.shutdown()
+
+
+def test_same_syllabus_shares_a_job(fake_llm, jobs, syllabus):
+    first = jobs.submit("alice", syllabus)
+    second = jobs.submit("bob", syllabus)
+    assert first == second
+
+    snapshot = wait_for(jobs, first)
+    assert snapshot.status == "done"
+    assert [w.week_number for w in snapshot.calendar.weeks] == list(range(1, 7))
+    assert jobs.submit("carol", syllabus) == first
+
+
+def test_different_syllabi_get_their_own_jobs(fake_llm, jobs, syllabus):
+    assert jobs.submit("alice", syllabus) != jobs.submit("alice", syllabus + "\nExtra reading")
+
+
+def test_jobs_run_the_workflow(fake_llm, jobs, syllabus):
+    snapshot = wait_for(jobs, jobs.submit("alice", syllabus))
+
+    assert snapshot.status == "done"
+    assert snapshot.semester_info.total_weeks == snapshot.total_weeks == 6
+    assert snapshot.weeks_completed == 6
+    assert snapshot.quiz.questions
+
+
+def test_resubmitting_after_missing_weeks_resumes_the_run(monkeypatch, jobs, syllabus):
+    class FlakyModel(FakeChatModel):
+        fail_weeks = True
+
+        def respond(self, schema, messages):
+            self.schemas.append(schema.__name__)
+            if self.fail_weeks and self.requested_weeks(schema, messages):
+                raise FakeLLMError("week batch failed")
+            return super().respond(schema, messages)
+
+    model = FlakyModel(latency=0.0, total_weeks=6)
+    model.schemas = []
+    monkeypatch.setattr(optimized_agent, "llm_pool", LLMClientPool.single(model))
+    monkeypatch.setattr(optimized_agent, "response_cache", None)
+    monkeypatch.setattr(optimized_agent, "_retry_delay", lambda attempt, backoff: 0.0)
+
+    failed = wait_for(jobs, jobs.submit("alice", syllabus))
+    assert failed.missing_weeks == [1, 2, 3, 4, 5, 6]
+    assert model.schemas.count("SemesterInfo") == 1
+
+    model.fail_weeks = False
+    snapshot = wait_for(jobs, jobs.submit("alice", syllabus))
+    assert [w.week_number for w in snapshot.calendar.weeks] == list(range(1, 7))
+    assert snapshot.semester_info.model_dump() == failed.semester_info.model_dump()
+    assert model.schemas.count("SemesterInfo") == 1
+
+
+def test_snapshots_do_not_share_models(fake_llm, jobs, syllabus):
+    job_id = jobs.submit("alice", syllabus)
+    alice = wait_for(jobs, job_id)
+    bob = jobs.status(job_id)
+
+    assert alice.calendar is not bob.calendar
+    assert alice.semester_info is not bob.semester_info
+    alice.calendar.weeks[0].weekly_goals.append("Alice's edit")
+    alice.semester_info.major_topics.clear()
+
+    fresh = jobs.status(job_id)
+    assert "Alice's edit" not in fresh.calendar.weeks[0].weekly_goals
+    assert fresh.semester_info.major_topics
+
+
+def test_regenerating_one_session_leaves_the_other_alone(fake_llm, jobs, syllabus):
+    job_id = jobs.submit("alice", syllabus)
+    alice = wait_for(jobs, job_id)
+    bob = jobs.status(job_id)
+    bob_week_1 = bob.calendar.weeks[0]
+
+    updated = optimized_agent.regenerate_weeks(
+        syllabus, alice.semester_info, [1], alice.calendar
+    )
+
+    assert updated is not alice.calendar
+    assert alice.calendar.weeks[0] is not updated.weeks[0]
+    assert bob.calendar.weeks[0] is bob_week_1
+
+
+def test_done_jobs_with_missing_weeks_are_not_reused(jobs, syllabus):
+    calls = []
+
+    def runner(job, update):
+        calls.append(job.job_id)
+        update(calendar=SemesterCalendar(course_name="CS 101", semester="Fall 2025", weeks=[]),
+               missing_weeks=[1, 2, 3])
+
+    queue = JobQueue(workers=1, runner=runner)
+    try:
+        first = queue.submit("alice", syllabus)
+        assert wait_for(queue, first).missing_weeks == [1, 2, 3]
+        second = queue.submit("alice", syllabus)
+        assert second != first
+        wait_for(queue, second)
+        assert calls == [first, second]
+    finally:
+        queue.shutdown()
+
+
+def test_users_take_turns(syllabus):
+    release = threading.Event()
+    order = []
+
+    def runner(job, update):
+        release.wait(5)
+        order.append(job.user_id)
+
+    queue = JobQueue(workers=1, runner=runner)
+    try:
+        ids = [queue.submit("alice", f"{syllabus}\n{i}") for i in range(3)]
+        ids.append(queue.submit("bob", syllabus))
+        release.set()
+        for job_id in ids:
+            wait_for(queue, job_id)
+    finally:
+        queue.shutdown()
+    # Alice's first job starts at once; after that the two users alternate
+    assert order == ["alice", "bob", "alice", "alice"]
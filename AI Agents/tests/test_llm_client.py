@@ -0,0 +1,61 @@
+from langchain_core.messages import HumanMessage
+
+from fake_llm import FakeChatModel, FakeOllamaServer
+from llm_client import DEFAULT_MODEL, LLMClientPool
+from optimized_agent import QuizData, SemesterInfo
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory(model_name):
+        created.append(model_name)
+        return FakeChatModel(latency=0.0, model=model_name)
+
+    return LLMClientPool(factory=factory, **kwargs), created
+
+
+def test_models_and_wrappers_are_created_once():
+    pool, created = make_pool()
+
+    model, runnable = pool.structured("extract_semester_info", SemesterInfo)
+    again_model, again_runnable = pool.structured("generate_calendar", SemesterInfo)
+
+    assert created == [DEFAULT_MODEL]
+    assert again_model is model and again_runnable is runnable
+    assert pool.structured("generate_calendar", QuizData)[1] is not runnable
+
+
+def test_calls_are_routed_by_name():
+    pool, created = make_pool(routes={"generate_quiz": "small"}, default_model="large")
+
+    quiz_model, _ = pool.structured("generate_quiz", QuizData)
+    info_model, _ = pool.structured("extract_semester_info", SemesterInfo)
+
+    assert (quiz_model.model, info_model.model) == ("small", "large")
+    assert created == ["small", "large"]
+
+
+def test_from_env_routes_light_calls_to_the_small_model(monkeypatch):
+    monkeypatch.setenv("STUDY_PLANNER_MODEL", "large")
+    monkeypatch.setenv("STUDY_PLANNER_SMALL_MODEL", "small")
+    monkeypatch.setenv("STUDY_PLANNER_LLM_TIMEOUT", "30")
+
+    pool = LLMClientPool.from_env()
+
+    assert [pool.model_for(call) for call in ("planner", "generate_quiz", "generate_calendar")] == [
+        "small", "small", "large"
+    ]
+    assert pool.timeout == 30.0
+
+
+def test_pooled_ollama_client_reuses_its_connection():
+    with FakeOllamaServer(FakeChatModel(latency=0.0)) as server:
+        pool = LLMClientPool(base_url=server.url, routes={"generate_quiz": "small"})
+        for _ in range(3):
+            _, runnable = pool.structured("generate_quiz", QuizData)
+            result = runnable.invoke([HumanMessage(content="Quiz me on week 1")])
+
+        assert result["parsed"].questions
+        assert server.requests_by_model == {"small": 3}
+        assert server.connections == 1
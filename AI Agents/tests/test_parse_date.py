@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+import optimized_agent
+from optimized_agent import DateParseError, _parse_date
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-08-29", datetime(2025, 8, 29)),
+    ("2025-8-5", datetime(2025, 8, 5)),
+    ("Fri Aug 29, 2025", datetime(2025, 8, 29)),
+    ("August 29, 2025", datetime(2025, 8, 29)),
+    ("May 29, 2025", datetime(2025, 5, 29)),
+    ("Aug 29, 2025", datetime(2025, 8, 29)),
+    ("08/29/2025", datetime(2025, 8, 29)),
+    # Not a valid month/day, so read as day/month
+    ("29/08/2025", datetime(2025, 8, 29)),
+    ("  2025-08-29\n", datetime(2025, 8, 29)),
+    # Spacing the shapes don't allow but strptime does
+    ("Aug  29, 2025", datetime(2025, 8, 29)),
+])
+def test_supported_formats(text, expected):
+    assert _parse_date(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "TBD", "2025-13-01", "32/32/2025", "Week 3"])
+def test_unsupported_strings_raise(text):
+    with pytest.raises(DateParseError):
+        _parse_date(text)
+
+
+@pytest.mark.parametrize("value", [None, 20250829])
+def test_non_strings_raise(value):
+    with pytest.raises(DateParseError):
+        _parse_date(value)
+
+
+def test_results_do_not_depend_on_the_previous_shape():
+    optimized_agent._cached_date.cache_clear()
+    texts = ["08/29/2025", "2025-08-30", "Fri Aug 29, 2025", "29/08/2025", "August 30, 2025"]
+    first = [_parse_date(text) for text in texts]
+
+    optimized_agent._cached_date.cache_clear()
+    assert [_parse_date(text) for text in reversed(texts)] == first[::-1]
@@ -0,0 +1,37 @@
+import pytest
+
+import optimized_agent
+
+
+AMBIGUOUS = "CS 101\nFall 2025\nWeekly labs and a term project\n"
+NO_ASSESSMENTS = "CS 101\nFall 2025\nReadings and lectures only\n"
+
+
+@pytest.mark.parametrize("mode", ["auto", "rules"])
+def test_clear_syllabi_are_planned_without_the_model(fake_llm, syllabus, mode):
+    state = optimized_agent.planner_node({"syllabus": syllabus}, mode=mode)
+
+    assert state["plan"].steps == ["extract_semester_info", "generate_calendar", "generate_quiz"]
+    assert fake_llm.calls == 0
+
+
+def test_syllabi_without_assessments_skip_the_quiz(fake_llm):
+    state = optimized_agent.planner_node({"syllabus": NO_ASSESSMENTS}, mode="auto")
+
+    assert state["plan"].steps == ["extract_semester_info", "generate_calendar"]
+    assert fake_llm.calls == 0
+
+
+def test_ambiguous_syllabi_ask_the_model_unless_rules_only(fake_llm):
+    optimized_agent.planner_node({"syllabus": AMBIGUOUS}, mode="auto")
+    assert fake_llm.calls == 1
+
+    state = optimized_agent.planner_node({"syllabus": AMBIGUOUS}, mode="rules")
+    assert state["plan"].steps[-1] == "generate_quiz"
+    assert fake_llm.calls == 1
+
+
+def test_llm_mode_always_asks_the_model(fake_llm, syllabus):
+    optimized_agent.planner_node({"syllabus": syllabus}, mode="llm")
+
+    assert fake_llm.calls == 1
@@ -0,0 +1,60 @@
+from prompt_compaction import compact_syllabus
+
+
+def compact(*lines):
+    return compact_syllabus("\n".join(lines)).text.splitlines()
+
+
+HEADER = ("CS 101 Intro to Computing", "Fall 2025")
+
+
+def test_policy_sections_are_removed():
+    lines = compact(
+        *HEADER,
+        "ACADEMIC INTEGRITY POLICY",
+        "Copying another student's work is not allowed.",
+        "COURSE TOPICS",
+        "Recursion and sorting",
+    )
+
+    assert lines == [*HEADER, "COURSE TOPICS", "Recursion and sorting"]
+
+
+def test_week_headings_that_name_a_policy_topic_are_kept():
+    lines = compact(
+        *HEADER,
+        "WEEK 8: SEARCH ENGINES",
+        "Read chapter 8",
+        "WEEK 9: COPYRIGHT AND FAIR USE",
+        "Read chapter 9",
+        "Essay due Oct 24",
+    )
+
+    assert lines[-3:] == ["WEEK 9: COPYRIGHT AND FAIR USE", "Read chapter 9", "Essay due Oct 24"]
+
+
+def test_policy_headings_nested_in_the_schedule_are_kept():
+    lines = compact(
+        *HEADER,
+        "## Course Schedule",
+        "### Privacy",
+        "Oct 3: Data protection laws",
+        "## Attendance Policy",
+        "Attendance is taken every class.",
+    )
+
+    assert lines == [*HEADER, "## Course Schedule", "### Privacy", "Oct 3: Data protection laws"]
+
+
+def test_plain_headings_in_the_schedule_are_kept_when_their_section_has_dates():
+    lines = compact(
+        *HEADER,
+        "COURSE SCHEDULE",
+        "RECORDING STUDIO VISIT",
+        "Oct 3: Meet at the media lab",
+        "ACADEMIC HONESTY",
+        "Cite every source you use.",
+    )
+
+    assert lines == [*HEADER, "COURSE SCHEDULE", "RECORDING STUDIO VISIT", "Oct 3: Meet at the media lab"]
+    assert compact_syllabus("\n".join([*HEADER, "ACADEMIC HONESTY", "Cite it."])).report.sections_removed == 1
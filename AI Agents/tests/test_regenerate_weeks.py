@@ -0,0 +1,24 @@
+import optimized_agent
+
+
+def test_adjacent_weeks_share_a_batch_and_are_reported_once_done(fake_llm, syllabus):
+    semester_info = optimized_agent.extract_semester_info(syllabus)
+    calendar = optimized_agent.generate_full_calendar(syllabus, planner_mode="rules")
+    fake_llm.reset_stats()
+    reports = []
+
+    def callback(current, total, week_num):
+        # Fires after the week's batch has returned
+        reports.append((current, total, week_num, fake_llm.calls))
+
+    updated = optimized_agent.regenerate_weeks(
+        syllabus, semester_info, [5, 2, 3], calendar, callback=callback, weeks_per_batch=3
+    )
+
+    assert fake_llm.calls == 2
+    assert sorted(week_num for _, _, week_num, _ in reports) == [2, 3, 5]
+    assert [current for current, _, _, _ in reports] == [1, 2, 3]
+    assert all(total == 3 and calls >= 1 for _, total, _, calls in reports)
+    assert [w.week_number for w in updated.weeks] == [1, 2, 3, 4, 5, 6]
+    assert updated.weeks[0] is calendar.weeks[0]
+    assert updated.weeks[1] is not calendar.weeks[1]
@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+import async_agent
+import optimized_agent
+from fake_llm import FakeChatModel, FakeLLMError
+from llm_client import LLMClientPool
+
+
+class OneWeekAtATime(FakeChatModel):
+    """Fails every batch that asks for more than one week."""
+
+    def respond(self, schema, messages):
+        if self.requested_weeks(schema, messages) > 1:
+            raise FakeLLMError("batch too large")
+        return super().respond(schema, messages)
+
+
+class Unreachable(FakeChatModel):
+    """Behaves like ChatOllama when the Ollama server isn't running."""
+
+    def respond(self, schema, messages):
+        raise ConnectionError("Failed to connect to Ollama")
+
+
+@pytest.fixture
+def semester_info(fake_llm, syllabus):
+    return optimized_agent.extract_semester_info(syllabus)
+
+
+def use_model(monkeypatch, model):
+    monkeypatch.setattr(optimized_agent, "llm_pool", LLMClientPool.single(model))
+
+
+def resilient_batch(semester_info, syllabus, start_week=1, num_weeks=3, retries=2):
+    with optimized_agent.tracer.span("week_batch", kind="batch") as span:
+        weeks, failed = optimized_agent._generate_batch_resilient(
+            syllabus, semester_info, start_week, num_weeks, [], retries=retries, backoff=0.0, span=span
+        )
+    return weeks, failed, span.attributes
+
+
+def test_failed_batch_is_retried_then_split(monkeypatch, semester_info, syllabus):
+    model = OneWeekAtATime(latency=0.0)
+    use_model(monkeypatch, model)
+
+    weeks, failed, attributes = resilient_batch(semester_info, syllabus, retries=2)
+
+    assert [w.week_number for w in weeks] == [1, 2, 3]
+    assert failed == []
+    # Three attempts at the whole batch, then one call per week
+    assert model.calls == 3 + 3
+    assert attributes["retries"] == 2
+    assert attributes["split"] is True
+    assert attributes["refilled"] == [1, 2, 3]
+
+
+def test_weeks_left_out_are_requested_separately(monkeypatch, semester_info, syllabus):
+    model = FakeChatModel(latency=0.0, truncation_rate=1.0)
+    use_model(monkeypatch, model)
+
+    weeks, failed, attributes = resilient_batch(semester_info, syllabus)
+
+    assert [w.week_number for w in weeks] == [1, 2, 3]
+    assert failed == []
+    assert attributes["refilled"] == [2, 3]
+    assert "split" not in attributes
+
+
+def test_weeks_that_keep_failing_are_reported(monkeypatch, semester_info, syllabus):
+    model = FakeChatModel(latency=0.0, failure_rate=1.0)
+    use_model(monkeypatch, model)
+
+    weeks, failed, attributes = resilient_batch(semester_info, syllabus, retries=1)
+
+    assert weeks == []
+    assert failed == [1, 2, 3]
+    assert attributes["failed_weeks"] == [1, 2, 3]
+
+
+def test_unreachable_server_fails_without_retrying(monkeypatch, semester_info, syllabus):
+    model = Unreachable(latency=0.0)
+    use_model(monkeypatch, model)
+
+    with pytest.raises(ConnectionError):
+        resilient_batch(semester_info, syllabus)
+    assert model.calls == 1
+
+
+def test_both_engines_retry_and_split_the_same_way(monkeypatch, semester_info, syllabus):
+    monkeypatch.setattr(optimized_agent, "_retry_delay", lambda attempt, backoff: 0.0)
+    calls = {}
+    for engine in ("threaded", "asyncio"):
+        model = OneWeekAtATime(latency=0.0)
+        use_model(monkeypatch, model)
+        timings = []
+        if engine == "threaded":
+            weeks = optimized_agent.generate_weeks_hybrid(
+                syllabus, semester_info, weeks_per_batch=3, timings=timings
+            )
+        else:
+            weeks = asyncio.run(async_agent.agenerate_weeks_hybrid(
+                syllabus, semester_info, weeks_per_batch=3, timings=timings
+            ))
+
+        assert [w.week_number for w in weeks] == list(range(1, semester_info.total_weeks + 1))
+        assert [t.clean for t in timings] == [False, False]
+        calls[engine] = model.calls
+
+    # Each batch: three attempts, then one call per week
+    assert calls == {"threaded": 12, "asyncio": 12}
+
+
+def test_slow_batch_call_hits_the_deadline(monkeypatch, semester_info, syllabus):
+    use_model(monkeypatch, FakeChatModel(latency=1.0))
+    monkeypatch.setattr(optimized_agent, "BATCH_TIMEOUT_S", 0.1)
+
+    started_at = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        optimized_agent.generate_multiple_weeks_batch(syllabus, semester_info, 1, 2, [])
+    assert time.perf_counter() - started_at < 0.5
+
+
+def test_async_deadline_excludes_time_waiting_for_a_slot(monkeypatch, semester_info, syllabus):
+    use_model(monkeypatch, FakeChatModel(latency=0.2))
+    monkeypatch.setattr(optimized_agent, "BATCH_TIMEOUT_S", 0.3)
+    limit = async_agent.MAX_CONCURRENT_REQUESTS
+    async_agent.set_max_concurrency(1)
+
+    async def three_batches():
+        return await asyncio.gather(*(
+            async_agent.agenerate_multiple_weeks_batch(syllabus, semester_info, week, 1, [])
+            for week in (1, 2, 3)
+        ))
+
+    try:
+        # The last call waits 0.4s for its slot, longer than the deadline
+        results = asyncio.run(three_batches())
+    finally:
+        async_agent.set_max_concurrency(limit)
+    assert [weeks[0].week_number for weeks in results] == [1, 2, 3]
@@ -0,0 +1,35 @@
+import optimized_agent
+
+
+def test_batches_start_when_their_context_batches_finish():
+    plan = optimized_agent._BatchPlan(total_weeks=6, weeks_per_batch=2, max_in_flight=2)
+
+    assert plan.take_ready({}, limit=2) == [(1, 2), (3, 2)]
+    assert plan.dependencies[5] == [1]
+    # Batch 3 finishing doesn't help: batch 5 reads weeks 1-2
+    assert plan.take_ready({3: 1.0}, limit=1) == []
+    # Batch 5 can start while batch 3 is still running
+    assert plan.take_ready({1: 1.0}, limit=1) == [(5, 2)]
+    assert not plan.has_pending()
+
+
+def test_all_weeks_are_generated_within_the_in_flight_limit(fake_llm, syllabus):
+    semester_info = optimized_agent.extract_semester_info(syllabus)
+    fake_llm.latency = 0.02
+    timings = []
+    progress = []
+
+    weeks = optimized_agent.generate_weeks_hybrid(
+        syllabus, semester_info, callback=lambda *args: progress.append(args),
+        weeks_per_batch=2, max_in_flight=2, timings=timings
+    )
+
+    assert [w.week_number for w in weeks] == [1, 2, 3, 4, 5, 6]
+    assert sorted((t.start_week, t.num_weeks) for t in timings) == [(1, 2), (3, 2), (5, 2)]
+    first, _, last = sorted(timings, key=lambda t: t.start_week)
+    assert last.depends_on == [1]
+    assert last.started_s >= first.finished_s
+    for t in timings:
+        running = [o for o in timings if o.started_s <= t.started_s < o.finished_s]
+        assert len(running) <= 2
+    assert progress[-1][2:] == (6, 6)
@@ -0,0 +1,48 @@
+import pytest
+
+import optimized_agent
+
+
+@pytest.fixture
+def original(fake_llm, syllabus):
+    semester_info = optimized_agent.extract_semester_info(syllabus)
+    calendar = optimized_agent.generate_full_calendar(syllabus, planner_mode="rules")
+    fake_llm.reset_stats()
+    return semester_info, calendar
+
+
+def test_moving_a_deadline_regenerates_only_its_old_and_new_weeks(fake_llm, syllabus, original):
+    semester_info, calendar = original
+    edited = syllabus.replace("Homework 1 due 2025-09-05", "Homework 1 due 2025-09-12")
+
+    update = optimized_agent.update_calendar(syllabus, edited, semester_info, calendar)
+
+    assert update.affected_weeks == [2, 3]
+    assert update.reextracted and not update.full_rebuild
+    assert [w.week_number for w in update.calendar.weeks] == [1, 2, 3, 4, 5, 6]
+    assert update.calendar.weeks[0] is calendar.weeks[0]
+    assert update.calendar.weeks[1] is not calendar.weeks[1]
+    # One extraction and one batch for the two adjacent weeks
+    assert fake_llm.calls == 2
+
+
+def test_whitespace_edits_change_nothing(fake_llm, syllabus, original):
+    semester_info, calendar = original
+    edited = syllabus.replace("Midterm exam", "Midterm   exam") + "\n\n"
+
+    update = optimized_agent.update_calendar(syllabus, edited, semester_info, calendar)
+
+    assert update.affected_weeks == []
+    assert update.calendar.weeks == calendar.weeks
+    assert fake_llm.calls == 0
+
+
+def test_moving_the_start_date_regenerates_every_week(fake_llm, syllabus, original):
+    semester_info, calendar = original
+    edited = syllabus.replace("Classes start 2025-08-25", "Classes start 2025-09-01")
+
+    update = optimized_agent.update_calendar(syllabus, edited, semester_info, calendar)
+
+    assert update.full_rebuild
+    assert update.affected_weeks == [1, 2, 3, 4, 5, 6]
+    assert update.semester_info.start_date == "2025-09-01"
@@ -0,0 +1,44 @@
+import threading
+
+import optimized_agent
+from fake_llm import FakeChatModel
+from llm_client import LLMClientPool
+
+
+class QuizFirst(FakeChatModel):
+    """Holds week batches until the quiz has been requested."""
+
+    def __init__(self, **kwargs):
+        super().__init__(latency=0.0, total_weeks=6, **kwargs)
+        self.quiz_requested = threading.Event()
+        self.batches_waited = []
+
+    def respond(self, schema, messages):
+        if schema is optimized_agent.QuizData:
+            self.quiz_requested.set()
+        elif self.requested_weeks(schema, messages):
+            self.batches_waited.append(self.quiz_requested.wait(timeout=5))
+        return super().respond(schema, messages)
+
+
+def test_quiz_runs_alongside_the_calendar(monkeypatch, fake_llm, syllabus):
+    model = QuizFirst()
+    monkeypatch.setattr(optimized_agent, "llm_pool", LLMClientPool.single(model))
+    states = []
+
+    calendar = optimized_agent.generate_full_calendar(syllabus, planner_mode="rules", on_state=states.append)
+
+    assert model.batches_waited and all(model.batches_waited)
+    assert [w.week_number for w in calendar.weeks] == [1, 2, 3, 4, 5, 6]
+    assert states[-1]["quiz"].questions
+    assert sorted(states[-1]["completed_steps"]) == ["extract_semester_info", "generate_calendar", "generate_quiz"]
+
+
+def test_unplanned_quiz_is_skipped(fake_llm):
+    syllabus = "CS 101\nFall 2025\nClasses start 2025-08-25\nReadings and lectures only\n"
+    states = []
+
+    optimized_agent.generate_full_calendar(syllabus, planner_mode="rules", on_state=states.append)
+
+    assert states[-1].get("quiz") is None
+    assert "generate_quiz" not in states[-1]["completed_steps"]
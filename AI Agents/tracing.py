@@ -0,0 +1,182 @@
+"""
+Lightweight spans for the study planner.
+
+The agent records one span per graph node, per week batch and per LLM call.
+Spans are kept in memory (bounded), summarized for the Streamlit debug
+sidebar and exported as JSON lines or as a Chrome trace, which can be opened
+in chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Span:
+    """One timed operation"""
+    name: str
+    kind: str
+    span_id: int
+    parent_id: Optional[int]
+    started_at: float  # time.perf_counter() value
+    duration_s: float = 0.0
+    thread_id: int = 0
+    thread_name: str = ""
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost open span in this context, if any."""
+    return _current_span.get()
+
+
+class Tracer:
+    """
+    Thread-safe span recorder.
+
+    Args:
+        max_spans: Oldest spans are dropped beyond this many
+        enabled: When False, span() still runs the body but records nothing
+    """
+
+    def __init__(self, max_spans: int = 10000, enabled: bool = True):
+        self.enabled = enabled
+        self._spans = deque(maxlen=max_spans)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._origin_unix = time.time()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes) -> Iterator[Span]:
+        """
+        Times the body as a span. Attributes can be added to the yielded span
+        while it runs. Spans opened inside the body, in the same thread or in
+        a copied context, record this span as their parent.
+        """
+        parent = _current_span.get()
+        thread = threading.current_thread()
+        span = Span(
+            name=name,
+            kind=kind,
+            span_id=next(self._ids),
+            parent_id=parent.span_id if parent is not None else None,
+            started_at=time.perf_counter(),
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            attributes=attributes
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_s = time.perf_counter() - span.started_at
+            if self.enabled:
+                with self._lock:
+                    self._spans.append(span)
+
+    def spans(self, kind: Optional[str] = None) -> List[Span]:
+        """Finished spans in completion order, optionally of one kind."""
+        with self._lock:
+            spans = list(self._spans)
+        if kind is not None:
+            spans = [s for s in spans if s.kind == kind]
+        return spans
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Count, total, mean and max duration per (kind, name), slowest total first."""
+        groups: Dict[tuple, List[float]] = {}
+        for span in self.spans():
+            groups.setdefault((span.kind, span.name), []).append(span.duration_s)
+
+        rows = [
+            {
+                "kind": kind,
+                "name": name,
+                "count": len(durations),
+                "total_s": sum(durations),
+                "mean_s": sum(durations) / len(durations),
+                "max_s": max(durations),
+            }
+            for (kind, name), durations in groups.items()
+        ]
+        rows.sort(key=lambda row: row["total_s"], reverse=True)
+        return rows
+
+    # ---------- Export ----------
+
+    def to_jsonl(self) -> str:
+        """One JSON object per span, with start times relative to the tracer."""
+        lines = []
+        for span in self.spans():
+            record = asdict(span)
+            record["start_s"] = span.started_at - self._origin
+            record["start_unix"] = self._origin_unix + record["start_s"]
+            del record["started_at"]
+            lines.append(json.dumps(record, default=str))
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def to_chrome_trace(self) -> str:
+        """Spans as complete ("X") events in the Chrome trace event format."""
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        for span in self.spans():
+            thread_names[span.thread_id] = span.thread_name
+            events.append({
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": (span.started_at - self._origin) * 1e6,
+                "dur": span.duration_s * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {**span.attributes, **({"error": span.error} if span.error else {})},
+            })
+        for thread_id, thread_name in thread_names.items():
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": thread_name},
+            })
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+
+    def export(self, path: str) -> None:
+        """Writes a Chrome trace for .json paths and JSON lines otherwise."""
+        data = self.to_chrome_trace() if path.endswith(".json") else self.to_jsonl()
+        with open(path, "w") as f:
+            f.write(data)
+
+
+def tracer_from_env() -> Tracer:
+    """
+    Builds the default tracer from environment variables.
+
+    STUDY_PLANNER_TRACE: "off" to stop recording spans
+    STUDY_PLANNER_TRACE_SPANS: number of spans kept in memory
+    """
+    enabled = os.environ.get("STUDY_PLANNER_TRACE", "on").lower() not in ("off", "0", "false", "none")
+    max_spans = int(os.environ.get("STUDY_PLANNER_TRACE_SPANS", 10000))
+    return Tracer(max_spans=max_spans, enabled=enabled)